@@ -1,25 +1,110 @@
 import streamlit as st
 import pandas as pd
-import os
-import io
 from PIL import Image
 
-from src.preprocessing import (
-    charger_donnees_anonymisees,
-    nettoyer_donnees,
-    filtrer_contrats_eligibles,
-    ajouter_variable_cible
-)
-from src.features import preparer_features
-from src.eda import executer_eda_streamlit
-from src.comparaison_models import comparer_modeles_streamlit
-from src.training_xgboost import entrainer_xgboost
-from src.Courbe_ROC import afficher_courbe_roc
+from src.preprocessing import charger_donnees_anonymisees
+from src.pipeline import preparer_jeu_modele
+from src.cache_excel import empreinte_contenu
+from src.cache_memoire import CacheLRU
+from src.interface_streamlit import afficher_courbe_roc, comparer_modeles_streamlit, executer_eda_streamlit
 from src.predict import predire_clients_a_risque
+from src.cache_scores import obtenir_scores
+from src.registre_modeles import version_modele
+from src.recherche_contrats import IndexContrats
+from src.export import FORMATS_EXPORT, exporter
+from src.instrumentation import chemin_trace, repere_traces, resumer_traces, traces_recentes
 
 # ===== Configuration de la page =====
 st.set_page_config(page_title="Dashboard LLD", layout="wide")
 
+# ===== Mesures de performance de cette exécution (src/instrumentation.py) =====
+REPERE_TRACES = repere_traces()
+afficher_performance = st.sidebar.checkbox("⏱ Performance", help="Temps, CPU, mémoire et lignes de chaque étape")
+
+# ===== Cache des traitements (partagé entre sessions) =====
+TAILLE_MAX_CACHE_TRAITEMENTS = 1024 ** 3  # 1 Go
+MODELE_XGBOOST = "models/xgboost_model.joblib"
+
+@st.cache_resource
+def cache_traitements() -> CacheLRU:
+    return CacheLRU(taille_max=TAILLE_MAX_CACHE_TRAITEMENTS)
+
+def empreinte_fichier(fichier) -> str:
+    """
+    Empreinte du contenu du fichier chargé, calculée une seule fois par fichier et par session.
+    """
+    cle = f"empreinte_{getattr(fichier, 'file_id', None)}"
+    if cle not in st.session_state or getattr(fichier, "file_id", None) is None:
+        st.session_state[cle] = empreinte_contenu(fichier)
+    return st.session_state[cle]
+
+def charger_et_preparer(fichier, empreinte: str):
+    """
+    Chargement + préparation (df_final, df_model), mémoïsés sur l'empreinte du fichier :
+    les interactions suivantes (recherche, onglets...) ne relancent pas le traitement.
+    """
+    return cache_traitements().obtenir_ou_calculer(
+        empreinte,
+        lambda: preparer_jeu_modele(charger_donnees_anonymisees(fichier))
+    )
+
+def clients_a_risque(df_model, empreinte: str):
+    """
+    Prédiction des clients à risque + index de recherche des numéros de contrat,
+    mémoïsés par (fichier, version du modèle).
+    """
+    def calculer():
+        scores = obtenir_scores(df_model, MODELE_XGBOOST, cache_traitements(), empreinte)
+        df_risque, df_top_50 = predire_clients_a_risque(df_model, model_path=MODELE_XGBOOST, scores=scores)
+        return df_risque, df_top_50, IndexContrats(df_risque["No du Contrat"])
+
+    cle = (empreinte, version_modele(MODELE_XGBOOST), "clients_a_risque")
+    return cache_traitements().obtenir_ou_calculer(cle, calculer)
+
+def bouton_export(df, nom_fichier: str, libelle: str, cle_resultat: tuple):
+    """
+    Export à la demande : le fichier n'est généré qu'au clic sur "Préparer",
+    puis conservé en cache pour ce résultat de scoring et ce format.
+    """
+    format_export = st.radio("Format d'export", list(FORMATS_EXPORT), horizontal=True, key=f"format_{nom_fichier}")
+    extension, mime = FORMATS_EXPORT[format_export]
+
+    cle = cle_resultat + (nom_fichier, format_export)
+    donnees = cache_traitements().obtenir(cle)
+    if donnees is None and st.button(f"⚙️ Préparer le fichier {format_export}", key=f"preparer_{nom_fichier}"):
+        with st.spinner("Génération du fichier..."):
+            donnees = exporter(df, format_export, nom_feuille=nom_fichier)
+        cache_traitements().ajouter(cle, donnees)
+
+    if donnees is not None:
+        st.download_button(
+            label=f"{libelle} ({format_export})",
+            data=donnees,
+            file_name=nom_fichier + extension,
+            mime=mime
+        )
+
+def panneau_performance(repere: int):
+    """
+    Étapes mesurées pendant cette exécution du script, puis cumul des dernières exécutions.
+    Les résultats servis par le cache n'apparaissent pas (aucune étape n'a tourné).
+    """
+    with st.expander("⏱ Performance", expanded=True):
+        traces = traces_recentes(repere)
+        if traces:
+            st.write("*Étapes de cette exécution :*")
+            st.dataframe(pd.DataFrame(traces).drop(columns=["debut", "pid"]), use_container_width=True)
+        else:
+            st.write("Aucune étape calculée pendant cette exécution (résultats en cache).")
+
+        resume = resumer_traces(traces_recentes())
+        if not resume.empty:
+            st.write("*Cumul des dernières étapes mesurées :*")
+            st.bar_chart(resume.set_index("etape")["secondes"])
+            st.dataframe(resume, use_container_width=True)
+        if chemin_trace():
+            st.caption(f"Trace complète : {chemin_trace()}")
+
 # ===== Styles personnalisés =====
 st.markdown("""
     <style>
@@ -81,14 +166,10 @@ uploaded_file = st.file_uploader(
 if uploaded_file:
     try:
         with st.spinner("Chargement et traitement des données, veuillez patienter..."):
-            df = charger_donnees_anonymisees(uploaded_file)
+            empreinte = empreinte_fichier(uploaded_file)
+            df_final, df_model = charger_et_preparer(uploaded_file, empreinte)
             st.success("✅ Données chargées")
 
-            df_cleaned = nettoyer_donnees(df)
-            df_filtered = filtrer_contrats_eligibles(df_cleaned)
-            df_final = ajouter_variable_cible(df_filtered)
-            df_model = preparer_features(df_final)
-
         # ===== Navigation par onglets (sans entraînement) =====
         onglets = st.tabs([
             "🔍 Analyse exploratoire (EDA)",
@@ -116,7 +197,7 @@ if uploaded_file:
             col4.metric("📉 % Non renouvelés", f"{taux_non_renouvellement} %")
 
             st.markdown("---")
-            executer_eda_streamlit(df_model)
+            executer_eda_streamlit(df_model, cache=cache_traitements(), empreinte=empreinte)
 
         # 📊 Comparaison modèles
         with onglets[1]:
@@ -126,32 +207,28 @@ if uploaded_file:
         # 📈 Courbe ROC
         with onglets[2]:
             st.subheader("📈 Courbe ROC - XGBoost")
-            afficher_courbe_roc(df_model, model_path="models/xgboost_model.joblib")
+            afficher_courbe_roc(df_model, model_path=MODELE_XGBOOST, cache=cache_traitements(), empreinte=empreinte)
 
         # 🚨 Clients à risque
         with onglets[3]:
             st.subheader("🚨 Prédiction des clients à risque de non-renouvellement")
-            df_risque, df_top_50 = predire_clients_a_risque(df_model)
+            df_risque, df_top_50, index_contrats = clients_a_risque(df_model, empreinte)
             st.success(f"{len(df_risque)} clients à risque détectés")
 
             recherche = st.text_input("🔎 Rechercher un contrat")
             if recherche:
-                resultats = df_risque[df_risque["No du Contrat"].astype(str).str.contains(recherche)]
+                resultats = df_risque.iloc[index_contrats.rechercher(recherche)]
             else:
                 resultats = df_risque.head(1000)
 
             st.write("📋 Liste complète (limitée à 1000 lignes)")
             st.dataframe(resultats, use_container_width=True)
 
-            buffer_risque = io.BytesIO()
-            with pd.ExcelWriter(buffer_risque, engine="openpyxl") as writer:
-                df_risque.to_excel(writer, sheet_name="clients_a_risque", index=False)
-
-            st.download_button(
-                label="📥 Télécharger tous les clients à risque (Excel)",
-                data=buffer_risque.getvalue(),
-                file_name="clients_a_risque.xlsx",
-                mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+            bouton_export(
+                df_risque,
+                nom_fichier="clients_a_risque",
+                libelle="📥 Télécharger tous les clients à risque",
+                cle_resultat=(empreinte, version_modele(MODELE_XGBOOST))
             )
 
         # 🏆 Top 50 clients
@@ -160,15 +237,11 @@ if uploaded_file:
             st.write("📈 Ces clients présentent le risque le plus élevé de non-renouvellement.")
             st.dataframe(df_top_50, use_container_width=True)
 
-            buffer = io.BytesIO()
-            with pd.ExcelWriter(buffer, engine="openpyxl") as writer:
-                df_top_50.to_excel(writer, sheet_name="top_50_clients", index=False)
-
-            st.download_button(
-                label="📥 Télécharger le Top 50 (Excel)",
-                data=buffer.getvalue(),
-                file_name="top_50_clients.xlsx",
-                mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+            bouton_export(
+                df_top_50,
+                nom_fichier="top_50_clients",
+                libelle="📥 Télécharger le Top 50",
+                cle_resultat=(empreinte, version_modele(MODELE_XGBOOST))
             )
 
     except Exception as e:
@@ -177,3 +250,6 @@ if uploaded_file:
 else:
     st.info("💡 Veuillez charger un fichier Excel anonymisé pour commencer.")
 
+# ===== Panneau de performance (optionnel) =====
+if afficher_performance:
+    panneau_performance(REPERE_TRACES)
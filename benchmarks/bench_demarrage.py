@@ -0,0 +1,116 @@
+import ast
+import datetime
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+from benchmarks.bench_etapes import RESULTATS_PATH, commit_courant
+
+# Benchmark du démarrage à froid : imports de niveau module des points d'entrée (main.py, app.py...),
+# exécutés dans un interpréteur neuf. Le pipeline et l'interface ne sont pas lancés.
+# Indique aussi quelles bibliothèques lourdes sont chargées dès le démarrage (elles devraient l'être à l'usage).
+# Usage : python -m benchmarks.bench_demarrage [repetitions]
+
+POINTS_ENTREE = {
+    "cli": "main.py",
+    "app": "app.py",
+    "comparaison": "compare_models.py",
+}
+MODULES_LOURDS = ["streamlit", "xgboost", "sklearn", "scipy", "matplotlib", "seaborn"]
+N_MODULES_DETAIL = 10
+
+SCRIPT_MESURE = """
+import sys, time
+debut = time.perf_counter()
+{imports}
+duree = time.perf_counter() - debut
+import json
+print(json.dumps({{"secondes": duree, "modules_lourds": [m for m in {lourds!r} if m in sys.modules]}}))
+"""
+
+
+def instructions_import(chemin: str) -> str:
+    """
+    Instructions import / from ... import de niveau module d'un script (dans l'ordre du fichier).
+    """
+    with open(chemin, encoding="utf-8") as f:
+        arbre = ast.parse(f.read(), chemin)
+    return "\n".join(ast.unparse(noeud) for noeud in arbre.body if isinstance(noeud, (ast.Import, ast.ImportFrom)))
+
+
+def _executer(script: str, *options):
+    debut = time.perf_counter()
+    processus = subprocess.run(
+        [sys.executable, *options, "-c", script], capture_output=True, text=True, check=True
+    )
+    return processus, time.perf_counter() - debut
+
+
+def modules_les_plus_lents(imports: str, n: int = N_MODULES_DETAIL) -> list:
+    """
+    Paquets de premier niveau les plus coûteux à importer (python -X importtime, temps cumulé en s).
+    """
+    processus, _ = _executer(imports, "-X", "importtime")
+    paquets = []
+    for ligne in processus.stderr.splitlines():
+        if not ligne.startswith("import time:") or "cumulative" in ligne:
+            continue
+        _, cumule, nom = ligne[len("import time:"):].split("|")
+        if not nom.startswith("  "):  # niveau 0 : importé directement par le script
+            paquets.append((nom.strip(), int(cumule) / 1e6))
+    return sorted(paquets, key=lambda paquet: paquet[1], reverse=True)[:n]
+
+
+def mesurer_demarrage(chemin: str, repetitions: int = 5) -> dict:
+    """
+    Temps des imports du point d'entrée (médiane et minimum sur repetitions processus neufs),
+    temps total du processus (démarrage de l'interpréteur compris) et bibliothèques lourdes chargées.
+    """
+    imports = instructions_import(chemin)
+    script = SCRIPT_MESURE.format(imports=imports, lourds=MODULES_LOURDS)
+
+    imports_secondes, processus_secondes = [], []
+    for _ in range(repetitions):
+        processus, duree = _executer(script)
+        mesure = json.loads(processus.stdout.strip().splitlines()[-1])
+        imports_secondes.append(mesure["secondes"])
+        processus_secondes.append(duree)
+
+    return {
+        "fichier": chemin,
+        "imports_secondes_mediane": round(statistics.median(imports_secondes), 4),
+        "imports_secondes_min": round(min(imports_secondes), 4),
+        "processus_secondes_mediane": round(statistics.median(processus_secondes), 4),
+        "modules_lourds_charges": mesure["modules_lourds"],
+        "modules_les_plus_lents": modules_les_plus_lents(imports),
+    }
+
+
+if __name__ == "__main__":
+    repetitions = int(sys.argv[1]) if len(sys.argv) > 1 else 5
+
+    resultats = {
+        "commit": commit_courant(),
+        "date": datetime.datetime.now().isoformat(timespec="seconds"),
+        "python": sys.version.split()[0],
+        "repetitions": repetitions,
+        "points_entree": {},
+    }
+    for nom, chemin in POINTS_ENTREE.items():
+        mesure = mesurer_demarrage(chemin, repetitions)
+        resultats["points_entree"][nom] = mesure
+        print(f"🚀 {nom:<12} ({chemin}) : imports {mesure['imports_secondes_mediane']:.3f} s "
+              f"| processus {mesure['processus_secondes_mediane']:.3f} s "
+              f"| chargés au démarrage : {', '.join(mesure['modules_lourds_charges']) or 'aucun module lourd'}")
+        for paquet, secondes in mesure["modules_les_plus_lents"][:5]:
+            print(f"     {paquet:<30} {secondes:.3f} s")
+
+    os.makedirs(RESULTATS_PATH, exist_ok=True)
+    horodatage = resultats["date"].replace(":", "").replace("-", "")
+    chemin = os.path.join(RESULTATS_PATH, f"demarrage_{horodatage}_{resultats['commit'] or 'hors_git'}.json")
+    with open(chemin, "w", encoding="utf-8") as f:
+        json.dump(resultats, f, ensure_ascii=False, indent=2)
+    print(f"\n✅ Résultats enregistrés dans {chemin}")
@@ -0,0 +1,196 @@
+import argparse
+import datetime
+import json
+import os
+import platform
+import subprocess
+import tempfile
+import time
+import tracemalloc
+
+import joblib
+import numpy as np
+import pandas as pd
+import sklearn
+import xgboost
+from sklearn.model_selection import train_test_split
+from xgboost import XGBClassifier
+
+from src.donnees_synthetiques import LIGNES_MAX_EXCEL, PART_DOUBLONS, generer_classeur, generer_contrats
+from src.export import FORMATS_EXPORT, exporter
+from src.features import preparer_features
+from src.predict import COLONNES_NON_FEATURES, predire_clients_a_risque
+from src.preprocessing import (
+    ajouter_variable_cible,
+    charger_donnees_anonymisees,
+    filtrer_contrats_eligibles,
+    nettoyer_donnees
+)
+from src.training_xgboost import HYPERPARAMETRES_XGBOOST
+
+# Benchmark étape par étape du pipeline sur données synthétiques (src/donnees_synthetiques.py) :
+# temps réel, temps CPU et pic mémoire de chaque étape, résultats en JSON pour comparer deux commits.
+# Usage :
+#   python -m benchmarks.bench_etapes [nombre_de_lignes ...] [--sans-classeur] [--sans-memoire]
+#   python -m benchmarks.bench_etapes --comparer avant.json apres.json
+
+RESULTATS_PATH = "benchmarks/resultats"
+TAILLES_PAR_DEFAUT = [40_000]  # taille de l'extrait réel ; 1_000_000 et 10_000_000 pour la montée en charge
+
+
+def mesurer_etape(fonction, *args, memoire: bool = True):
+    """
+    Exécute fonction(*args) et mesure temps réel (s), temps CPU (s) et pic mémoire alloué (Mo).
+    Le temps est mesuré sans tracemalloc (qui ralentit les allocations) ; le pic mémoire
+    par une seconde exécution sous tracemalloc si memoire.
+
+    Returns:
+        (résultat de la fonction, mesures)
+    """
+    debut, debut_cpu = time.perf_counter(), time.process_time()
+    resultat = fonction(*args)
+    mesures = {
+        "secondes": round(time.perf_counter() - debut, 4),
+        "secondes_cpu": round(time.process_time() - debut_cpu, 4),
+    }
+
+    if memoire:
+        tracemalloc.start()
+        fonction(*args)
+        _, pic = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        mesures["pic_memoire_mo"] = round(pic / 1024 ** 2, 2)
+
+    return resultat, mesures
+
+
+def entrainer(df_model: pd.DataFrame, chemin_modele: str) -> str:
+    """
+    Entraînement XGBoost de entrainer_modele_xgboost (même split, mêmes hyperparamètres), sans affichage ni cache.
+    """
+    X = df_model.drop(columns=COLONNES_NON_FEATURES, errors="ignore")
+    y = df_model["Non_renouvellement"]
+    X_train, _, y_train, _ = train_test_split(X, y, test_size=0.2, stratify=y, random_state=42)
+
+    model = XGBClassifier(**HYPERPARAMETRES_XGBOOST, objective="binary:logistic", random_state=42, eval_metric="logloss")
+    model.fit(X_train, y_train)
+    joblib.dump(model, chemin_modele)
+    return chemin_modele
+
+
+def commit_courant() -> str:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def _lignes(resultat) -> int:
+    if isinstance(resultat, pd.DataFrame):
+        return len(resultat)
+    if isinstance(resultat, tuple):
+        return len(resultat[0])
+    return None
+
+
+def executer_benchmark(n: int, classeur: bool = True, memoire: bool = True, graine: int = 42) -> dict:
+    """
+    Mesure chaque étape du pipeline sur un extrait synthétique de n lignes :
+    chargement (si classeur et n tient dans une feuille Excel), nettoyer_donnees, filtrer_contrats_eligibles,
+    ajouter_variable_cible, preparer_features, entraînement, predire_clients_a_risque et export.
+    """
+    etapes = {}
+
+    def etape(nom, fonction, *args):
+        resultat, mesures = mesurer_etape(fonction, *args, memoire=memoire)
+        etapes[nom] = {"lignes_entree": _lignes(args[0]) if args else None, "lignes_sortie": _lignes(resultat), **mesures}
+        print(f"  {nom:<28} : {mesures['secondes']:8.3f} s"
+              + (f" | pic mémoire {mesures['pic_memoire_mo']:9.1f} Mo" if memoire else ""))
+        return resultat
+
+    with tempfile.TemporaryDirectory() as dossier:
+        # 📥 Chargement : classeur synthétique relu sans cache, sinon DataFrame généré directement
+        if classeur and n + int(n * PART_DOUBLONS) <= LIGNES_MAX_EXCEL:
+            chemin_classeur = generer_classeur(os.path.join(dossier, "contrats.xlsx"), n, graine)
+            df = etape("chargement", charger_donnees_anonymisees, chemin_classeur, False)
+        else:
+            df = generer_contrats(n, graine)
+
+        # 🧼 Préparation, étape par étape
+        df = etape("nettoyer_donnees", nettoyer_donnees, df)
+        df = etape("filtrer_contrats_eligibles", filtrer_contrats_eligibles, df)
+        df_final = etape("ajouter_variable_cible", ajouter_variable_cible, df)
+        df_model = etape("preparer_features", preparer_features, df_final, None)
+
+        # 🧠 Entraînement puis 🔮 scoring des contrats actifs
+        chemin_modele = etape("entrainement", entrainer, df_model, os.path.join(dossier, "modele.joblib"))
+        df_risque, _ = etape("predire_clients_a_risque", predire_clients_a_risque, df_model, chemin_modele)
+
+        # 📤 Export des contrats à risque, dans chaque format proposé par l'application
+        for format_export in FORMATS_EXPORT:
+            etape(f"export_{format_export.lower()}", exporter, df_risque, format_export)
+
+    return {
+        "commit": commit_courant(),
+        "date": datetime.datetime.now().isoformat(timespec="seconds"),
+        "n_lignes": n,
+        "graine": graine,
+        "environnement": {
+            "python": platform.python_version(),
+            "pandas": pd.__version__,
+            "numpy": np.__version__,
+            "xgboost": xgboost.__version__,
+            "sklearn": sklearn.__version__,
+            "n_coeurs": os.cpu_count(),
+        },
+        "etapes": etapes,
+    }
+
+
+def enregistrer_resultats(resultats: dict, dossier: str = RESULTATS_PATH) -> str:
+    os.makedirs(dossier, exist_ok=True)
+    horodatage = resultats["date"].replace(":", "").replace("-", "")
+    chemin = os.path.join(dossier, f"{horodatage}_{resultats['commit'] or 'hors_git'}_{resultats['n_lignes']}.json")
+    with open(chemin, "w", encoding="utf-8") as f:
+        json.dump(resultats, f, ensure_ascii=False, indent=2)
+    return chemin
+
+
+def comparer(chemin_avant: str, chemin_apres: str):
+    """
+    Affiche, étape par étape, le rapport de temps et de pic mémoire entre deux fichiers de résultats.
+    """
+    with open(chemin_avant, encoding="utf-8") as f:
+        avant = json.load(f)
+    with open(chemin_apres, encoding="utf-8") as f:
+        apres = json.load(f)
+
+    print(f"📊 {avant['commit']} ({avant['n_lignes']} lignes) -> {apres['commit']} ({apres['n_lignes']} lignes)\n")
+    for nom, mesure in apres["etapes"].items():
+        if nom not in avant["etapes"]:
+            print(f"  {nom:<28} : nouvelle étape")
+            continue
+        reference = avant["etapes"][nom]
+        ligne = f"  {nom:<28} : temps x{reference['secondes'] / max(mesure['secondes'], 1e-9):6.2f}"
+        if "pic_memoire_mo" in mesure and "pic_memoire_mo" in reference:
+            ligne += f" | pic mémoire {mesure['pic_memoire_mo'] - reference['pic_memoire_mo']:+9.1f} Mo"
+        print(ligne)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark étape par étape du pipeline LLD sur données synthétiques")
+    parser.add_argument("tailles", nargs="*", type=int, default=TAILLES_PAR_DEFAUT)
+    parser.add_argument("--sans-classeur", action="store_true", help="ne pas mesurer la lecture d'un classeur Excel")
+    parser.add_argument("--sans-memoire", action="store_true", help="ne pas mesurer le pic mémoire (une exécution par étape)")
+    parser.add_argument("--comparer", nargs=2, metavar=("AVANT", "APRES"), help="comparer deux fichiers de résultats")
+    args = parser.parse_args()
+
+    if args.comparer:
+        comparer(*args.comparer)
+    else:
+        for n_lignes in args.tailles:
+            print(f"📦 {n_lignes} lignes")
+            resultats = executer_benchmark(n_lignes, classeur=not args.sans_classeur, memoire=not args.sans_memoire)
+            print(f"✅ Résultats enregistrés dans {enregistrer_resultats(resultats)}\n")
@@ -0,0 +1,46 @@
+import sys
+import time
+import tracemalloc
+
+import pandas as pd
+
+from src.preprocessing import nettoyer_donnees, filtrer_contrats_eligibles, ajouter_variable_cible
+from src.features import preparer_features
+from src.pipeline import preparer_jeu_modele
+from src.donnees_synthetiques import generer_contrats
+
+# Benchmark : enchaînement historique des étapes vs pipeline fusionné
+# Usage : python -m benchmarks.bench_pipeline [nombre_de_lignes]
+
+
+def enchainement_historique(df: pd.DataFrame):
+    df_final = ajouter_variable_cible(filtrer_contrats_eligibles(nettoyer_donnees(df)))
+    return df_final, preparer_features(df_final)
+
+
+def mesurer(fonction, df: pd.DataFrame):
+    """
+    Temps d'exécution (s) et pic de mémoire alloué (Mo) d'un appel.
+    """
+    tracemalloc.start()
+    debut = time.perf_counter()
+    fonction(df)
+    duree = time.perf_counter() - debut
+    _, pic = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return duree, pic / 1024 ** 2
+
+
+if __name__ == "__main__":
+    n_lignes = int(sys.argv[1]) if len(sys.argv) > 1 else 200_000
+    df = generer_contrats(n_lignes)
+    print(f"📦 {n_lignes} lignes, {df.memory_usage(deep=True).sum() / 1024 ** 2:.1f} Mo en mémoire\n")
+
+    resultats = {}
+    for nom, fonction in [("Enchaînement historique", enchainement_historique), ("Pipeline fusionné", preparer_jeu_modele)]:
+        duree, pic = mesurer(fonction, df)
+        resultats[nom] = (duree, pic)
+        print(f"{nom:<25} : {duree:7.2f} s | pic mémoire {pic:8.1f} Mo")
+
+    (t0, m0), (t1, m1) = resultats.values()
+    print(f"\n✅ Gain : x{t0 / t1:.2f} en temps, {m0 - m1:.1f} Mo de pic mémoire en moins")
@@ -0,0 +1,90 @@
+import os
+import subprocess
+import sys
+import time
+
+import joblib
+import numpy as np
+import pandas as pd
+
+from src.arbres_numpy import ARBRES_PATH, TOLERANCE_PROBA, charger_arbres, scorer_contrats_numpy
+from src.pipeline import preparer_jeu_modele
+from src.predict import predire_clients_a_risque, scorer_contrats
+from src.registre_modeles import charger_modele
+from src.donnees_synthetiques import generer_contrats
+
+# Benchmark : scoring historique (predict + predict_proba sur DataFrame) vs scoring en un passage,
+# puis évaluateur NumPy (src/arbres_numpy.py) vs XGBoost : démarrage à froid et scoring
+# Usage : python -m benchmarks.bench_scoring [nombre_de_lignes] [n_threads]
+
+MODELE = "models/xgboost_model.joblib"
+
+
+def predire_historique(df: pd.DataFrame, model_path: str = MODELE):
+    """
+    Version d'origine de predire_clients_a_risque (référence du benchmark).
+    """
+    df_actifs = df[df["flag_actif"] == 1].copy()
+    model = joblib.load(model_path)
+    expected_features = model.get_booster().feature_names
+
+    X = df_actifs.drop(columns=["No du Contrat", "Non_renouvellement", "flag_actif"], errors="ignore").copy()
+    for col in expected_features:
+        if col not in X.columns:
+            X[col] = 0
+    X = X[expected_features]
+
+    df_actifs["Prediction"] = model.predict(X)
+    df_actifs["score_risque"] = model.predict_proba(X)[:, 1]
+
+    df_risque = df_actifs[df_actifs["Prediction"] == 1].copy()
+    df_top_50 = df_risque.sort_values("score_risque", ascending=False).head(50)
+    return df_risque, df_top_50
+
+
+def chronometrer(fonction, repetitions: int = 3) -> float:
+    durees = []
+    for _ in range(repetitions):
+        debut = time.perf_counter()
+        resultat = fonction()
+        durees.append(time.perf_counter() - debut)
+    return min(durees), resultat
+
+
+if __name__ == "__main__":
+    n_lignes = int(sys.argv[1]) if len(sys.argv) > 1 else 500_000
+    n_threads = int(sys.argv[2]) if len(sys.argv) > 2 else None
+
+    _, df_model = preparer_jeu_modele(generer_contrats(n_lignes))
+    charger_modele(MODELE)  # chargement hors chronométrage pour le scoring en un passage
+    print(f"📦 {len(df_model)} contrats préparés, {int(df_model['flag_actif'].sum())} actifs\n")
+
+    t_historique, (risque_ref, _) = chronometrer(lambda: predire_historique(df_model))
+    t_rapide, (risque, _) = chronometrer(lambda: predire_clients_a_risque(df_model, MODELE, n_threads=n_threads))
+
+    print(f"Scoring historique  : {t_historique:6.2f} s")
+    print(f"Scoring un passage  : {t_rapide:6.2f} s")
+    print(f"\n✅ Gain : x{t_historique / t_rapide:.2f}")
+
+    identiques = risque_ref.index.equals(risque.index) and np.allclose(risque_ref["score_risque"], risque["score_risque"])
+    print(f"🔎 Résultats identiques : {identiques}")
+
+    # 🌳 Évaluateur NumPy : démarrage d'un processus de scoring léger, puis scoring de tous les contrats
+    if os.path.exists(ARBRES_PATH):
+        demarrage = {}
+        for nom, code in [
+            ("XGBoost", f"import joblib; joblib.load({MODELE!r})"),
+            ("NumPy", f"from src.arbres_numpy import charger_arbres; charger_arbres({ARBRES_PATH!r})"),
+        ]:
+            debut = time.perf_counter()
+            subprocess.run([sys.executable, "-c", code], check=True)
+            demarrage[nom] = time.perf_counter() - debut
+
+        charger_arbres(ARBRES_PATH)
+        t_xgboost, scores_xgboost = chronometrer(lambda: scorer_contrats(df_model, MODELE, n_threads=n_threads))
+        t_numpy, scores_numpy = chronometrer(lambda: scorer_contrats_numpy(df_model, ARBRES_PATH))
+        ecart = float(np.abs(scores_numpy - scores_xgboost).max())
+
+        print(f"\nDémarrage processus XGBoost : {demarrage['XGBoost']:6.2f} s | NumPy : {demarrage['NumPy']:6.2f} s")
+        print(f"Scoring XGBoost : {t_xgboost:6.2f} s | NumPy : {t_numpy:6.2f} s")
+        print(f"🔎 Écart maximal des scores : {ecart:.2e} (tolérance {TOLERANCE_PROBA:.0e})")
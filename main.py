@@ -1,28 +1,57 @@
-import pandas as pd
 from src.preprocessing import (
-    nettoyer_donnees,
-    filtrer_contrats_eligibles,
+    charger_donnees_anonymisees,
+    charger_contrats_eligibles_par_lots,
     ajouter_variable_cible
 )
+from src.dates import RAPPORT_DATES_PATH
 from src.features import preparer_features
+from src.pipeline import preparer_jeu_modele
+from src.schema import RAPPORT_MEMOIRE_PATH, compacter_types, ecrire_rapport_memoire
+from src.magasin_features import preparer_features_incremental
 from src.eda import executer_eda
 from src.tests_statistiques import executer_tests_statistiques
+from src.instrumentation import arreter_profil, chemin_trace, demarrer_profil
 import os
 
-# 📥 1. Charger les données anonymisées
-df = pd.read_excel("data/processed/donnees_anonymisees.xlsx")
+FICHIER_DONNEES = "data/processed/donnees_anonymisees.xlsx"
 
-# 🧼 2. Nettoyer les données
-df = nettoyer_donnees(df)
+# ⚙️ Lecture par lots (extraits de plusieurs centaines de milliers de lignes) : LLD_TAILLE_LOT=50000
+TAILLE_LOT = int(os.environ.get("LLD_TAILLE_LOT", "0"))
 
-# 🔍 3. Filtrer les contrats éligibles
-df = filtrer_contrats_eligibles(df)
+# 🎲 Tests par rééchantillonnage en plus des tests classiques : LLD_REECHANTILLONNAGE=permutation ou bootstrap
+MODE_REECHANTILLONNAGE = os.environ.get("LLD_REECHANTILLONNAGE") or None
 
-# 🎯 4. Ajouter la variable cible
-df = ajouter_variable_cible(df)
+# ♻️ Magasin de features par contrat (seuls les contrats nouveaux / modifiés sont recalculés) : LLD_MAGASIN_FEATURES=data/magasin_features
+MAGASIN_FEATURES = os.environ.get("LLD_MAGASIN_FEATURES") or None
 
-# 🧠 5. Préparer les features (avec ID pour traçabilité)
-df_model = preparer_features(df)
+# 🔬 Profil cProfile de l'exécution : LLD_PROFIL=outputs/traces/main.prof
+profil = demarrer_profil()
+
+if TAILLE_LOT > 0:
+    # 📥🧼🔍 1-3. Lecture, nettoyage et filtrage bloc par bloc
+    df = charger_contrats_eligibles_par_lots(FICHIER_DONNEES, taille_lot=TAILLE_LOT)
+
+    # 🎯 4. Ajouter la variable cible
+    df = ajouter_variable_cible(df)
+
+    # 🧠 5. Préparer les features (avec ID pour traçabilité)
+    if MAGASIN_FEATURES:
+        df_model = preparer_features_incremental(df, MAGASIN_FEATURES, chemin_rapport_dates=RAPPORT_DATES_PATH)
+    else:
+        df_model = preparer_features(df, RAPPORT_DATES_PATH)
+
+    # 🗜 Types compacts, avec rapport mémoire avant / après (comme preparer_jeu_modele)
+    rapports = {"df_model": {}}
+    df_model = compacter_types(df_model, rapport=rapports["df_model"])
+    ecrire_rapport_memoire(rapports, RAPPORT_MEMOIRE_PATH)
+else:
+    # 📥 1. Charger les données anonymisées
+    df = charger_donnees_anonymisees(FICHIER_DONNEES)
+
+    # 🧼🔍🎯🧠 2-5. Nettoyage, filtrage, variable cible et features en une passe
+    df, df_model = preparer_jeu_modele(
+        df, magasin=MAGASIN_FEATURES, chemin_rapport_memoire=RAPPORT_MEMOIRE_PATH, chemin_rapport_dates=RAPPORT_DATES_PATH
+    )
 
 # 💾 6. Sauvegarder le jeu final pour modélisation
 os.makedirs("data/processed", exist_ok=True)
@@ -32,6 +61,10 @@ df_model.to_excel("data/processed/donnees_finales_model.xlsx", index=False)
 executer_eda(df_model)
 
 # 🧪 8. Lancer les tests statistiques
-executer_tests_statistiques(df_model)
+executer_tests_statistiques(df_model, mode_reechantillonnage=MODE_REECHANTILLONNAGE)
+
+arreter_profil(profil)
 
 print("\n✅ Pipeline terminé : Données prêtes, EDA et tests statistiques générés.")
+if chemin_trace():
+    print(f"⏱ Mesures des étapes ajoutées à {chemin_trace()}")
@@ -1,25 +1,140 @@
 import pandas as pd
+import numpy as np
 import hashlib
+import hmac
+import os
+from concurrent.futures import ProcessPoolExecutor
 
-def hash_column(column: pd.Series) -> pd.Series:
+# Moteur d'anonymisation :
+# - chaque valeur distincte (client, contrat...) n'est hachée qu'une fois, le résultat est redistribué aux lignes
+# - mode HMAC-SHA256 avec clé secrète : sans la clé, impossible de retrouver un identifiant en hachant des candidats
+# - les très grandes colonnes sont réparties sur un pool de processus
+# - un classeur brut peut être anonymisé en flux, bloc par bloc, sans être chargé en entier
+
+CLE_ENV = "LLD_CLE_ANONYMISATION"
+SEUIL_PARALLELE = 200_000  # valeurs distinctes à partir desquelles le hachage est réparti sur plusieurs processus
+TAILLE_LOT_ANONYMISATION = 50_000
+
+
+def cle_anonymisation() -> bytes:
     """
-    Anonymise une colonne en utilisant le hachage SHA256.
+    Clé secrète lue dans la variable d'environnement LLD_CLE_ANONYMISATION (None si absente).
     """
-    return column.astype(str).apply(lambda x: hashlib.sha256(x.encode()).hexdigest())
+    cle = os.environ.get(CLE_ENV)
+    return cle.encode() if cle else None
+
+
+def _hacher_paquet(textes: list, cle: bytes = None) -> list:
+    """
+    SHA256 (ou HMAC-SHA256 si cle) hexadécimal de chaque texte (exécuté dans un processus de calcul).
+    """
+    if cle is None:
+        return [hashlib.sha256(texte.encode()).hexdigest() for texte in textes]
+
+    # L'état HMAC après la clé est calculé une fois puis copié pour chaque valeur
+    base = hmac.new(cle, digestmod=hashlib.sha256)
+    empreintes = []
+    for texte in textes:
+        h = base.copy()
+        h.update(texte.encode())
+        empreintes.append(h.hexdigest())
+    return empreintes
+
 
-def anonymiser_dataframe(df: pd.DataFrame, colonnes_sensibles: list) -> pd.DataFrame:
+def hacher_textes(textes: list, cle: bytes = None, n_workers: int = None) -> list:
+    """
+    Hache une liste de textes distincts, en parallèle au-delà de SEUIL_PARALLELE valeurs.
+    """
+    n_coeurs = os.cpu_count() or 1
+    n_workers = min(n_workers or n_coeurs, n_coeurs)
+    if n_workers <= 1 or len(textes) < SEUIL_PARALLELE:
+        return _hacher_paquet(textes, cle)
+
+    taille_paquet = -(-len(textes) // (n_workers * 4))
+    paquets = [textes[debut:debut + taille_paquet] for debut in range(0, len(textes), taille_paquet)]
+    with ProcessPoolExecutor(max_workers=n_workers) as pool:
+        resultats = pool.map(_hacher_paquet, paquets, [cle] * len(paquets))
+        return [empreinte for paquet in resultats for empreinte in paquet]
+
+
+def _normaliser_identifiant(serie: pd.Series) -> pd.Series:
+    """
+    Colonne de flottants entiers (identifiants avec valeurs manquantes) -> entiers Python :
+    un identifiant est haché comme "123", jamais comme "123.0", qu'il vienne d'un DataFrame
+    (anonymiser_dataframe) ou d'un bloc de classeur (anonymiser_classeur).
+    """
+    if serie.dtype != "float64":
+        return serie
+    renseignees = serie.notna()
+    if not (serie[renseignees] == np.floor(serie[renseignees])).all():
+        return serie
+    return serie.astype("Int64").astype(object).where(renseignees, np.nan)
+
+
+def hash_column(column: pd.Series, cle: bytes = None, n_workers: int = None) -> pd.Series:
+    """
+    Anonymise une colonne en utilisant le hachage SHA256 (HMAC-SHA256 si une clé est fournie).
+    Même résultat que le hachage de column.astype(str) ligne par ligne (identifiants normalisés par
+    _normaliser_identifiant), mais chaque valeur distincte n'est hachée qu'une fois.
+    """
+    codes, uniques = pd.factorize(_normaliser_identifiant(column))
+    textes = pd.Series(uniques).astype(str).tolist()
+
+    # Valeurs manquantes : texte propre à chaque type de valeur ("nan", "None", "NaT")
+    manquantes = codes < 0
+    if manquantes.any():
+        codes_manquants, textes_manquants = pd.factorize(column[manquantes].astype(str))
+        codes[manquantes] = len(textes) + codes_manquants
+        textes.extend(textes_manquants)
+
+    empreintes = np.asarray(hacher_textes(textes, cle, n_workers), dtype=object)
+    return pd.Series(empreintes[codes], index=column.index, name=column.name)
+
+def anonymiser_dataframe(df: pd.DataFrame, colonnes_sensibles: list, cle: bytes = None,
+                         n_workers: int = None) -> pd.DataFrame:
     """
     Applique l’anonymisation aux colonnes sensibles d’un DataFrame.
 
     Args:
         df : DataFrame contenant les données originales
         colonnes_sensibles : liste des colonnes à anonymiser
+        cle : clé secrète HMAC (None = SHA256 simple)
 
     Returns:
         Un DataFrame avec les colonnes spécifiées anonymisées
     """
-    df_copy = df.copy()
+    df_copy = df.copy(deep=False)  # les colonnes non sensibles ne sont pas dupliquées
     for col in colonnes_sensibles:
         if col in df_copy.columns:
-            df_copy[col] = hash_column(df_copy[col])
+            df_copy[col] = hash_column(df_copy[col], cle, n_workers)
     return df_copy
+
+
+def anonymiser_classeur(source, destination: str, colonnes_sensibles: list, cle: bytes = None,
+                        taille_lot: int = TAILLE_LOT_ANONYMISATION, n_workers: int = None) -> int:
+    """
+    Anonymise un classeur Excel brut en flux : lecture par blocs (openpyxl read_only),
+    hachage des colonnes sensibles, écriture au fil de l'eau (openpyxl write_only).
+    La mémoire utilisée dépend de taille_lot et non de la taille du classeur.
+
+    Returns:
+        Nombre de lignes écrites
+    """
+    from openpyxl import Workbook
+
+    from src.export import ajouter_lignes_excel
+    from src.preprocessing import lire_excel_par_lots
+
+    classeur = Workbook(write_only=True)
+    feuille = classeur.create_sheet("Sheet1")
+    n_lignes = 0
+
+    for lot in lire_excel_par_lots(source, taille_lot):
+        if n_lignes == 0:
+            feuille.append([str(col) for col in lot.columns])
+        ajouter_lignes_excel(feuille, anonymiser_dataframe(lot, colonnes_sensibles, cle, n_workers))
+        n_lignes += len(lot)
+
+    os.makedirs(os.path.dirname(destination) or ".", exist_ok=True)
+    classeur.save(destination)
+    return n_lignes
@@ -0,0 +1,256 @@
+import hashlib
+import json
+import os
+
+import numpy as np
+
+# Évaluateur d'arbres XGBoost en NumPy pur, pour les processus de scoring légers :
+# - exporter_arbres convertit le booster (models/xgboost_model.joblib) en tables plates (.npz) :
+#   pour chaque nœud, feature, seuil, enfants gauche / droit, direction des valeurs manquantes et valeur de feuille
+# - ArbresNumpy charge ces tables (NumPy seulement, sans xgboost ni joblib) et score des lots entiers
+#   niveau par niveau : tous les contrats x tous les arbres descendent d'un niveau à chaque itération
+# Les probabilités sont celles de XGBoost à TOLERANCE_PROBA près (vérifié à l'export).
+# Les tables gardent la version du modèle exporté (version_modele) : si le modèle a été ré-entraîné
+# sans réexport, charger_arbres refuse les tables périmées.
+
+ARBRES_PATH = "models/xgboost_arbres.npz"
+MODELE_PATH = "models/xgboost_model.joblib"  # = registre_modeles.MODELE_PAR_DEFAUT (non importé : processus léger)
+TOLERANCE_PROBA = 1e-6  # écart absolu maximal avec predict_proba (sommes des feuilles en float32 chez XGBoost)
+TAILLE_LOT_ARBRES = 4096  # lignes évaluées à la fois : tableaux arbres x lignes qui restent en cache
+N_LIGNES_VERIFICATION = 5_000
+
+
+class ArbresNumpy:
+    """
+    Forêt d'arbres binaires stockée en tableaux plats (un indice global par nœud, tous arbres confondus).
+    Une feuille pointe vers elle-même : les lignes arrivées en feuille n'en bougent plus.
+    """
+
+    def __init__(self, tables: dict):
+        self.feature = tables["feature"]
+        self.seuil = tables["seuil"]
+        self.gauche = tables["gauche"]
+        self.droite = tables["droite"]
+        self.defaut_gauche = tables["defaut_gauche"]
+        self.valeur = tables["valeur"]
+        self.racines = tables["racines"]
+        self.profondeur = int(tables["profondeur"])
+        self.marge_initiale = float(tables["marge_initiale"])
+        self.feature_names = [str(nom) for nom in tables["feature_names"]]
+        self.version_modele = str(tables["version_modele"]) if "version_modele" in tables else None
+
+        # Enfants côte à côte : enfant de n = _enfants[2 * n + (1 si à droite)]
+        self._enfants = np.stack([self.gauche, self.droite], axis=1).ravel()
+        self._defaut_droite = ~self.defaut_gauche
+
+    @classmethod
+    def charger(cls, chemin: str = ARBRES_PATH) -> "ArbresNumpy":
+        with np.load(chemin, allow_pickle=False) as tables:
+            return cls({cle: tables[cle] for cle in tables.files})
+
+    def marges(self, X: np.ndarray, taille_lot: int = TAILLE_LOT_ARBRES) -> np.ndarray:
+        """
+        Marge (log-odds) de chaque ligne de X (colonnes dans l'ordre de feature_names, NaN = manquant).
+        """
+        X = np.asarray(X, dtype=np.float32)
+        marges = np.empty(len(X), dtype=np.float64)
+
+        for debut in range(0, len(X), taille_lot):
+            # Lot rangé par colonne : la valeur de la feature f pour la ligne i est en f * n + i
+            lot = np.ascontiguousarray(X[debut:debut + taille_lot].T).ravel()
+            n = len(lot) // max(X.shape[1], 1)
+            lignes = np.arange(n, dtype=np.int32)
+            manquants = np.isnan(lot).any()
+            noeuds = np.repeat(self.racines[:, None], n, axis=1)  # arbres x lignes
+
+            # 🌳 Descente niveau par niveau (comparaison en float32 comme XGBoost : x < seuil => gauche,
+            # valeur manquante => direction par défaut du nœud ; une feuille renvoie vers elle-même)
+            for _ in range(self.profondeur):
+                x = np.take(lot, np.take(self.feature, noeuds) * n + lignes)
+                a_droite = x >= np.take(self.seuil, noeuds)
+                if manquants:
+                    a_droite |= np.isnan(x) & np.take(self._defaut_droite, noeuds)
+                noeuds = np.take(self._enfants, 2 * noeuds + a_droite)
+
+            marges[debut:debut + n] = np.take(self.valeur, noeuds).sum(axis=0, dtype=np.float64)
+
+        return marges + self.marge_initiale
+
+    def predire_proba(self, X: np.ndarray) -> np.ndarray:
+        """
+        Probabilité de non-renouvellement (classe 1) de chaque ligne, comme booster.inplace_predict.
+        """
+        return (1.0 / (1.0 + np.exp(-self.marges(X)))).astype(np.float32)
+
+
+def tables_depuis_booster(booster, n_arbres: int = None) -> dict:
+    """
+    Tables plates des n_arbres premiers arbres d'un booster XGBoost binaire (tous par défaut).
+    """
+    modele = json.loads(booster.save_raw("json"))["learner"]
+    objectif = modele["objective"]["name"]
+    if objectif != "binary:logistic":
+        raise ValueError(f"Objectif non pris en charge : {objectif} (binary:logistic attendu)")
+    if modele["gradient_booster"]["name"] != "gbtree":
+        raise ValueError("Seuls les boosters gbtree sont pris en charge.")
+
+    arbres = modele["gradient_booster"]["model"]["trees"][:n_arbres]
+    if any(any(arbre["split_type"]) for arbre in arbres):
+        raise ValueError("Les divisions catégorielles ne sont pas prises en charge.")
+
+    parties = {cle: [] for cle in ("feature", "seuil", "gauche", "droite", "defaut_gauche", "valeur")}
+    racines, profondeur, decalage = [], 0, 0
+
+    for arbre in arbres:
+        gauche = np.asarray(arbre["left_children"], dtype=np.int32)
+        droite = np.asarray(arbre["right_children"], dtype=np.int32)
+        seuil = np.asarray(arbre["split_conditions"], dtype=np.float32)
+        feuilles = gauche < 0
+        indices = np.arange(len(gauche), dtype=np.int32)
+
+        parties["feature"].append(np.where(feuilles, 0, arbre["split_indices"]).astype(np.int32))
+        parties["seuil"].append(seuil)
+        parties["gauche"].append(np.where(feuilles, indices, gauche) + decalage)
+        parties["droite"].append(np.where(feuilles, indices, droite) + decalage)
+        parties["defaut_gauche"].append(np.asarray(arbre["default_left"], dtype=bool))
+        parties["valeur"].append(np.where(feuilles, seuil, 0).astype(np.float32))  # feuille : valeur dans split_conditions
+
+        # Profondeur de l'arbre : nœuds parcourus du haut vers le bas (un parent précède toujours ses enfants)
+        niveau = np.zeros(len(gauche), dtype=np.int32)
+        for noeud in np.flatnonzero(~feuilles):
+            niveau[gauche[noeud]] = niveau[droite[noeud]] = niveau[noeud] + 1
+        profondeur = max(profondeur, int(niveau.max()))
+
+        racines.append(decalage)
+        decalage += len(gauche)
+
+    base_score = float(modele["learner_model_param"]["base_score"])
+    return {
+        **{cle: np.concatenate(valeurs) for cle, valeurs in parties.items()},
+        "racines": np.asarray(racines, dtype=np.int32),
+        "profondeur": np.int32(profondeur),
+        "marge_initiale": np.float64(np.log(base_score / (1.0 - base_score))),
+        "feature_names": np.asarray(booster.feature_names or [], dtype=str),
+    }
+
+
+def _lignes_de_verification(arbres: ArbresNumpy, n: int, graine: int = 42) -> np.ndarray:
+    """
+    Lignes aléatoires couvrant les seuils des arbres (valeurs égales aux seuils et manquantes comprises).
+    """
+    rng = np.random.default_rng(graine)
+    X = np.empty((n, len(arbres.feature_names)), dtype=np.float32)
+    internes = arbres.gauche != np.arange(len(arbres.gauche))
+    for j in range(X.shape[1]):
+        seuils = arbres.seuil[internes & (arbres.feature == j)]
+        if len(seuils) == 0:
+            X[:, j] = rng.normal(size=n)
+            continue
+        bas, haut = seuils.min(), seuils.max()
+        marge = max(haut - bas, 1.0) * 0.1
+        X[:, j] = rng.uniform(bas - marge, haut + marge, n)
+        egaux = rng.random(n) < 0.1
+        X[egaux, j] = rng.choice(seuils, egaux.sum())
+    X[rng.random(X.shape) < 0.05] = np.nan
+    return X
+
+
+def chemin_arbres(chemin_modele: str = None) -> str:
+    """
+    Fichier des tables d'un modèle : ARBRES_PATH pour le modèle par défaut, <modèle>_arbres.npz sinon.
+    """
+    if chemin_modele is None or os.path.abspath(chemin_modele) == os.path.abspath(MODELE_PATH):
+        return ARBRES_PATH
+    return f"{os.path.splitext(chemin_modele)[0]}_arbres.npz"
+
+
+def chemin_modele_des_arbres(chemin: str) -> str:
+    """
+    Modèle dont les tables de chemin sont l'export (inverse de chemin_arbres).
+    """
+    if os.path.abspath(chemin) == os.path.abspath(ARBRES_PATH):
+        return MODELE_PATH
+    return f"{chemin[:-len('_arbres.npz')]}.joblib"
+
+
+def _empreinte_modele(chemin: str) -> str:
+    # Même empreinte que registre_modeles.version_modele (SHA256 du fichier), sans importer joblib ni pandas
+    sha = hashlib.sha256()
+    with open(chemin, "rb") as f:
+        for bloc in iter(lambda: f.read(1024 * 1024), b""):
+            sha.update(bloc)
+    return sha.hexdigest()
+
+
+def exporter_arbres(chemin_modele: str = None, chemin_sortie: str = None,
+                    tolerance: float = TOLERANCE_PROBA) -> str:
+    """
+    Exporte le booster du modèle (registre des modèles, chemin par défaut) en tables NumPy (.npz, chemin_arbres),
+    après avoir vérifié sur des lignes de contrôle que les probabilités sont celles de XGBoost à tolerance près.
+    À appeler après chaque sauvegarde du modèle : les tables portent la version du modèle exporté.
+    """
+    from src.registre_modeles import MODELE_PAR_DEFAUT, charger_modele, version_modele
+
+    chemin_modele = chemin_modele or MODELE_PAR_DEFAUT
+    chemin_sortie = chemin_sortie or chemin_arbres(chemin_modele)
+    modele = charger_modele(chemin_modele)
+    booster = modele.get_booster()
+    # Même nombre d'arbres que scorer_contrats (early stopping éventuel)
+    n_arbres = modele.best_iteration + 1 if hasattr(modele, "best_iteration") else None
+    tables = tables_depuis_booster(booster, n_arbres)
+    tables["version_modele"] = np.asarray(version_modele(chemin_modele))
+    arbres = ArbresNumpy(tables)
+
+    # 🔎 Contrôle d'équivalence avec XGBoost
+    X = _lignes_de_verification(arbres, N_LIGNES_VERIFICATION)
+    reference = booster.inplace_predict(X, iteration_range=(0, n_arbres or 0))
+    ecart = float(np.abs(arbres.predire_proba(X) - reference).max())
+    if ecart > tolerance:
+        raise ValueError(f"Évaluateur NumPy non conforme : écart maximal {ecart:.2e} > {tolerance:.0e}")
+
+    os.makedirs(os.path.dirname(chemin_sortie) or ".", exist_ok=True)
+    chemin_tmp = f"{chemin_sortie}.{os.getpid()}.tmp.npz"
+    np.savez(chemin_tmp, **tables)
+    os.replace(chemin_tmp, chemin_sortie)
+    return chemin_sortie
+
+
+_ARBRES = {}  # chemin absolu -> (mtime_ns des tables, (mtime_ns, taille) du modèle, ArbresNumpy)
+
+
+def charger_arbres(chemin: str = ARBRES_PATH, chemin_modele: str = None) -> ArbresNumpy:
+    """
+    Tables chargées une fois par processus, relues si le fichier a été réexporté.
+    Si le modèle (chemin_modele, déduit de chemin par défaut) est présent, sa version doit être celle
+    des tables : sinon ValueError, les tables sont à réexporter (exporter_arbres).
+    Sans fichier modèle (processus de scoring qui ne reçoit que les tables), pas de contrôle.
+    """
+    chemin_abs = os.path.abspath(chemin)
+    mtime_ns = os.stat(chemin_abs).st_mtime_ns  # FileNotFoundError si les arbres n'ont pas été exportés
+    chemin_modele = chemin_modele or chemin_modele_des_arbres(chemin)
+    etat_modele = None
+    if os.path.exists(chemin_modele):
+        stat = os.stat(chemin_modele)
+        etat_modele = (stat.st_mtime_ns, stat.st_size)
+
+    entree = _ARBRES.get(chemin_abs)
+    if entree is None or entree[:2] != (mtime_ns, etat_modele):
+        arbres = entree[2] if entree is not None and entree[0] == mtime_ns else ArbresNumpy.charger(chemin_abs)
+        # 🔐 Tables et modèle doivent venir du même entraînement
+        if etat_modele is not None and arbres.version_modele != _empreinte_modele(chemin_modele):
+            raise ValueError(f"Tables {chemin} périmées : {chemin_modele} a changé depuis l'export "
+                             f"(relancer exporter_arbres).")
+        entree = _ARBRES[chemin_abs] = (mtime_ns, etat_modele, arbres)
+    return entree[2]
+
+
+def scorer_contrats_numpy(df, chemin_arbres: str = ARBRES_PATH, colonnes_exclues: list = None) -> np.ndarray:
+    """
+    Équivalent de scorer_contrats (src/predict.py) sans XGBoost : scores des lignes de df
+    par l'évaluateur NumPy (à TOLERANCE_PROBA près).
+    """
+    from src.predict import COLONNES_NON_FEATURES, construire_matrice_features
+
+    arbres = charger_arbres(chemin_arbres)
+    exclues = COLONNES_NON_FEATURES if colonnes_exclues is None else colonnes_exclues
+    return arbres.predire_proba(construire_matrice_features(df, arbres.feature_names, exclues))
@@ -0,0 +1,82 @@
+import hashlib
+import json
+import os
+
+import joblib
+import pandas as pd
+
+from src.cache_excel import evincer_cache
+
+# Magasin local des entraînements : un modèle déjà entraîné sur les mêmes données
+# (X, y, graine du split, configuration) est relu au lieu d'être ré-entraîné.
+
+CACHE_PATH = "data/cache/entrainements"
+TAILLE_MAX_CACHE = 1024 ** 3  # 1 Go
+
+# Paramètres sans effet sur le modèle obtenu (exclus de l'empreinte)
+PARAMETRES_IGNORES = {"n_jobs", "nthread", "verbose", "verbosity"}
+
+
+def parametres_modele(modele) -> dict:
+    """
+    Configuration d'un modèle sklearn / XGBoost servant à l'empreinte d'entraînement.
+    """
+    parametres = {
+        nom: valeur for nom, valeur in modele.get_params().items()
+        if nom not in PARAMETRES_IGNORES
+    }
+    return {"classe": type(modele).__name__, "parametres": parametres}
+
+
+def empreinte_entrainement(X: pd.DataFrame, y: pd.Series, graine: int, config: dict) -> str:
+    """
+    Empreinte SHA256 d'un entraînement : contenu et types de X, cible, graine du split, configuration du modèle.
+    """
+    sha = hashlib.sha256()
+    entete = {
+        "colonnes": [str(col) for col in X.columns],
+        "types": [str(dtype) for dtype in X.dtypes],
+        "graine": graine,
+        "config": config,
+    }
+    sha.update(json.dumps(entete, sort_keys=True, default=str).encode())
+    sha.update(pd.util.hash_pandas_object(X, index=False).to_numpy().tobytes())
+    sha.update(pd.util.hash_pandas_object(y, index=False).to_numpy().tobytes())
+    return sha.hexdigest()
+
+
+def _chemin_entree(empreinte: str, dossier: str) -> str:
+    return os.path.join(dossier, f"{empreinte}.joblib")
+
+
+def charger_entrainement(empreinte: str, dossier: str = CACHE_PATH):
+    """
+    Renvoie le résultat stocké pour cette empreinte (modèle entraîné, métriques, matrice de confusion...)
+    ou None s'il n'existe pas.
+    """
+    chemin = _chemin_entree(empreinte, dossier)
+    if not os.path.exists(chemin):
+        return None
+
+    try:
+        resultat = joblib.load(chemin)
+    except Exception:
+        os.remove(chemin)
+        return None
+
+    os.utime(chemin)  # marque l'entrée comme récemment utilisée
+    return resultat
+
+
+def sauvegarder_entrainement(empreinte: str, resultat: dict, dossier: str = CACHE_PATH,
+                             taille_max: int = TAILLE_MAX_CACHE):
+    """
+    Stocke le résultat d'un entraînement, puis évince les entrées les moins récemment utilisées.
+    """
+    os.makedirs(dossier, exist_ok=True)
+    chemin = _chemin_entree(empreinte, dossier)
+    chemin_tmp = f"{chemin}.{os.getpid()}.tmp"
+    joblib.dump(resultat, chemin_tmp)
+    os.replace(chemin_tmp, chemin)
+
+    evincer_cache(dossier, taille_max, extension=".joblib")
@@ -0,0 +1,133 @@
+import hashlib
+import os
+
+import numpy as np
+import pandas as pd
+
+from src.instrumentation import etape
+
+# 📁 Emplacement et taille maximale du cache (copies Parquet des classeurs Excel)
+CACHE_PATH = "data/cache/excel"
+TAILLE_MAX_CACHE = 2 * 1024 ** 3  # 2 Go
+
+# Incrémenter si la façon de lire/écrire les copies change (invalide l'ancien cache)
+VERSION_CACHE = "1"
+
+TAILLE_BLOC = 1024 * 1024
+
+
+def empreinte_contenu(fichier) -> str:
+    """
+    Calcule l'empreinte SHA256 du contenu d'un classeur :
+    - chemin sur disque (lecture par blocs)
+    - fichier chargé (UploadedFile Streamlit, BytesIO...)
+    """
+    sha = hashlib.sha256()
+    sha.update(VERSION_CACHE.encode())
+
+    if isinstance(fichier, (str, os.PathLike)):
+        with open(fichier, "rb") as f:
+            for bloc in iter(lambda: f.read(TAILLE_BLOC), b""):
+                sha.update(bloc)
+    elif hasattr(fichier, "getbuffer"):
+        sha.update(fichier.getbuffer())
+    else:
+        position = fichier.tell()
+        fichier.seek(0)
+        for bloc in iter(lambda: fichier.read(TAILLE_BLOC), b""):
+            sha.update(bloc)
+        fichier.seek(position)
+
+    return sha.hexdigest()
+
+
+def _chemin_cache(empreinte: str, dossier: str) -> str:
+    return os.path.join(dossier, f"{empreinte}.parquet")
+
+
+def evincer_cache(dossier: str, taille_max: int, extension: str = ".parquet"):
+    """
+    Supprime les fichiers du cache les moins récemment utilisés (mtime) tant que
+    la taille totale des fichiers *extension du dossier dépasse taille_max.
+    """
+    if not os.path.isdir(dossier):
+        return
+
+    entrees = []
+    for nom in os.listdir(dossier):
+        if nom.endswith(extension):
+            chemin = os.path.join(dossier, nom)
+            stat = os.stat(chemin)
+            entrees.append((stat.st_mtime, stat.st_size, chemin))
+
+    taille_totale = sum(taille for _, taille, _ in entrees)
+    for _, taille, chemin in sorted(entrees):
+        if taille_totale <= taille_max:
+            break
+        os.remove(chemin)
+        taille_totale -= taille
+
+
+def charger_excel_avec_cache(fichier, dossier: str = CACHE_PATH, taille_max: int = TAILLE_MAX_CACHE) -> pd.DataFrame:
+    """
+    Charge un classeur Excel en passant par un cache Parquet indexé par le contenu :
+    - 1ère lecture : pd.read_excel puis écriture d'une copie typée en Parquet
+    - lectures suivantes des mêmes octets : lecture Parquet, sans parsing Excel
+    Si la copie ne peut pas être écrite (pyarrow absent, colonnes de types mixtes),
+    les données sont simplement renvoyées sans mise en cache.
+    """
+    empreinte = empreinte_contenu(fichier)
+    chemin = _chemin_cache(empreinte, dossier)
+
+    if os.path.exists(chemin):
+        try:
+            df = pd.read_parquet(chemin)
+            # Parquet restitue None là où read_excel donne NaN (colonnes texte)
+            for col in df.columns[df.dtypes == object]:
+                if df[col].isna().any():
+                    df[col] = df[col].where(df[col].notna(), np.nan)
+            os.utime(chemin)  # marque l'entrée comme récemment utilisée
+            return df
+        except Exception:
+            os.remove(chemin)
+
+    if hasattr(fichier, "seek"):
+        fichier.seek(0)
+    with etape("lecture_excel") as mesure:
+        df = pd.read_excel(fichier)
+        mesure["lignes_sortie"] = len(df)
+
+    os.makedirs(dossier, exist_ok=True)
+    chemin_tmp = f"{chemin}.{os.getpid()}.tmp"
+    try:
+        df.to_parquet(chemin_tmp, index=False)
+        os.replace(chemin_tmp, chemin)
+    except Exception:
+        if os.path.exists(chemin_tmp):
+            os.remove(chemin_tmp)
+        return df
+
+    evincer_cache(dossier, taille_max)
+    return df
+
+
+def invalider_cache(empreinte: str = None, dossier: str = CACHE_PATH):
+    """
+    Invalide le cache Excel :
+    - une seule entrée si une empreinte (ou un fichier) est fournie
+    - tout le cache sinon
+    """
+    if not os.path.isdir(dossier):
+        return
+
+    if empreinte is not None:
+        if not isinstance(empreinte, str) or os.path.exists(empreinte):
+            empreinte = empreinte_contenu(empreinte)
+        chemin = _chemin_cache(empreinte, dossier)
+        if os.path.exists(chemin):
+            os.remove(chemin)
+        return
+
+    for nom in os.listdir(dossier):
+        if nom.endswith(".parquet"):
+            os.remove(os.path.join(dossier, nom))
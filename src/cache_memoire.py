@@ -0,0 +1,99 @@
+import sys
+import threading
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+TAILLE_MAX_CACHE_MEMOIRE = 1024 ** 3  # 1 Go
+
+
+def taille_objet(valeur) -> int:
+    """
+    Estime la mémoire occupée (octets) par un résultat mis en cache :
+    DataFrame / Series, tableaux NumPy, octets, conteneurs (tuple, list, dict).
+    """
+    if isinstance(valeur, pd.DataFrame):
+        return int(valeur.memory_usage(index=True, deep=True).sum())
+    if isinstance(valeur, pd.Series):
+        return int(valeur.memory_usage(index=True, deep=True))
+    if isinstance(valeur, np.ndarray):
+        return int(valeur.nbytes)
+    if isinstance(valeur, (bytes, bytearray)):
+        return len(valeur)
+    if isinstance(valeur, dict):
+        return sum(taille_objet(v) for v in valeur.values())
+    if isinstance(valeur, (tuple, list)):
+        return sum(taille_objet(v) for v in valeur)
+    if hasattr(valeur, "nbytes"):
+        return int(valeur.nbytes)
+    return sys.getsizeof(valeur)
+
+
+class CacheLRU:
+    """
+    Cache mémoire LRU, thread-safe et borné en taille (octets estimés).
+    Instancié une fois par processus, il est partagé entre les sessions Streamlit.
+    """
+
+    def __init__(self, taille_max: int = TAILLE_MAX_CACHE_MEMOIRE):
+        self.taille_max = taille_max
+        self._entrees = OrderedDict()  # cle -> (valeur, taille)
+        self._taille = 0
+        self._verrou = threading.RLock()
+
+    def __contains__(self, cle) -> bool:
+        with self._verrou:
+            return cle in self._entrees
+
+    def __len__(self) -> int:
+        with self._verrou:
+            return len(self._entrees)
+
+    @property
+    def taille(self) -> int:
+        return self._taille
+
+    def obtenir(self, cle, defaut=None):
+        with self._verrou:
+            if cle not in self._entrees:
+                return defaut
+            self._entrees.move_to_end(cle)
+            return self._entrees[cle][0]
+
+    def ajouter(self, cle, valeur):
+        taille = taille_objet(valeur)
+        with self._verrou:
+            if cle in self._entrees:
+                self._taille -= self._entrees.pop(cle)[1]
+            if taille > self.taille_max:
+                return  # trop volumineux pour être conservé
+            self._entrees[cle] = (valeur, taille)
+            self._taille += taille
+
+            # 🧹 Éviction des entrées les moins récemment utilisées
+            while self._taille > self.taille_max:
+                _, (_, taille_evincee) = self._entrees.popitem(last=False)
+                self._taille -= taille_evincee
+
+    def obtenir_ou_calculer(self, cle, calcul):
+        """
+        Renvoie la valeur en cache, ou la calcule (hors verrou) puis la met en cache.
+        """
+        manquant = object()
+        valeur = self.obtenir(cle, manquant)
+        if valeur is manquant:
+            valeur = calcul()
+            self.ajouter(cle, valeur)
+        return valeur
+
+    def invalider(self, cle=None):
+        """
+        Supprime une entrée, ou vide le cache si aucune clé n'est fournie.
+        """
+        with self._verrou:
+            if cle is None:
+                self._entrees.clear()
+                self._taille = 0
+            elif cle in self._entrees:
+                self._taille -= self._entrees.pop(cle)[1]
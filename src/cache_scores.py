@@ -0,0 +1,31 @@
+import numpy as np
+import pandas as pd
+
+from src.instrumentation import instrumenter
+from src.predict import scorer_contrats
+from src.registre_modeles import MODELE_PAR_DEFAUT, version_modele
+
+# Scores du modèle XGBoost calculés une seule fois par (empreinte des données, version du modèle)
+# et partagés par les onglets "Courbe ROC", "Clients à risque" et "Top 50".
+
+
+def cle_scores(empreinte: str, model_path: str = MODELE_PAR_DEFAUT) -> tuple:
+    return (empreinte, version_modele(model_path), "scores")
+
+
+@instrumenter()
+def obtenir_scores(df_model: pd.DataFrame, model_path: str = MODELE_PAR_DEFAUT, cache=None,
+                   empreinte: str = None) -> np.ndarray:
+    """
+    Score de chaque ligne de df_model (probabilité de non-renouvellement).
+    Avec un cache (CacheLRU) et l'empreinte des données, le calcul n'a lieu qu'une fois
+    par fichier et par version du modèle ; sinon les scores sont recalculés.
+    """
+    def calculer():
+        scores = scorer_contrats(df_model, model_path)
+        scores.setflags(write=False)  # tableau partagé entre onglets et sessions
+        return scores
+
+    if cache is None or empreinte is None:
+        return calculer()
+    return cache.obtenir_ou_calculer(cle_scores(empreinte, model_path), calculer)
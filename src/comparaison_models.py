@@ -1,24 +1,91 @@
-import pandas as pd
-import matplotlib.pyplot as plt
-import seaborn as sns
-import streamlit as st
 import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
 
-from sklearn.model_selection import train_test_split
-from sklearn.metrics import classification_report, f1_score, recall_score, precision_score
-from sklearn.ensemble import RandomForestClassifier
-from sklearn.linear_model import LogisticRegression
-import xgboost as xgb
+from src.cache_entrainement import (
+    charger_entrainement,
+    empreinte_entrainement,
+    parametres_modele,
+    sauvegarder_entrainement
+)
+from src.instrumentation import instrumenter
 
-def comparer_modeles_streamlit(df_modele):
+# 🔁 Modèles candidats : nom -> fonction qui crée le modèle pour un budget de n_jobs threads
+# (fonctions de module, pour pouvoir être envoyées aux processus de calcul ;
+# scikit-learn et XGBoost sont importés à la création du premier modèle)
+
+def creer_random_forest(n_jobs: int = 1):
+    from sklearn.ensemble import RandomForestClassifier
+    return RandomForestClassifier(
+        n_estimators=100, max_depth=10, class_weight="balanced", random_state=42, n_jobs=n_jobs
+    )
+
+def creer_regression_logistique(n_jobs: int = 1):
+    from sklearn.linear_model import LogisticRegression
+    return LogisticRegression(
+        solver="liblinear", class_weight="balanced", random_state=42
+    )
+
+def creer_xgboost(n_jobs: int = 1):
+    import xgboost as xgb
+    return xgb.XGBClassifier(
+        n_estimators=100, max_depth=5, scale_pos_weight=1,
+        random_state=42, use_label_encoder=False, eval_metric='logloss', n_jobs=n_jobs
+    )
+
+CANDIDATS_PAR_DEFAUT = {
+    "Random Forest": creer_random_forest,
+    "Logistic Regression": creer_regression_logistique,
+    "XGBoost": creer_xgboost
+}
+
+
+def _evaluer_candidat(nom, creer_modele, n_threads, X_train, X_test, y_train, y_test):
+    """
+    Entraîne et évalue un candidat (exécuté dans un processus de calcul).
+    Le nombre de threads (modèle + BLAS/OpenMP) est limité à n_threads.
     """
-    Compare les performances de 3 modèles de classification et affiche les résultats dans Streamlit.
-    
+    from sklearn.metrics import confusion_matrix, f1_score, precision_score, recall_score
+    from threadpoolctl import threadpool_limits
+
+    with threadpool_limits(limits=n_threads):
+        modele = creer_modele(n_threads)
+        modele.fit(X_train, y_train)
+        y_pred = modele.predict(X_test)
+
+    resultat = {
+        "Modèle": nom,
+        "F1-score": round(f1_score(y_test, y_pred), 4),
+        "Recall (classe 1)": round(recall_score(y_test, y_pred), 4),
+        "Précision": round(precision_score(y_test, y_pred), 4)
+    }
+    return {
+        "modele": modele,
+        "resultat": resultat,
+        "y_pred": y_pred,
+        "matrice_confusion": confusion_matrix(y_test, y_pred)
+    }
+
+
+@instrumenter()
+def comparer_modeles(df_modele, candidats: dict = None, n_workers: int = None):
+    """
+    Entraîne les modèles candidats en parallèle (un processus par modèle) et renvoie
+    leurs résultats au fur et à mesure qu'ils se terminent (générateur).
+    La durée totale est bornée par le modèle le plus lent et non par la somme des modèles.
+    Un candidat déjà entraîné sur les mêmes données avec la même configuration
+    est relu depuis le magasin d'entraînements (src/cache_entrainement.py) au lieu d'être ré-entraîné.
+
     Args:
-        df_modele (pd.DataFrame): Données prétraitées avec les colonnes 'Non_renouvellement' et 'No du Contrat'.
+        df_modele : données prétraitées avec 'Non_renouvellement' et 'No du Contrat'
+        candidats : dict nom -> fonction(n_jobs) renvoyant un modèle sklearn (CANDIDATS_PAR_DEFAUT sinon)
+        n_workers : nombre de processus (1 = exécution séquentielle dans le processus courant)
+
+    Yields:
+        (resultat, y_pred) : métriques du modèle (dict) et prédictions sur le jeu de test
     """
+    from sklearn.model_selection import train_test_split
 
-    #st.subheader("📊 Comparaison des modèles de prédiction")
+    candidats = candidats or CANDIDATS_PAR_DEFAUT
 
     # 🔀 Séparer X et y
     X = df_modele.drop(columns=["Non_renouvellement", "No du Contrat"], errors="ignore")
@@ -29,50 +96,38 @@ def comparer_modeles_streamlit(df_modele):
         X, y, test_size=0.2, random_state=42, stratify=y
     )
 
-    # 🔁 Liste des modèles à comparer
-    modeles = {
-        "Random Forest": RandomForestClassifier(
-            n_estimators=100, max_depth=10, class_weight="balanced", random_state=42
-        ),
-        "Logistic Regression": LogisticRegression(
-            solver="liblinear", class_weight="balanced", random_state=42
-        ),
-        "XGBoost": xgb.XGBClassifier(
-            n_estimators=100, max_depth=5, scale_pos_weight=1,
-            random_state=42, use_label_encoder=False, eval_metric='logloss'
-        )
-    }
+    # 🗄 Candidats déjà entraînés sur ces données : résultats stockés renvoyés immédiatement
+    a_entrainer = {}
+    for nom, creer_modele in candidats.items():
+        config = {"nom": nom, **parametres_modele(creer_modele())}
+        empreinte = empreinte_entrainement(X, y, 42, config)
+        stocke = charger_entrainement(empreinte)
+        if stocke is None:
+            a_entrainer[nom] = (creer_modele, empreinte)
+        else:
+            yield stocke["resultat"], stocke["y_pred"]
 
-    resultats = []
+    if not a_entrainer:
+        return
 
-    for nom, modele in modeles.items():
-        modele.fit(X_train, y_train)
-        y_pred = modele.predict(X_test)
+    # ⚙ Budget de threads par modèle : les cœurs sont répartis entre les processus
+    n_coeurs = os.cpu_count() or 1
+    n_workers = max(1, min(n_workers or len(a_entrainer), len(a_entrainer), n_coeurs))
+    n_threads = max(1, n_coeurs // n_workers)
+
+    if n_workers == 1:
+        for nom, (creer_modele, empreinte) in a_entrainer.items():
+            entraine = _evaluer_candidat(nom, creer_modele, n_threads, X_train, X_test, y_train, y_test)
+            sauvegarder_entrainement(empreinte, entraine)
+            yield entraine["resultat"], entraine["y_pred"]
+        return
 
-        f1 = f1_score(y_test, y_pred)
-        recall = recall_score(y_test, y_pred)
-        precision = precision_score(y_test, y_pred)
-
-        resultats.append({
-            "Modèle": nom,
-            "F1-score": round(f1, 4),
-            "Recall (classe 1)": round(recall, 4),
-            "Précision": round(precision, 4)
-        })
-
-    # 🔄 Créer DataFrame résultats
-    df_resultats = pd.DataFrame(resultats)
-    st.dataframe(df_resultats)
-
-    # 🔄 Réorganiser pour graphique
-    df_melted = df_resultats.melt(id_vars="Modèle", var_name="Métrique", value_name="Score")
-
-    # 🎨 Graphe Streamlit
-    fig, ax = plt.subplots(figsize=(10, 5))
-    sns.barplot(data=df_melted, x="Modèle", y="Score", hue="Métrique", ax=ax)
-    plt.ylim(0.5, 0.9)
-    plt.title("Comparaison dynamique des modèles")
-    plt.xlabel("")
-    plt.ylabel("Score")
-    plt.legend(title="Métrique")
-    st.pyplot(fig)
\ No newline at end of file
+    with ProcessPoolExecutor(max_workers=n_workers) as pool:
+        futures = {
+            pool.submit(_evaluer_candidat, nom, creer_modele, n_threads, X_train, X_test, y_train, y_test): empreinte
+            for nom, (creer_modele, empreinte) in a_entrainer.items()
+        }
+        for future in as_completed(futures):
+            entraine = future.result()
+            sauvegarder_entrainement(futures[future], entraine)
+            yield entraine["resultat"], entraine["y_pred"]
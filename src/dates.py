@@ -0,0 +1,112 @@
+import datetime
+import json
+import os
+
+import numpy as np
+import pandas as pd
+
+# Conversion des colonnes de dates des extraits LLD :
+# - chaque valeur distincte n'est analysée qu'une fois (les dates se répètent énormément),
+#   puis le résultat est redistribué sur toutes les lignes
+# - les formats connus sont essayés un par un de façon vectorisée (format explicite = analyse rapide)
+# - seules les valeurs restantes passent par l'analyse lente, élément par élément
+# - un rapport de qualité indique combien de lignes chaque format a reconnues
+
+FORMATS_DATES = [
+    "%d/%m/%Y",
+    "%d/%m/%Y %H:%M:%S",
+    "%d/%m/%Y %H:%M",
+    "%Y-%m-%d",
+    "%Y-%m-%d %H:%M:%S",
+    "%d-%m-%Y",
+    "%d.%m.%Y",
+    "%d/%m/%y",
+]
+
+RAPPORT_DATES_PATH = "outputs/rapports/qualite_dates.json"
+N_EXEMPLES_NON_RECONNUS = 10
+NS_PAR_JOUR = 86_400 * 10 ** 9
+
+
+def convertir_dates(serie: pd.Series, formats: list = FORMATS_DATES, rapport: dict = None) -> pd.Series:
+    """
+    Équivalent de pd.to_datetime(serie, errors="coerce", dayfirst=True), mémoïsé par valeur distincte.
+    Si rapport (dict) est fourni, il est complété avec les statistiques de conversion de la colonne.
+    """
+    if pd.api.types.is_datetime64_any_dtype(serie):
+        if rapport is not None:
+            rapport.update({"n_lignes": len(serie), "deja_au_format_date": int(serie.notna().sum())})
+        return serie.astype("datetime64[ns]")
+
+    codes, uniques = pd.factorize(serie)
+    uniques = uniques.to_numpy(dtype=object)
+    occurrences = np.bincount(codes[codes >= 0], minlength=len(uniques))
+
+    valeurs = np.full(len(uniques), np.datetime64("NaT"), dtype="datetime64[ns]")
+    restantes = np.ones(len(uniques), dtype=bool)
+    statistiques = {}
+
+    # 1. Valeurs déjà converties par la lecture Excel (datetime / Timestamp)
+    deja_dates = np.fromiter(
+        (isinstance(valeur, (datetime.date, np.datetime64)) for valeur in uniques), dtype=bool, count=len(uniques)
+    )
+    if deja_dates.any():
+        valeurs[deja_dates] = pd.to_datetime(uniques[deja_dates], errors="coerce").to_numpy(dtype="datetime64[ns]")
+        restantes &= ~deja_dates
+    statistiques["deja_au_format_date"] = int(occurrences[deja_dates].sum())
+
+    # 2. Formats connus, du plus au moins fréquent dans les extraits
+    textes = pd.Series(uniques, dtype=object).astype(str).str.strip()
+    for format_date in formats:
+        if not restantes.any():
+            break
+        positions = np.flatnonzero(restantes)
+        converties = pd.to_datetime(textes.iloc[positions], format=format_date, errors="coerce").to_numpy()
+        reconnues = ~np.isnat(converties)
+        valeurs[positions[reconnues]] = converties[reconnues]
+        restantes[positions[reconnues]] = False
+        statistiques[format_date] = int(occurrences[positions[reconnues]].sum())
+
+    # 3. Analyse lente pour les valeurs restantes uniquement
+    positions = np.flatnonzero(restantes)
+    if len(positions):
+        converties = pd.to_datetime(
+            pd.Series(uniques[positions], dtype=object), errors="coerce", dayfirst=True, format="mixed"
+        ).to_numpy(dtype="datetime64[ns]")
+        reconnues = ~np.isnat(converties)
+        valeurs[positions[reconnues]] = converties[reconnues]
+        restantes[positions[reconnues]] = False
+        statistiques["analyse_lente"] = int(occurrences[positions[reconnues]].sum())
+
+    if rapport is not None:
+        non_reconnues = np.flatnonzero(restantes)
+        rapport.update({
+            "n_lignes": len(serie),
+            "n_vides": int((codes < 0).sum()),
+            "n_valeurs_distinctes": len(uniques),
+            **statistiques,
+            "non_reconnues": int(occurrences[non_reconnues].sum()),
+            "exemples_non_reconnus": [str(valeur) for valeur in uniques[non_reconnues[:N_EXEMPLES_NON_RECONNUS]]],
+        })
+
+    resultat = np.full(len(serie), np.datetime64("NaT"), dtype="datetime64[ns]")
+    resultat[codes >= 0] = valeurs[codes[codes >= 0]]
+    return pd.Series(resultat, index=serie.index, name=serie.name)
+
+
+def numeros_mois(dates: pd.Series):
+    """
+    Numéro de mois entier (origine 1970-01) de chaque date et masque des dates renseignées.
+    La différence de deux numéros donne directement l'écart en mois (année * 12 + mois).
+    """
+    valeurs = dates.to_numpy(dtype="datetime64[ns]")
+    return valeurs.astype("datetime64[M]").astype(np.int64), ~np.isnat(valeurs)
+
+
+def ecrire_rapport_dates(rapports: dict, chemin: str = RAPPORT_DATES_PATH):
+    """
+    Écrit le rapport de qualité de conversion des dates (une entrée par colonne).
+    """
+    os.makedirs(os.path.dirname(chemin) or ".", exist_ok=True)
+    with open(chemin, "w", encoding="utf-8") as f:
+        json.dump(rapports, f, ensure_ascii=False, indent=2)
@@ -0,0 +1,141 @@
+import os
+
+import numpy as np
+import pandas as pd
+
+# Générateur de contrats LLD synthétiques, au format de l'extrait anonymisé :
+# mêmes colonnes, mêmes types et mêmes défauts (casse / espaces, cellules vides, doublons,
+# formats de dates mélangés), pour mesurer le pipeline sans l'extrait privé.
+# Le non-renouvellement dépend des prestations, du loyer et de l'ancienneté : les modèles ont un signal à apprendre.
+
+DATE_ORIGINE = np.datetime64("2012-01-01")
+N_JOURS_COMMANDE = 4000
+PART_DOUBLONS = 0.001
+LIGNES_MAX_EXCEL = 1_048_575  # lignes de données d'une feuille Excel (hors en-tête)
+
+RESEAUX = ["Réseau Nord", "Réseau Sud", "Réseau Est", "Réseau Ouest", "Grands comptes", "Web"]
+
+
+def _dates_texte(jours: np.ndarray, rng: np.random.Generator, part_autres_formats: float) -> np.ndarray:
+    """
+    Dates (jours depuis DATE_ORIGINE) en texte jj/mm/aaaa ; une petite part en aaaa-mm-jj ou avec l'heure.
+    Chaque jour distinct n'est formaté qu'une fois.
+    """
+    uniques, inverse = np.unique(jours, return_inverse=True)
+    dates = pd.DatetimeIndex(DATE_ORIGINE + uniques.astype("timedelta64[D]"))
+    formats = np.stack([
+        dates.strftime("%d/%m/%Y").to_numpy(dtype=object),
+        dates.strftime("%Y-%m-%d").to_numpy(dtype=object),
+        dates.strftime("%d/%m/%Y %H:%M:%S").to_numpy(dtype=object),
+    ])
+    choix = np.where(rng.random(len(jours)) < part_autres_formats, rng.integers(1, 3, len(jours)), 0)
+    return formats[choix, inverse]
+
+
+def _texte_bruite(valeurs: np.ndarray, rng: np.random.Generator, part: float) -> np.ndarray:
+    """
+    Variantes de saisie (minuscules, espaces) sur une part des valeurs, comme dans l'extrait.
+    """
+    valeurs = valeurs.astype(object)
+    bruit = rng.random(len(valeurs))
+    minuscules = bruit < part / 2
+    espaces = (bruit >= part / 2) & (bruit < part)
+    valeurs[minuscules] = [valeur.lower() for valeur in valeurs[minuscules]]
+    valeurs[espaces] = [f" {valeur} " for valeur in valeurs[espaces]]
+    return valeurs
+
+
+def generer_contrats(n: int, graine: int = 42, part_manquants: float = 0.02, part_doublons: float = PART_DOUBLONS,
+                     part_autres_formats: float = 0.01) -> pd.DataFrame:
+    """
+    Extrait brut synthétique de n lignes (+ doublons exacts), colonnes de donnees_anonymisees.xlsx.
+
+    Args:
+        part_manquants : part de cellules vides dans les colonnes facultatives
+        part_doublons : part de lignes dupliquées à l'identique
+        part_autres_formats : part de dates en aaaa-mm-jj ou avec l'heure (analyse non standard)
+    """
+    rng = np.random.default_rng(graine)
+
+    # 📅 Dates : commande, fin (1 à ~10 ans, quelques incohérences), restitution autour de la fin
+    jour_commande = rng.integers(0, N_JOURS_COMMANDE, n)
+    duree = np.where(rng.random(n) < 0.02, rng.integers(-60, 30, n), rng.integers(12, 72, n) * 30 + rng.integers(-15, 15, n))
+    jour_fin = jour_commande + duree
+    jour_restitution = jour_fin + rng.integers(-90, 120, n)
+
+    # 🧾 Prestations et conditions financières
+    gest_carburant = rng.random(n) < 0.45
+    assurance = rng.random(n) < 0.55
+    divers = rng.random(n) < 0.35
+    perte_financiere = rng.random(n) < 0.4
+    nombre_prestations = gest_carburant.astype(int) + assurance + divers + perte_financiere + rng.integers(0, 4, n)
+    loyer = np.round(rng.lognormal(6.2, 0.35, n), 2)
+    km = rng.integers(1, 25, n) * 10_000
+
+    # 🎯 Type de commande : nouveaux clients / nouvelles commandes, sinon renouvellement ou extension
+    # selon un risque latent (moins de prestations, loyer élevé, contrat court => non-renouvellement)
+    risque = (
+        -0.45 * nombre_prestations + 0.002 * (loyer - 500) + 0.000004 * (km - 100_000)
+        - 0.012 * (duree / 30 - 36) + rng.normal(0, 1, n) + 1.2
+    )
+    non_renouvele = rng.random(n) < 1 / (1 + np.exp(-risque))
+    nouveau_client = rng.random(n) < 0.15
+    nouvelle_commande = ~nouveau_client & (rng.random(n) < 0.1)
+    type_commande = np.where(
+        nouveau_client | nouvelle_commande, "Nouvelle commande",
+        np.where(non_renouvele, rng.choice(["Extension de parc", "Autre"], n, p=[0.9, 0.1]), "Renouvellement")
+    )
+
+    oui_non = np.array(["NON", "OUI"], dtype=object)
+    df = pd.DataFrame({
+        "No du Contrat": 10_000_000 + rng.permutation(n) * 20 + rng.integers(0, 20, n),  # distincts
+        "Vendeur Réseau": rng.choice(RESEAUX, n),
+        "Type Commande": _texte_bruite(type_commande, rng, 0.05),
+        "Nouveau Client": _texte_bruite(oui_non[nouveau_client.astype(int)], rng, 0.05),
+        "Date de Commande": _dates_texte(jour_commande, rng, part_autres_formats),
+        "Date de fin du contrat": _dates_texte(jour_fin, rng, part_autres_formats),
+        "Date de restitution": _dates_texte(jour_restitution, rng, part_autres_formats),
+        "Montant loyer mensuel": loyer,
+        "Montant mise à la route": np.round(rng.normal(350, 60, n), 2),
+        "Km souscrit": km,
+        "Nombre de prestations": nombre_prestations,
+        "Gest. carburant": oui_non[gest_carburant.astype(int)],
+        "Assurance": oui_non[assurance.astype(int)],
+        "Divers": oui_non[divers.astype(int)],
+        "Perte financière": oui_non[perte_financiere.astype(int)],
+        "flag_actif": (rng.random(n) < 0.6).astype(np.int64),
+    })
+
+    # ❓ Cellules vides dans les colonnes facultatives (restitution : contrats en cours)
+    for col in ["Date de restitution", "Vendeur Réseau", "Montant mise à la route"]:
+        df[col] = df[col].mask(rng.random(n) < (0.25 if col == "Date de restitution" else part_manquants))
+
+    # 🔁 Doublons exacts
+    n_doublons = int(n * part_doublons)
+    if n_doublons:
+        df = pd.concat([df, df.iloc[rng.integers(0, n, n_doublons)]], ignore_index=True)
+
+    return df
+
+
+def generer_classeur(chemin: str, n: int, graine: int = 42) -> str:
+    """
+    Écrit un extrait synthétique dans un classeur Excel (openpyxl write_only, par blocs).
+    Une feuille Excel est limitée à LIGNES_MAX_EXCEL lignes : au-delà, utiliser les DataFrames.
+    """
+    from openpyxl import Workbook
+
+    from src.export import ajouter_lignes_excel
+
+    df = generer_contrats(n, graine)
+    if len(df) > LIGNES_MAX_EXCEL:
+        raise ValueError(f"{len(df)} lignes : au-delà de la limite d'une feuille Excel ({LIGNES_MAX_EXCEL}).")
+
+    classeur = Workbook(write_only=True)
+    feuille = classeur.create_sheet("Sheet1")
+    feuille.append(list(df.columns))
+    ajouter_lignes_excel(feuille, df)
+
+    os.makedirs(os.path.dirname(chemin) or ".", exist_ok=True)
+    classeur.save(chemin)
+    return chemin
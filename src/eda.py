@@ -1,58 +1,183 @@
 import os
+import hashlib
+import json
+import shutil
 import pandas as pd
-import matplotlib.pyplot as plt
-import seaborn as sns
-import streamlit as st
+from concurrent.futures import ProcessPoolExecutor
+
+from src.cache_excel import evincer_cache
+from src.instrumentation import instrumenter
 
 FIGURES_PATH = "outputs/figures"
 RAPPORTS_PATH = "outputs/rapports"
 os.makedirs(FIGURES_PATH, exist_ok=True)
 os.makedirs(RAPPORTS_PATH, exist_ok=True)
 
-import streamlit as st
-
-def executer_eda_streamlit(df):
-    st.markdown("## 📊 Analyse exploratoire des données")
-
-    # Dimensions
-    st.subheader("📏 Statistiques générales")
-    st.write(f"*Dimensions :* {df.shape[0]} lignes × {df.shape[1]} colonnes")
-
-    # Types de données (affichage horizontal)
-    st.write("*Types de données :*")
-    types_df = pd.DataFrame(df.dtypes, columns=["Type"]).T
-    st.dataframe(types_df)
-
-    # Valeurs manquantes
-    st.subheader("❓ Valeurs manquantes")
-    missing = df.isnull().sum().reset_index()
-    missing.columns = ["Colonne", "Valeurs manquantes"]
-    missing["Valeurs manquantes"] = missing["Valeurs manquantes"].astype(int)
-    st.dataframe(missing)
-
-    st.markdown("## 🧠 Analyse graphique")
-
-    # Liste des noms de fichiers (ordre voulu)
-    noms_figures = [
-        "Non_renouvellement_distribution.png",
-        "Anciennete_contrat_vs_Non_renouvellement.png",
-        "Km souscrit_vs_Non_renouvellement.png",
-        "Montant loyer mensuel_vs_Non_renouvellement.png",
-        "Ecart_restitution_jours_vs_Non_renouvellement.png",
-        "Assurance_bin_vs_Non_renouvellement.png",
-        "Gest. carburant_bin_vs_Non_renouvellement.png",
-        "Divers_bin_vs_Non_renouvellement.png",
-        "correlation_matrix.png"
-    ]
-
-    FIGURES_PATH = "outputs/figures"
-
-    # Affichage par blocs de 3
-    for i in range(0, len(noms_figures), 3):
-        cols = st.columns(3)
-        for j in range(3):
-            if i + j < len(noms_figures):
-                fig_path = os.path.join(FIGURES_PATH, noms_figures[i + j])
-                if os.path.exists(fig_path):
-                    with cols[j]:
-                        st.image(fig_path, use_container_width=True, caption=noms_figures[i + j].replace("_", " ").replace(".png", ""))
\ No newline at end of file
+# 🖼 Figures EDA régénérées à partir du df_model courant.
+# Chaque image est mise en cache sous l'empreinte (colonnes utilisées + description de la figure) :
+# elle n'est redessinée que si ces données changent. Le rendu se fait en parallèle (backend Agg).
+
+CACHE_FIGURES_PATH = "data/cache/figures"
+TAILLE_MAX_CACHE_FIGURES = 256 * 1024 ** 2  # 256 Mo
+
+# Incrémenter si le dessin d'une figure change (invalide les images en cache)
+VERSION_FIGURES = "1"
+
+CIBLE = "Non_renouvellement"
+
+# Liste des noms de fichiers (ordre voulu) et description de chaque figure
+FIGURES_EDA = {
+    "Non_renouvellement_distribution.png": {"type": "distribution", "variable": CIBLE},
+    "Anciennete_contrat_vs_Non_renouvellement.png": {"type": "boite", "variable": "Anciennete_contrat"},
+    "Km souscrit_vs_Non_renouvellement.png": {"type": "boite", "variable": "Km souscrit"},
+    "Montant loyer mensuel_vs_Non_renouvellement.png": {"type": "boite", "variable": "Montant loyer mensuel"},
+    "Ecart_restitution_jours_vs_Non_renouvellement.png": {"type": "boite", "variable": "Ecart_restitution_jours"},
+    "Assurance_bin_vs_Non_renouvellement.png": {"type": "boite", "variable": "Assurance_bin"},
+    "Gest. carburant_bin_vs_Non_renouvellement.png": {"type": "boite", "variable": "Gest. carburant_bin"},
+    "Divers_bin_vs_Non_renouvellement.png": {"type": "boite", "variable": "Divers_bin"},
+    "correlation_matrix.png": {"type": "correlation"},
+}
+NOMS_FIGURES = list(FIGURES_EDA)
+
+
+def _colonnes_figure(df: pd.DataFrame, spec: dict) -> list:
+    """
+    Colonnes de df nécessaires au dessin d'une figure (liste vide si elles sont absentes).
+    """
+    if spec["type"] == "correlation":
+        return list(df.select_dtypes("number").columns)
+    colonnes = [CIBLE] if spec["variable"] == CIBLE else [spec["variable"], CIBLE]
+    return colonnes if all(col in df.columns for col in colonnes) else []
+
+
+def empreinte_figure(donnees: pd.DataFrame, spec: dict) -> str:
+    """
+    Empreinte SHA256 d'une figure : description, colonnes, types et contenu des données dessinées.
+    """
+    sha = hashlib.sha256()
+    entete = {
+        "version": VERSION_FIGURES,
+        "spec": spec,
+        "colonnes": [str(col) for col in donnees.columns],
+        "types": [str(dtype) for dtype in donnees.dtypes],
+    }
+    sha.update(json.dumps(entete, sort_keys=True).encode())
+    sha.update(pd.util.hash_pandas_object(donnees, index=False).to_numpy().tobytes())
+    return sha.hexdigest()
+
+
+def _initialiser_processus():
+    import matplotlib
+    matplotlib.use("Agg")
+
+
+def _dessiner_figure(spec: dict, donnees: pd.DataFrame, chemin: str) -> str:
+    """
+    Dessine une figure EDA et l'enregistre en PNG (exécuté dans un processus de calcul).
+    """
+    import seaborn as sns
+    from matplotlib.figure import Figure
+
+    if spec["type"] == "distribution":
+        with sns.axes_style("whitegrid"):
+            fig = Figure(figsize=(4, 3))
+            ax = fig.subplots()
+            sns.countplot(data=donnees, x=CIBLE, color=sns.color_palette("deep")[0], ax=ax)
+        ax.set_title("Répartition de la variable cible")
+        ax.set_xlabel("Non_renouvellement (1 = non-renouvelé)")
+        ax.set_ylabel("Nombre de contrats")
+    elif spec["type"] == "boite":
+        fig = Figure(figsize=(6, 4))
+        ax = fig.subplots()
+        sns.boxplot(data=donnees, x=CIBLE, y=spec["variable"], ax=ax)
+        ax.set_title(f"{spec['variable']} selon {CIBLE}")
+    else:
+        fig = Figure(figsize=(8, 6))
+        ax = fig.subplots()
+        sns.heatmap(
+            donnees.corr(), annot=True, fmt=".2f", cmap="coolwarm", linewidths=0.5, square=True,
+            cbar_kws={"shrink": 0.8}, annot_kws={"size": 8}, ax=ax
+        )
+        ax.set_title("Matrice de corrélation entre variables numériques")
+        ax.tick_params(labelsize=8)
+        for etiquette in ax.get_xticklabels():
+            etiquette.set_rotation(45)
+            etiquette.set_horizontalalignment("right")
+
+    fig.tight_layout()
+    chemin_tmp = f"{chemin}.{os.getpid()}.tmp.png"
+    fig.savefig(chemin_tmp)
+    os.replace(chemin_tmp, chemin)
+    return chemin
+
+
+@instrumenter()
+def generer_figures_eda(df: pd.DataFrame, dossier_sortie: str = None, dossier_cache: str = CACHE_FIGURES_PATH,
+                        n_workers: int = None) -> dict:
+    """
+    Génère les figures EDA de NOMS_FIGURES pour df (df_model) :
+    - figures déjà en cache pour les mêmes données : reprises telles quelles
+    - figures manquantes : dessinées en parallèle (un processus par figure, backend Agg)
+    Avec dossier_sortie (pipeline main.py), les images y sont aussi copiées sous leur nom, et celles
+    des figures non générées (colonnes absentes) en sont supprimées.
+
+    Returns:
+        dict nom de figure -> image en cache (data/cache/figures/<empreinte>.png, propre à ces données),
+        pour les figures dont les colonnes sont présentes
+    """
+    os.makedirs(dossier_cache, exist_ok=True)
+
+    images, a_dessiner = {}, []
+    for nom, spec in FIGURES_EDA.items():
+        colonnes = _colonnes_figure(df, spec)
+        if not colonnes:
+            continue
+        donnees = df[colonnes]
+        chemin = os.path.join(dossier_cache, f"{empreinte_figure(donnees, spec)}.png")
+        images[nom] = chemin
+        if os.path.exists(chemin):
+            os.utime(chemin)  # marque l'image comme récemment utilisée
+        else:
+            a_dessiner.append((spec, donnees, chemin))
+
+    n_workers = max(1, min(n_workers or os.cpu_count() or 1, len(a_dessiner)))
+    if n_workers == 1:
+        for spec, donnees, chemin in a_dessiner:
+            _dessiner_figure(spec, donnees, chemin)
+    elif a_dessiner:
+        with ProcessPoolExecutor(max_workers=n_workers, initializer=_initialiser_processus) as pool:
+            list(pool.map(_dessiner_figure, *zip(*a_dessiner)))
+
+    if dossier_sortie:
+        os.makedirs(dossier_sortie, exist_ok=True)
+        for nom, chemin in images.items():
+            shutil.copyfile(chemin, os.path.join(dossier_sortie, nom))
+        for nom in NOMS_FIGURES:
+            perimee = os.path.join(dossier_sortie, nom)
+            if nom not in images and os.path.exists(perimee):
+                os.remove(perimee)
+
+    evincer_cache(dossier_cache, TAILLE_MAX_CACHE_FIGURES, extension=".png")
+    return images
+
+
+@instrumenter()
+def executer_eda(df: pd.DataFrame, n_workers: int = None):
+    """
+    EDA du pipeline (main.py) : statistiques générales et corrélations avec la cible
+    dans outputs/rapports, figures dans outputs/figures.
+    """
+    correlations = df.select_dtypes("number").corr()[CIBLE].drop(CIBLE).sort_values(ascending=False)
+    texte_correlations = f"📌 Corrélation des variables avec la cible ({CIBLE}) :\n\n{correlations}"
+
+    with open(os.path.join(RAPPORTS_PATH, "stats_generales.txt"), "w", encoding="utf-8") as f:
+        f.write(f"📊 Dimensions :\n{df.shape}\n\n")
+        f.write(f"🧩 Types de données :\n{df.dtypes}\n\n")
+        f.write(f"🔍 Valeurs manquantes :\n{df.isnull().sum()}\n\n")
+        f.write(texte_correlations)
+
+    with open(os.path.join(RAPPORTS_PATH, "correlation_avec_cible.txt"), "w", encoding="utf-8") as f:
+        f.write(texte_correlations)
+
+    images = generer_figures_eda(df, FIGURES_PATH, n_workers=n_workers)
+    print(f"✅ EDA terminée : {len(images)} figures dans {FIGURES_PATH}")
@@ -0,0 +1,277 @@
+import functools
+import glob
+import json
+import os
+import time
+
+import numpy as np
+import pandas as pd
+
+from src.arbres_numpy import exporter_arbres
+from src.instrumentation import instrumenter
+from src.magasin_features import COLONNE_EMPREINTE, chemin_magasin
+from src.predict import COLONNES_NON_FEATURES, construire_matrice_features
+from src.registre_modeles import MODELE_PAR_DEFAUT
+from src.training_xgboost import HYPERPARAMETRES_XGBOOST
+
+# Entraînement XGBoost hors mémoire, pour un historique de features trop gros pour un DataFrame :
+# - les features (format df_model) sont lues sur disque par lots (Parquet, iter_batches) et passées
+#   à XGBoost par un itérateur (xgboost.DataIter), sans jamais construire le jeu complet en pandas
+# - mode "quantile" : QuantileDMatrix, données gardées en mémoire sous forme quantifiée (~1 octet par valeur)
+#   mode "memoire_externe" : pages quantifiées écrites sur disque (dossier_cache), mémoire bornée par le lot
+# - le jeu de test est choisi par hachage du "No du Contrat" : même contrat => même côté, d'une exécution à l'autre,
+#   sans mélange ni split en mémoire ; un seuil par classe rend le split stratifié sur la cible
+# Sources : le magasin de features (src/magasin_features.py) ou un dossier de fichiers Parquet (un par extrait).
+# XGBoost et joblib ne sont importés qu'au premier entraînement.
+
+RAPPORT_PATH = "outputs/rapports/entrainement_hors_memoire.json"
+CACHE_MEMOIRE_EXTERNE_PATH = "data/cache/xgboost_memoire_externe"
+MODES = ("quantile", "memoire_externe")
+
+TAILLE_LOT_HORS_MEMOIRE = 200_000  # lignes lues à la fois
+PART_TEST = 0.2
+N_CASES_HACHAGE = 2 ** 16  # résolution des seuils de test par classe
+MAX_BIN = 256
+
+COLONNES_HORS_FEATURES = COLONNES_NON_FEATURES + [COLONNE_EMPREINTE]
+
+
+def fichiers_parquet(sources=None) -> list:
+    """
+    Fichiers Parquet à lire : magasin de features par défaut, sinon un fichier, un dossier ou une liste de fichiers.
+    """
+    if sources is None:
+        sources = [chemin_magasin()]
+    elif isinstance(sources, str):
+        sources = sorted(glob.glob(os.path.join(sources, "*.parquet"))) if os.path.isdir(sources) else [sources]
+
+    manquants = [chemin for chemin in sources if not os.path.exists(chemin)]
+    if manquants or not sources:
+        raise FileNotFoundError(f"Features Parquet introuvables : {manquants or 'aucun fichier'}")
+    return list(sources)
+
+
+def lire_par_lots(fichiers: list, colonnes: list, taille_lot: int = TAILLE_LOT_HORS_MEMOIRE):
+    """
+    Lots successifs (DataFrames d'au plus taille_lot lignes) des colonnes demandées, fichier après fichier.
+    """
+    import pyarrow.parquet as pq
+
+    for chemin in fichiers:
+        for lot in pq.ParquetFile(chemin).iter_batches(batch_size=taille_lot, columns=colonnes):
+            yield lot.to_pandas()
+
+
+def position_hachage(numeros_contrat: pd.Series, graine: int = 42) -> np.ndarray:
+    """
+    Position pseudo-aléatoire dans [0, 1) de chaque contrat, fonction du seul numéro de contrat (et de la graine).
+    Le numéro est haché sous forme de texte : même position que la colonne soit int32, int64 ou texte.
+    """
+    cle = f"lld{graine:013d}"[-16:]  # clé de hachage : 16 caractères
+    empreintes = pd.util.hash_array(numeros_contrat.astype(str).to_numpy(dtype=object), hash_key=cle)
+    return (empreintes >> np.uint64(11)).astype(np.float64) / 2.0 ** 53
+
+
+def seuils_test_stratifies(fichiers: list, part_test: float = PART_TEST, taille_lot: int = TAILLE_LOT_HORS_MEMOIRE,
+                           graine: int = 42) -> dict:
+    """
+    Première passe (numéro de contrat et cible seulement) : seuil de position par classe tel que
+    part_test des lignes de chaque classe aient une position inférieure (à 1 / N_CASES_HACHAGE près).
+    Une ligne va dans le jeu de test si position_hachage < seuil de sa classe.
+
+    Returns:
+        {classe: {"seuil": float, "n_lignes": int}}
+    """
+    histogrammes = {}
+    for lot in lire_par_lots(fichiers, ["No du Contrat", "Non_renouvellement"], taille_lot):
+        cases = (position_hachage(lot["No du Contrat"], graine) * N_CASES_HACHAGE).astype(np.int64)
+        cible = lot["Non_renouvellement"].to_numpy(dtype=np.int64)
+        for classe in np.unique(cible):
+            histogramme = histogrammes.setdefault(int(classe), np.zeros(N_CASES_HACHAGE, dtype=np.int64))
+            histogramme += np.bincount(cases[cible == classe], minlength=N_CASES_HACHAGE)
+
+    seuils = {}
+    for classe, histogramme in sorted(histogrammes.items()):
+        cumul = np.cumsum(histogramme)
+        n_cases = int(np.searchsorted(cumul, part_test * cumul[-1])) + 1
+        seuils[classe] = {"seuil": n_cases / N_CASES_HACHAGE, "n_lignes": int(cumul[-1])}
+    return seuils
+
+
+def est_dans_test(lot: pd.DataFrame, seuils: dict, graine: int = 42) -> np.ndarray:
+    """
+    Masque des lignes du lot qui appartiennent au jeu de test (voir seuils_test_stratifies).
+    """
+    cible = lot["Non_renouvellement"].to_numpy(dtype=np.int64)
+    seuil = np.zeros(len(lot))
+    for classe, valeurs in seuils.items():
+        seuil[cible == classe] = valeurs["seuil"]
+    return position_hachage(lot["No du Contrat"], graine) < seuil
+
+
+def lots_partie(fichiers: list, features: list, seuils: dict, partie: str = "train",
+                taille_lot: int = TAILLE_LOT_HORS_MEMOIRE, graine: int = 42):
+    """
+    Lots (X float32, y) d'une partie du jeu ("train" ou "test"), dans l'ordre des fichiers.
+    """
+    colonnes = ["No du Contrat", "Non_renouvellement"] + features
+    for lot in lire_par_lots(fichiers, colonnes, taille_lot):
+        test = est_dans_test(lot, seuils, graine)
+        lot = lot[test if partie == "test" else ~test]
+        if len(lot):
+            yield construire_matrice_features(lot, features, []), lot["Non_renouvellement"].to_numpy(dtype=np.float32)
+
+
+@functools.lru_cache(maxsize=None)
+def _classe_lots_parquet():
+    # Sous-classe de xgboost.DataIter créée au premier appel : xgboost n'est pas importé avec le module
+    import xgboost
+
+    class LotsParquet(xgboost.DataIter):
+        """
+        Itérateur XGBoost sur les lots d'une partie du jeu (lots_partie) :
+        XGBoost le parcourt autant de fois que nécessaire (reset) pour construire sa matrice.
+        """
+
+        def __init__(self, fichiers, features, seuils, partie, taille_lot, graine, cache_prefix=None):
+            self.parametres = (fichiers, features, seuils, partie, taille_lot, graine)
+            self.features = features
+            self._lots = None
+            super().__init__(cache_prefix=cache_prefix)
+
+        def next(self, input_data) -> int:
+            if self._lots is None:
+                self._lots = lots_partie(*self.parametres)
+            lot = next(self._lots, None)
+            if lot is None:
+                return 0
+            X, y = lot
+            input_data(data=X, label=y, feature_names=self.features)
+            return 1
+
+        def reset(self):
+            self._lots = None
+
+    return LotsParquet
+
+
+def lots_parquet(fichiers: list, features: list, seuils: dict, partie: str = "train",
+                 taille_lot: int = TAILLE_LOT_HORS_MEMOIRE, graine: int = 42, cache_prefix: str = None):
+    """
+    Itérateur xgboost.DataIter sur lots_partie, pour QuantileDMatrix ou DMatrix (mémoire externe si cache_prefix).
+    """
+    return _classe_lots_parquet()(fichiers, features, seuils, partie, taille_lot, graine, cache_prefix)
+
+
+def _metriques(y: np.ndarray, proba: np.ndarray) -> dict:
+    from sklearn.metrics import confusion_matrix, f1_score, precision_score, recall_score, roc_auc_score
+
+    y_pred = (proba >= 0.5).astype(int)
+    return {
+        "auc": round(float(roc_auc_score(y, proba)), 4),
+        "precision": round(float(precision_score(y, y_pred, zero_division=0)), 4),
+        "recall": round(float(recall_score(y, y_pred, zero_division=0)), 4),
+        "f1": round(float(f1_score(y, y_pred, zero_division=0)), 4),
+        "matrice_confusion": confusion_matrix(y, y_pred).tolist(),
+    }
+
+
+@instrumenter()
+def entrainer_hors_memoire(sources=None, mode: str = "quantile", part_test: float = PART_TEST,
+                           taille_lot: int = TAILLE_LOT_HORS_MEMOIRE, hyperparametres: dict = None,
+                           chemin_modele: str = MODELE_PAR_DEFAUT, chemin_rapport: str = RAPPORT_PATH,
+                           dossier_cache: str = CACHE_MEMOIRE_EXTERNE_PATH, graine: int = 42) -> dict:
+    """
+    Entraîne le modèle XGBoost sur des features Parquet lues par lots (mêmes features et hyperparamètres
+    que entrainer_modele_xgboost), l'évalue lot par lot sur le jeu de test haché et le sauvegarde
+    comme entrainer_modele_xgboost (joblib, .ubj, tables NumPy) : le scoring ne change pas.
+
+    Args:
+        sources : fichier ou dossier Parquet au format df_model (magasin de features par défaut)
+        mode : "quantile" (QuantileDMatrix en mémoire) ou "memoire_externe" (pages sur disque dans dossier_cache)
+        taille_lot : lignes lues à la fois (la mémoire de travail pandas est celle d'un lot)
+
+    Returns:
+        Rapport (aussi écrit dans outputs/rapports/entrainement_hors_memoire.json) :
+        tailles des jeux, part de test par classe, métriques sur le jeu de test, durée.
+    """
+    import joblib
+    import pyarrow.parquet as pq
+    import xgboost
+    from xgboost import XGBClassifier
+
+    if mode not in MODES:
+        raise ValueError(f"Mode inconnu : {mode} (attendu : {', '.join(MODES)})")
+    debut = time.monotonic()
+
+    # 📂 Fichiers et features (toutes les colonnes hors identifiant, cible et empreinte, comme X de entrainer_modele_xgboost)
+    fichiers = fichiers_parquet(sources)
+    features = [col for col in pq.read_schema(fichiers[0]).names if col not in COLONNES_HORS_FEATURES]
+
+    # ✂ Jeu de test par hachage du numéro de contrat, stratifié sur la cible (passe sur deux colonnes)
+    seuils = seuils_test_stratifies(fichiers, part_test, taille_lot, graine)
+
+    # 🧱 Matrice d'entraînement construite lot par lot
+    if mode == "memoire_externe":
+        os.makedirs(dossier_cache, exist_ok=True)
+        lots_train = lots_parquet(fichiers, features, seuils, "train", taille_lot, graine,
+                                  cache_prefix=os.path.join(dossier_cache, "train"))
+        dtrain = xgboost.DMatrix(lots_train)
+    else:
+        lots_train = lots_parquet(fichiers, features, seuils, "train", taille_lot, graine)
+        dtrain = xgboost.QuantileDMatrix(lots_train, max_bin=MAX_BIN)
+
+    # 🧠 Entraînement (API native : l'itérateur remplace X_train / y_train)
+    hyperparametres = dict(hyperparametres or HYPERPARAMETRES_XGBOOST)
+    parametres = {
+        **{cle: valeur for cle, valeur in hyperparametres.items() if cle != "n_estimators"},
+        "objective": "binary:logistic",
+        "eval_metric": "logloss",
+        "tree_method": "hist",
+        "max_bin": MAX_BIN,
+        "seed": graine,
+    }
+    booster = xgboost.train(parametres, dtrain, num_boost_round=hyperparametres.get("n_estimators", 100))
+    booster.feature_names = features
+    del dtrain
+    if mode == "memoire_externe":
+        for page in glob.glob(os.path.join(dossier_cache, "train*")):
+            os.remove(page)  # pages propres à cette matrice
+
+    # 📊 Évaluation lot par lot sur le jeu de test
+    y_test, proba_test = [], []
+    for X, y in lots_partie(fichiers, features, seuils, "test", taille_lot, graine):
+        y_test.append(y.astype(int))
+        proba_test.append(booster.inplace_predict(X))
+    y_test, proba_test = np.concatenate(y_test), np.concatenate(proba_test)
+
+    # 💾 Sauvegarde au format de entrainer_modele_xgboost (XGBClassifier), lisible par le registre des modèles
+    modele = XGBClassifier(**hyperparametres, objective="binary:logistic", random_state=graine, eval_metric="logloss")
+    modele.load_model(bytearray(booster.save_raw("ubj")))
+    racine = os.path.splitext(chemin_modele)[0]
+    os.makedirs(os.path.dirname(chemin_modele) or ".", exist_ok=True)
+    joblib.dump(modele, chemin_modele)
+    modele.save_model(f"{racine}.ubj")
+    exporter_arbres(chemin_modele)
+
+    n_total = sum(valeurs["n_lignes"] for valeurs in seuils.values())
+    rapport = {
+        "mode": mode,
+        "fichiers": fichiers,
+        "n_features": len(features),
+        "n_lignes_train": n_total - len(y_test),
+        "n_lignes_test": len(y_test),
+        "part_test_par_classe": {
+            str(classe): round(float((y_test == classe).sum()) / max(valeurs["n_lignes"], 1), 4)
+            for classe, valeurs in seuils.items()
+        },
+        "taille_lot": taille_lot,
+        "duree_secondes": round(time.monotonic() - debut, 1),
+        "test": _metriques(y_test, proba_test),
+    }
+
+    os.makedirs(os.path.dirname(chemin_rapport) or ".", exist_ok=True)
+    with open(chemin_rapport, "w", encoding="utf-8") as f:
+        json.dump(rapport, f, ensure_ascii=False, indent=2)
+
+    return rapport
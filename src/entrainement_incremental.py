@@ -0,0 +1,159 @@
+import json
+import os
+import shutil
+import time
+
+import joblib
+import numpy as np
+import pandas as pd
+from sklearn.metrics import f1_score, precision_score, recall_score, roc_auc_score
+from sklearn.model_selection import train_test_split
+from xgboost import XGBClassifier
+
+from src.arbres_numpy import exporter_arbres
+from src.registre_modeles import MODELE_PAR_DEFAUT, charger_modele
+
+# Ré-entraînement incrémental du modèle XGBoost (nouvel extrait mensuel) :
+# - le booster existant est repris et on lui ajoute des arbres appris sur les nouveaux contrats seulement
+# - un échantillon "réservoir" de taille fixe des données déjà vues est mêlé aux nouvelles données
+#   pour limiter l'oubli, sans relire tout l'historique
+# - les métriques du nouveau modèle sont comparées à celles du modèle précédent
+
+RESERVOIR_PATH = "models/reservoir_xgboost.joblib"
+RAPPORT_PATH = "outputs/rapports/entrainement_incremental.json"
+TAILLE_RESERVOIR = 20_000
+N_ARBRES_SUPPLEMENTAIRES = 50
+
+
+def charger_reservoir(chemin: str = RESERVOIR_PATH) -> dict:
+    """
+    Réservoir des données déjà vues : {"donnees": DataFrame, "n_vus": nombre de lignes vues au total}.
+    """
+    if not os.path.exists(chemin):
+        return {"donnees": None, "n_vus": 0}
+    return joblib.load(chemin)
+
+
+def mettre_a_jour_reservoir(reservoir: dict, df: pd.DataFrame, taille: int = TAILLE_RESERVOIR,
+                            graine: int = 42) -> dict:
+    """
+    Ajoute les lignes de df au réservoir (échantillonnage de Vitter, algorithme R, vectorisé) :
+    après mise à jour, chaque ligne vue a la même probabilité taille / n_vus d'être dans le réservoir.
+    """
+    donnees, n_vus = reservoir["donnees"], reservoir["n_vus"]
+    rng = np.random.default_rng([graine, n_vus])
+
+    # 1. Remplissage tant que le réservoir n'est pas plein
+    place = max(0, taille - (0 if donnees is None else len(donnees)))
+    entrees = df.iloc[:place]
+    donnees = entrees.copy() if donnees is None else pd.concat([donnees, entrees], ignore_index=True)
+    reste = df.iloc[place:]
+
+    # 2. Remplacement : la ligne de rang global i prend la case j ~ U[0, i] si j < taille
+    if len(reste):
+        rangs = n_vus + place + np.arange(len(reste))
+        cases = rng.integers(0, rangs + 1)
+        retenues = np.flatnonzero(cases < taille)
+        # Plusieurs lignes pour la même case : seule la dernière reste (comme en séquentiel)
+        cases_inverses = cases[retenues][::-1]
+        _, premieres = np.unique(cases_inverses, return_index=True)
+        retenues = retenues[::-1][premieres]
+        remplacees = np.zeros(len(donnees), dtype=bool)
+        remplacees[cases[retenues]] = True
+        donnees = pd.concat([donnees[~remplacees], reste.iloc[retenues]], ignore_index=True)
+
+    return {"donnees": donnees.reset_index(drop=True), "n_vus": n_vus + len(df)}
+
+
+def _metriques(modele, X: pd.DataFrame, y: pd.Series) -> dict:
+    proba = modele.predict_proba(X)[:, 1]
+    y_pred = (proba > 0.5).astype(int)
+    return {
+        "roc_auc": round(roc_auc_score(y, proba), 4) if y.nunique() > 1 else None,
+        "f1": round(f1_score(y, y_pred, zero_division=0), 4),
+        "recall": round(recall_score(y, y_pred, zero_division=0), 4),
+        "precision": round(precision_score(y, y_pred, zero_division=0), 4),
+    }
+
+
+def entrainer_incremental(df_nouveau: pd.DataFrame, chemin_modele: str = MODELE_PAR_DEFAUT,
+                          n_arbres: int = N_ARBRES_SUPPLEMENTAIRES, utiliser_reservoir: bool = True,
+                          df_historique: pd.DataFrame = None, taille_reservoir: int = TAILLE_RESERVOIR,
+                          chemin_reservoir: str = RESERVOIR_PATH, chemin_rapport: str = RAPPORT_PATH,
+                          graine: int = 42) -> dict:
+    """
+    Ajoute n_arbres au modèle existant, appris sur les contrats du nouvel extrait.
+    Le coût dépend de la taille de df_nouveau (+ réservoir), pas de celle de tout l'historique.
+
+    Args:
+        df_nouveau : nouveaux contrats prétraités (preparer_features) avec 'Non_renouvellement'
+        utiliser_reservoir : mêler au nouvel extrait l'échantillon des données déjà vues
+        df_historique : données déjà vues, pour initialiser le réservoir s'il n'existe pas encore
+
+    Returns:
+        Rapport (aussi écrit dans outputs/rapports/entrainement_incremental.json) :
+        métriques du modèle précédent et du nouveau modèle sur les nouveaux contrats mis de côté.
+        Le modèle précédent est conservé dans models/xgboost_model_precedent.joblib.
+    """
+    debut = time.monotonic()
+
+    # 📦 Modèle actuel : ses features définissent les colonnes attendues
+    precedent = charger_modele(chemin_modele)
+    features = list(precedent.get_booster().feature_names)
+    manquantes = [col for col in features if col not in df_nouveau.columns]
+    if manquantes:
+        raise ValueError(f"Colonnes absentes du nouvel extrait : {manquantes}")
+
+    # ✂ Une partie des nouveaux contrats est gardée pour comparer les deux modèles
+    # (découpage non stratifié si une classe compte moins de 2 contrats : stratify échouerait)
+    stratifie = df_nouveau["Non_renouvellement"].value_counts().min() >= 2
+    nouveau_train, nouveau_test = train_test_split(
+        df_nouveau, test_size=0.2, random_state=graine,
+        stratify=df_nouveau["Non_renouvellement"] if stratifie else None
+    )
+
+    # 🪣 Réservoir des données déjà vues (initialisé avec l'historique au premier passage)
+    reservoir = charger_reservoir(chemin_reservoir)
+    if reservoir["donnees"] is None and df_historique is not None:
+        reservoir = mettre_a_jour_reservoir(reservoir, df_historique, taille_reservoir, graine)
+
+    df_train = nouveau_train
+    if utiliser_reservoir and reservoir["donnees"] is not None:
+        df_train = pd.concat([nouveau_train, reservoir["donnees"]], ignore_index=True)
+
+    # 🧠 Reprise du booster : n_arbres supplémentaires, mêmes hyperparamètres
+    parametres = {**precedent.get_params(), "n_estimators": n_arbres}
+    modele = XGBClassifier(**parametres)
+    modele.fit(
+        df_train[features], df_train["Non_renouvellement"].astype(int),
+        xgb_model=precedent.get_booster()
+    )
+    modele.get_booster().feature_names = features
+
+    X_test, y_test = nouveau_test[features], nouveau_test["Non_renouvellement"].astype(int)
+    rapport = {
+        "n_lignes_nouvelles": len(nouveau_train),
+        "n_lignes_reservoir": len(df_train) - len(nouveau_train),
+        "decoupage_stratifie": bool(stratifie),
+        "n_arbres_avant": precedent.get_booster().num_boosted_rounds(),
+        "n_arbres_apres": modele.get_booster().num_boosted_rounds(),
+        "duree_secondes": round(time.monotonic() - debut, 1),
+        "modele_precedent": _metriques(precedent, X_test, y_test),
+        "nouveau_modele": _metriques(modele, X_test, y_test),
+    }
+
+    # 💾 Sauvegarde : modèle précédent conservé, nouveau modèle à la place de l'ancien
+    racine = os.path.splitext(chemin_modele)[0]
+    shutil.copyfile(chemin_modele, f"{racine}_precedent.joblib")
+    joblib.dump(modele, chemin_modele)
+    modele.save_model(f"{racine}.ubj")
+    exporter_arbres(chemin_modele)  # tables NumPy du nouveau modèle (src/arbres_numpy.py)
+
+    os.makedirs(os.path.dirname(chemin_reservoir) or ".", exist_ok=True)
+    joblib.dump(mettre_a_jour_reservoir(reservoir, nouveau_train, taille_reservoir, graine), chemin_reservoir)
+
+    os.makedirs(os.path.dirname(chemin_rapport) or ".", exist_ok=True)
+    with open(chemin_rapport, "w", encoding="utf-8") as f:
+        json.dump(rapport, f, ensure_ascii=False, indent=2)
+
+    return rapport
@@ -0,0 +1,69 @@
+import io
+
+import pandas as pd
+
+from src.instrumentation import instrumenter
+
+# Formats proposés au téléchargement : extension et type MIME
+FORMATS_EXPORT = {
+    "Excel": (".xlsx", "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"),
+    "CSV": (".csv", "text/csv"),
+    "Parquet": (".parquet", "application/octet-stream"),
+}
+
+TAILLE_BLOC_EXPORT = 10_000
+
+
+def ajouter_lignes_excel(feuille, df: pd.DataFrame, taille_bloc: int = TAILLE_BLOC_EXPORT):
+    """
+    Ajoute les lignes de df à une feuille openpyxl en mode write_only, converties par blocs.
+    """
+    for debut in range(0, len(df), taille_bloc):
+        bloc = df.iloc[debut:debut + taille_bloc].astype(object)
+        bloc = bloc.where(bloc.notna(), None)  # cellules vides plutôt que NaN / NaT
+        for ligne in bloc.itertuples(index=False, name=None):
+            feuille.append(ligne)
+
+
+def exporter_excel(df: pd.DataFrame, nom_feuille: str = "Feuille1", taille_bloc: int = TAILLE_BLOC_EXPORT) -> bytes:
+    """
+    Écrit df dans un classeur Excel en mode write_only (openpyxl) :
+    les lignes sont converties et écrites par blocs, sans garder le classeur entier en mémoire.
+    """
+    from openpyxl import Workbook
+
+    classeur = Workbook(write_only=True)
+    feuille = classeur.create_sheet(nom_feuille)
+    feuille.append([str(col) for col in df.columns])
+    ajouter_lignes_excel(feuille, df, taille_bloc)
+
+    buffer = io.BytesIO()
+    classeur.save(buffer)
+    return buffer.getvalue()
+
+
+def exporter_csv(df: pd.DataFrame) -> bytes:
+    """
+    Export CSV (UTF-8 avec BOM pour une ouverture directe dans Excel).
+    """
+    return df.to_csv(index=False).encode("utf-8-sig")
+
+
+def exporter_parquet(df: pd.DataFrame) -> bytes:
+    buffer = io.BytesIO()
+    df.to_parquet(buffer, index=False)
+    return buffer.getvalue()
+
+
+@instrumenter()
+def exporter(df: pd.DataFrame, format_export: str, nom_feuille: str = "Feuille1") -> bytes:
+    """
+    Génère le contenu du fichier à télécharger dans le format demandé (clé de FORMATS_EXPORT).
+    """
+    if format_export == "Excel":
+        return exporter_excel(df, nom_feuille)
+    if format_export == "CSV":
+        return exporter_csv(df)
+    if format_export == "Parquet":
+        return exporter_parquet(df)
+    raise ValueError(f"Format d'export inconnu : {format_export}")
@@ -1,6 +1,13 @@
+import numpy as np
 import pandas as pd
 
-def preparer_features(df: pd.DataFrame) -> pd.DataFrame:
+from src.dates import NS_PAR_JOUR, convertir_dates, ecrire_rapport_dates, numeros_mois
+from src.instrumentation import instrumenter
+
+COLONNES_DATES = ["Date de Commande", "Date de fin du contrat", "Date de restitution"]
+
+@instrumenter()
+def preparer_features(df: pd.DataFrame, chemin_rapport_dates: str = None) -> pd.DataFrame:
     """
     Prépare les variables explicatives optimisées pour la modélisation :
     - Garde uniquement les variables pertinentes selon EDA
@@ -8,42 +15,51 @@ def preparer_features(df: pd.DataFrame) -> pd.DataFrame:
     - Calcule l'écart de restitution (jours)
     - Encode les prestations discriminantes
     - Conserve 'No du Contrat' uniquement pour traçabilité
+    Le rapport de conversion des dates est écrit dans chemin_rapport_dates s'il est renseigné
+    (main.py seulement, via preparer_jeu_modele : pas d'écriture à chaque appel).
     """
-    df_features = df.copy()
-
-    # 🔍 1. Nettoyage des valeurs manquantes
-    if "Vendeur Réseau" in df_features.columns:
-        df_features["Vendeur Réseau"] = df_features["Vendeur Réseau"].fillna("Inconnu")
-
-    if "Montant mise à la route" in df_features.columns:
-        mediane = df_features["Montant mise à la route"].median()
-        df_features["Montant mise à la route"] = df_features["Montant mise à la route"].fillna(mediane)
-
-    # 📅 2. Calcul de l'ancienneté du contrat (en mois)
-    df_features["Date de Commande"] = pd.to_datetime(df_features["Date de Commande"], errors="coerce", dayfirst=True)
-    df_features["Date de fin du contrat"] = pd.to_datetime(df_features["Date de fin du contrat"], errors="coerce", dayfirst=True)
-
-    df_features["Anciennete_contrat"] = (
-        (df_features["Date de fin du contrat"].dt.year - df_features["Date de Commande"].dt.year) * 12 +
-        (df_features["Date de fin du contrat"].dt.month - df_features["Date de Commande"].dt.month)
-    )
-    df_features = df_features[df_features["Anciennete_contrat"].between(1, 120)]
-
-    # 📦 3. Ecart restitution
-    df_features["Date de restitution"] = pd.to_datetime(df_features["Date de restitution"], errors="coerce", dayfirst=True)
-    df_features.loc[df_features["Date de restitution"].dt.year < 2000, "Date de restitution"] = pd.NaT
-    df_features["Date de restitution"] = df_features["Date de restitution"].fillna(df_features["Date de fin du contrat"])
-    df_features["Ecart_restitution_jours"] = (
-        df_features["Date de restitution"] - df_features["Date de fin du contrat"]
-    ).dt.days
-    df_features["Ecart_restitution_jours"] = df_features["Ecart_restitution_jours"].fillna(0)
-
-    # 🔢 4. Encodage des prestations discriminantes
+    # Le DataFrame d'entrée n'est ni modifié ni copié : seules les colonnes calculées
+    # sont créées, puis assemblées avec les colonnes conservées dans df_model.
+
+    # 📅 1. Calcul de l'ancienneté du contrat (en mois, sur les numéros de mois entiers)
+    rapports_dates = {col: {} for col in COLONNES_DATES}
+    date_commande = convertir_dates(df["Date de Commande"], rapport=rapports_dates["Date de Commande"])
+    date_fin = convertir_dates(df["Date de fin du contrat"], rapport=rapports_dates["Date de fin du contrat"])
+
+    mois_commande, commande_renseignee = numeros_mois(date_commande)
+    mois_fin, fin_renseignee = numeros_mois(date_fin)
+    renseignees = commande_renseignee & fin_renseignee
+    ecart_mois = mois_fin - mois_commande
+
+    garder = renseignees & (ecart_mois >= 1) & (ecart_mois <= 120)
+    index = df.index[garder]
+    # Entier si toutes les dates sont renseignées, flottant sinon (comme avec .dt.year / .dt.month)
+    anciennete = ecart_mois[garder].astype(np.int32 if renseignees.all() else np.float64)
+
+    # 📦 2. Ecart restitution (en jours entiers, calculé en nanosecondes)
+    date_fin = date_fin.to_numpy()[garder]
+    date_restitution = convertir_dates(
+        df["Date de restitution"], rapport=rapports_dates["Date de restitution"]
+    ).to_numpy()[garder]
+    # Restitution absente ou antérieure à 2000 : date de fin retenue (écart nul)
+    restitution_invalide = np.isnat(date_restitution) | (date_restitution < np.datetime64("2000-01-01"))
+    fin_ns = date_fin.view(np.int64)
+    restitution_ns = np.where(restitution_invalide, fin_ns, date_restitution.view(np.int64))
+
+    calculees = {
+        "Anciennete_contrat": pd.Series(anciennete, index=index),
+        "Ecart_restitution_jours": pd.Series((restitution_ns - fin_ns) // NS_PAR_JOUR, index=index),
+    }
+
+    if chemin_rapport_dates:
+        ecrire_rapport_dates(rapports_dates, chemin_rapport_dates)
+
+    # 🔢 3. Encodage des prestations discriminantes
     for col in ["Gest. carburant", "Assurance", "Divers"]:
-        if col in df_features.columns:
-            df_features[col + "_bin"] = df_features[col].str.upper().map({"OUI": 1, "NON": 0})
+        if col in df.columns:
+            calculees[col + "_bin"] = df[col][garder].str.upper().map({"OUI": 1, "NON": 0})
 
-    # ✅ 5. Sélection des variables finales (avec traçabilité)
+    # ✅ 4. Sélection des variables finales (avec traçabilité)
     colonnes_finales = [
         "No du Contrat",                 # pour traçabilité uniquement
         "Non_renouvellement",   
@@ -58,6 +74,13 @@ def preparer_features(df: pd.DataFrame) -> pd.DataFrame:
         "Divers_bin"
     ]
 
-    df_model = df_features[[col for col in colonnes_finales if col in df_features.columns]].copy()
+    colonnes = {}
+    for col in colonnes_finales:
+        if col in calculees:
+            colonnes[col] = calculees[col]
+        elif col in df.columns:
+            colonnes[col] = df[col][garder]
+
+    df_model = pd.DataFrame(colonnes)
 
     return df_model
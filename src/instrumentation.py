@@ -0,0 +1,233 @@
+import contextvars
+import functools
+import inspect
+import json
+import os
+import threading
+import time
+import tracemalloc
+from collections import deque
+from contextlib import contextmanager
+
+import numpy as np
+import pandas as pd
+
+try:
+    import resource  # Unix seulement : mémoire résidente maximale du processus
+except ImportError:
+    resource = None
+
+# Instrumentation des étapes du pipeline (lecture Excel, features, chargement du modèle, scoring, export...) :
+# chaque étape décorée par @instrumenter enregistre temps réel, temps CPU, mémoire et nombre de lignes.
+# - les mesures sont ajoutées (une ligne JSON par étape) au fichier de trace TRACE_PATH
+# - les dernières mesures restent en mémoire pour le panneau "⏱ Performance" de l'application
+# - pic mémoire par étape (tracemalloc, plus coûteux) seulement avec LLD_TRACE_MEMOIRE=1 ;
+#   sinon, mémoire résidente maximale du processus en fin d'étape
+# - LLD_TRACE=0 désactive la trace, LLD_TRACE=<chemin> change de fichier
+# Profilage d'une exécution : LLD_PROFIL=<fichier .prof> (cProfile, voir demarrer_profil / profiler).
+# py-spy n'a pas besoin de point d'entrée : py-spy record -o profil.svg -- python main.py
+# (les fonctions décorées gardent leur nom, functools.wraps).
+
+TRACE_ENV = "LLD_TRACE"
+TRACE_MEMOIRE_ENV = "LLD_TRACE_MEMOIRE"
+PROFIL_ENV = "LLD_PROFIL"
+
+TRACE_PATH = "outputs/traces/etapes.jsonl"
+N_TRACES_MEMOIRE = 1000
+
+_TRACES = deque(maxlen=N_TRACES_MEMOIRE)
+_N_TRACES = 0  # nombre total de traces depuis le démarrage (repère pour traces_recentes)
+_VERROU = threading.Lock()
+_PILE = contextvars.ContextVar("pile_etapes", default=())
+
+
+def chemin_trace() -> str:
+    """
+    Fichier de trace (None si LLD_TRACE=0).
+    """
+    valeur = os.environ.get(TRACE_ENV, "")
+    if valeur == "0":
+        return None
+    return valeur if valeur not in ("", "1") else TRACE_PATH
+
+
+def _memoire_detaillee() -> bool:
+    return os.environ.get(TRACE_MEMOIRE_ENV) == "1"
+
+
+def _rss_max_mo() -> float:
+    if resource is None:
+        return None
+    # ru_maxrss : kilo-octets sous Linux
+    return round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1)
+
+
+def compter_lignes(valeur) -> int:
+    """
+    Nombre de lignes d'un résultat d'étape : DataFrame, Series, tableau, ou premier élément d'un tuple.
+    """
+    if isinstance(valeur, tuple) and valeur:
+        valeur = valeur[0]
+    if isinstance(valeur, (pd.DataFrame, pd.Series, np.ndarray)):
+        return len(valeur)
+    return None
+
+
+def _enregistrer(trace: dict):
+    global _N_TRACES
+    with _VERROU:
+        _TRACES.append(trace)
+        _N_TRACES += 1
+        chemin = chemin_trace()
+        if chemin:
+            os.makedirs(os.path.dirname(chemin) or ".", exist_ok=True)
+            with open(chemin, "a", encoding="utf-8") as f:
+                f.write(json.dumps(trace, ensure_ascii=False) + "\n")
+
+
+@contextmanager
+def etape(nom: str, lignes_entree: int = None):
+    """
+    Mesure le bloc de code comme une étape nommée. Le dict renvoyé peut recevoir "lignes_sortie".
+    Les étapes imbriquées (preparer_jeu_modele > preparer_features...) indiquent leur étape parente.
+    """
+    pile = _PILE.get()
+    jeton = _PILE.set(pile + (nom,))
+    mesure = {"lignes_sortie": None}
+
+    tracemalloc_actif = _memoire_detaillee()
+    if tracemalloc_actif:
+        if not tracemalloc.is_tracing():
+            tracemalloc.start()
+        memoire_debut = tracemalloc.get_traced_memory()[0]
+        tracemalloc.reset_peak()
+
+    horodatage = time.time()
+    debut, debut_cpu = time.perf_counter(), time.process_time()
+    try:
+        yield mesure
+    finally:
+        trace = {
+            "etape": nom,
+            "parent": pile[-1] if pile else None,
+            "debut": round(horodatage, 3),
+            "secondes": round(time.perf_counter() - debut, 4),
+            "secondes_cpu": round(time.process_time() - debut_cpu, 4),  # tous les threads du processus
+            "lignes_entree": lignes_entree,
+            "lignes_sortie": mesure["lignes_sortie"],
+            "rss_max_mo": _rss_max_mo(),
+            "pid": os.getpid(),
+            "thread": threading.current_thread().name,
+        }
+        if tracemalloc_actif and tracemalloc.is_tracing():
+            # Pic depuis le début de l'étape (une étape imbriquée remet le pic à zéro : approximation)
+            trace["pic_memoire_mo"] = round((tracemalloc.get_traced_memory()[1] - memoire_debut) / 1024 ** 2, 2)
+        _PILE.reset(jeton)
+        _enregistrer(trace)
+
+
+def instrumenter(nom: str = None):
+    """
+    Décorateur : mesure chaque appel de la fonction comme une étape (nom de la fonction par défaut).
+    Lignes en entrée : premier argument s'il s'agit d'un DataFrame ; lignes en sortie : résultat.
+    Générateur : l'étape couvre toute l'itération (jusqu'au dernier élément), lignes en sortie = éléments produits.
+    """
+    def decorateur(fonction):
+        nom_etape = nom or fonction.__name__
+
+        if inspect.isgeneratorfunction(fonction):
+            @functools.wraps(fonction)
+            def enveloppe_generateur(*args, **kwargs):
+                lignes_entree = compter_lignes(args[0]) if args else None
+                with etape(nom_etape, lignes_entree) as mesure:
+                    mesure["lignes_sortie"] = 0
+                    for element in fonction(*args, **kwargs):
+                        mesure["lignes_sortie"] += 1
+                        yield element
+
+            return enveloppe_generateur
+
+        @functools.wraps(fonction)
+        def enveloppe(*args, **kwargs):
+            lignes_entree = compter_lignes(args[0]) if args else None
+            with etape(nom_etape, lignes_entree) as mesure:
+                resultat = fonction(*args, **kwargs)
+                mesure["lignes_sortie"] = compter_lignes(resultat)
+            return resultat
+
+        return enveloppe
+    return decorateur
+
+
+def traces_recentes(depuis: int = 0) -> list:
+    """
+    Dernières traces en mémoire (au plus N_TRACES_MEMOIRE), à partir du repère depuis (voir repere_traces).
+    """
+    with _VERROU:
+        n_recentes = max(0, min(len(_TRACES), _N_TRACES - depuis))
+        return list(_TRACES)[len(_TRACES) - n_recentes:]
+
+
+def repere_traces() -> int:
+    """
+    Repère à passer à traces_recentes pour n'obtenir que les traces enregistrées après cet appel.
+    """
+    with _VERROU:
+        return _N_TRACES
+
+
+def resumer_traces(traces: list) -> pd.DataFrame:
+    """
+    Agrégat par étape : nombre d'appels, temps réel / CPU total et moyen, lignes traitées.
+    """
+    colonnes = ["etape", "appels", "secondes", "secondes_moyennes", "secondes_cpu", "lignes_entree"]
+    if not traces:
+        return pd.DataFrame(columns=colonnes)
+    df = pd.DataFrame(traces)
+    resume = df.groupby("etape", sort=False).agg(
+        appels=("secondes", "size"),
+        secondes=("secondes", "sum"),
+        secondes_moyennes=("secondes", "mean"),
+        secondes_cpu=("secondes_cpu", "sum"),
+        lignes_entree=("lignes_entree", "max"),
+    ).reset_index()
+    return resume.sort_values("secondes", ascending=False)[colonnes]
+
+
+def demarrer_profil(chemin: str = None):
+    """
+    Démarre un profil cProfile si chemin (ou LLD_PROFIL) est renseigné ; renvoie (profil, chemin) ou None.
+    """
+    chemin = chemin or os.environ.get(PROFIL_ENV)
+    if not chemin:
+        return None
+
+    import cProfile
+    profil = cProfile.Profile()
+    profil.enable()
+    return profil, chemin
+
+
+def arreter_profil(profil_demarre):
+    """
+    Arrête le profil de demarrer_profil et l'écrit au format .prof (snakeviz, pstats...).
+    """
+    if profil_demarre is None:
+        return
+    profil, chemin = profil_demarre
+    profil.disable()
+    os.makedirs(os.path.dirname(chemin) or ".", exist_ok=True)
+    profil.dump_stats(chemin)
+    print(f"🔬 Profil cProfile enregistré dans {chemin}")
+
+
+@contextmanager
+def profiler(chemin: str = None):
+    """
+    Profil cProfile du bloc de code (sans chemin ni LLD_PROFIL, le bloc s'exécute sans profilage).
+    """
+    profil_demarre = demarrer_profil(chemin)
+    try:
+        yield profil_demarre
+    finally:
+        arreter_profil(profil_demarre)
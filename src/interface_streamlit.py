@@ -0,0 +1,253 @@
+import os
+
+import pandas as pd
+import streamlit as st
+
+from src.cache_scores import obtenir_scores
+from src.comparaison_models import CANDIDATS_PAR_DEFAUT, comparer_modeles
+from src.Courbe_ROC import calculer_courbe_roc
+from src.eda import generer_figures_eda
+from src.instrumentation import instrumenter
+from src.training_xgboost import entrainer_modele_xgboost
+
+# Couche Streamlit de l'application : affichage uniquement, les calculs sont dans les modules du cœur
+# (src/eda.py, src/comparaison_models.py, src/Courbe_ROC.py, src/training_xgboost.py...), sans Streamlit.
+# matplotlib et seaborn ne sont importés qu'au premier graphique.
+
+
+def figures_eda(df, cache=None, empreinte: str = None) -> dict:
+    """
+    Images EDA de df (nom -> image en cache, propre à ces données), mémoïsées par empreinte des données :
+    les réexécutions Streamlit ne recalculent ni les empreintes des figures ni les copies.
+    Si une image a été évincée du cache disque entre-temps, les figures sont régénérées.
+    """
+    if cache is None or empreinte is None:
+        return generer_figures_eda(df)
+
+    cle = (empreinte, "figures_eda")
+    images = cache.obtenir_ou_calculer(cle, lambda: generer_figures_eda(df))
+    if not all(os.path.exists(chemin) for chemin in images.values()):
+        images = generer_figures_eda(df)
+        cache.ajouter(cle, images)
+    return images
+
+
+@instrumenter()
+def executer_eda_streamlit(df, cache=None, empreinte: str = None):
+    st.markdown("## 📊 Analyse exploratoire des données")
+
+    # Dimensions
+    st.subheader("📏 Statistiques générales")
+    st.write(f"*Dimensions :* {df.shape[0]} lignes × {df.shape[1]} colonnes")
+
+    # Types de données (affichage horizontal)
+    st.write("*Types de données :*")
+    types_df = pd.DataFrame(df.dtypes.astype(str), columns=["Type"]).T
+    st.dataframe(types_df)
+
+    # Valeurs manquantes
+    st.subheader("❓ Valeurs manquantes")
+    missing = df.isnull().sum().reset_index()
+    missing.columns = ["Colonne", "Valeurs manquantes"]
+    missing["Valeurs manquantes"] = missing["Valeurs manquantes"].astype(int)
+    st.dataframe(missing)
+
+    st.markdown("## 🧠 Analyse graphique")
+
+    # Figures du fichier chargé (redessinées seulement si les données ont changé)
+    with st.spinner("Génération des graphiques..."):
+        images = list(figures_eda(df, cache, empreinte).items())
+
+    # Affichage par blocs de 3 (seulement les figures générées pour ces données)
+    for i in range(0, len(images), 3):
+        cols = st.columns(3)
+        for j, (nom, fig_path) in enumerate(images[i:i + 3]):
+            with cols[j]:
+                st.image(fig_path, use_container_width=True, caption=nom.replace("_", " ").replace(".png", ""))
+
+
+def comparer_modeles_streamlit(df_modele, candidats: dict = None, n_workers: int = None):
+    """
+    Compare les performances de 3 modèles de classification et affiche les résultats dans Streamlit.
+    Les modèles sont entraînés en parallèle et le tableau se complète à chaque modèle terminé.
+
+    Args:
+        df_modele (pd.DataFrame): Données prétraitées avec les colonnes 'Non_renouvellement' et 'No du Contrat'.
+    """
+    candidats = candidats or CANDIDATS_PAR_DEFAUT
+
+    resultats = []
+    tableau = st.empty()
+
+    with st.spinner("Entraînement des modèles en parallèle..."):
+        for resultat, _ in comparer_modeles(df_modele, candidats, n_workers):
+            resultats.append(resultat)
+            tableau.dataframe(pd.DataFrame(resultats))
+
+    # 🔄 Créer DataFrame résultats (dans l'ordre des candidats)
+    ordre = {nom: i for i, nom in enumerate(candidats)}
+    df_resultats = pd.DataFrame(sorted(resultats, key=lambda r: ordre[r["Modèle"]]))
+    tableau.dataframe(df_resultats)
+
+    # 🔄 Réorganiser pour graphique
+    df_melted = df_resultats.melt(id_vars="Modèle", var_name="Métrique", value_name="Score")
+
+    # 🎨 Graphe Streamlit
+    import matplotlib.pyplot as plt
+    import seaborn as sns
+
+    fig, ax = plt.subplots(figsize=(10, 5))
+    sns.barplot(data=df_melted, x="Modèle", y="Score", hue="Métrique", ax=ax)
+    plt.ylim(0.5, 0.9)
+    plt.title("Comparaison dynamique des modèles")
+    plt.xlabel("")
+    plt.ylabel("Score")
+    plt.legend(title="Métrique")
+    st.pyplot(fig)
+
+
+@instrumenter()
+def afficher_courbe_roc(df_test: pd.DataFrame, model_path: str = "models/xgboost_model.joblib",
+                        cache=None, empreinte: str = None):
+    """
+    Courbe ROC du modèle sur df_test. Avec cache (CacheLRU) et empreinte des données,
+    les scores sont ceux partagés avec les onglets clients à risque (src/cache_scores.py).
+    """
+    if "Non_renouvellement" not in df_test.columns:
+        st.warning("❌ La colonne 'Non_renouvellement' est absente du jeu de données.")
+        return
+
+    y = df_test["Non_renouvellement"].to_numpy()
+
+    try:
+        # 🔮 Probabilités (calculées une fois par fichier et par version du modèle)
+        y_proba = obtenir_scores(df_test, model_path, cache, empreinte)
+    except FileNotFoundError:
+        st.error(f"❌ Modèle introuvable : {model_path}")
+        return
+    except ValueError as e:
+        st.error(f"❌ Erreur de prédiction : {e}")
+        return
+
+    # 📈 Calcul de la courbe ROC
+    fpr, tpr, roc_auc = calculer_courbe_roc(y, y_proba)
+
+    # 📊 Création du graphique
+    import matplotlib.pyplot as plt
+
+    fig, ax = plt.subplots(figsize=(5, 4))
+    ax.plot(fpr, tpr, label=f"AUC = {roc_auc:.2f}", linewidth=2)
+    ax.plot([0, 1], [0, 1], "--", label="Aléatoire", alpha=0.6)
+    ax.set_xlabel("Taux de faux positifs (FPR)")
+    ax.set_ylabel("Taux de vrais positifs (TPR)")
+    ax.set_title("Courbe ROC - Modèle XGBoost")
+    ax.legend(loc="lower right")
+    ax.grid(True)
+
+    # ✅ Affichage centré et réduit
+    col1, col2, col3 = st.columns([1, 2, 1])
+    with col2:
+        st.pyplot(fig)
+
+    # 🔎 Vue élargie en option
+    with st.expander("🔍 Agrandir la courbe ROC"):
+        st.pyplot(fig)
+
+
+def entrainer_xgboost(df_model: pd.DataFrame, optimiser: bool = False, **options_recherche):
+    """
+    Entraîne le modèle XGBoost (entrainer_modele_xgboost), puis affiche ses résultats.
+    Avec optimiser=True, les hyperparamètres sont d'abord choisis par validation croisée.
+    """
+    import matplotlib.pyplot as plt
+    import seaborn as sns
+
+    st.info("🚀 Entraînement du modèle XGBoost...")
+    message = "🔎 Recherche des hyperparamètres (validation croisée)..." if optimiser else "🧠 Entraînement..."
+    with st.spinner(message):
+        entrainement = entrainer_modele_xgboost(df_model, optimiser, **options_recherche)
+    cm = entrainement["matrice_confusion"]
+
+    if entrainement["recherche"] is not None:
+        st.write(
+            f"🏆 Meilleure configuration ({entrainement['recherche']['n_essais_termines']} essais) :",
+            entrainement["hyperparametres"]
+        )
+    if entrainement["reutilise"]:
+        st.info("♻️ Données et paramètres inchangés : modèle déjà entraîné réutilisé.")
+
+    # 📈 Affichage de la matrice
+    fig_cm, ax_cm = plt.subplots(figsize=(4, 3))
+    sns.heatmap(cm, annot=True, fmt="d", cmap="Blues", ax=ax_cm)
+    ax_cm.set_title("Matrice de confusion - XGBoost")
+    ax_cm.set_xlabel("Label prédit")
+    ax_cm.set_ylabel("Label réel")
+    plt.tight_layout()
+
+    os.makedirs("outputs/figures", exist_ok=True)
+    plt.savefig("outputs/figures/confusion_matrix_xgboost.png")
+    
+    col1, col2, col3 = st.columns([1, 2, 1])
+    with col2:
+        st.pyplot(fig_cm)
+
+    # ⬇ Bouton de téléchargement
+    with open("outputs/figures/confusion_matrix_xgboost.png", "rb") as f:
+        st.download_button(
+            label="📥 Télécharger la matrice de confusion",
+            data=f,
+            file_name="confusion_matrix_xgboost.png",
+            mime="image/png"
+        )
+
+    # 🔍 Résumé métier
+    total = cm.sum()
+    bonnes_predictions = cm[0][0] + cm[1][1]
+    erreurs = cm[0][1] + cm[1][0]
+    taux_bonnes_pred = bonnes_predictions / total
+    taux_erreurs = erreurs / total
+
+    st.markdown("### 🧾 Résumé des résultats")
+    st.markdown(
+        f"""
+        - ✅ *Bonnes prédictions* : {bonnes_predictions} contrats correctement identifiés comme renouvelés ou non renouvelés.
+        - ❌ *Erreurs de prédiction* : {erreurs} contrats mal prédits.
+        """
+    )
+
+    # 📘 Explication finale pour les équipes métier
+    st.markdown("---")
+    st.markdown(
+        f"""
+        <div style="font-size:16px; line-height:1.6;">
+        ℹ <strong>Sur un total de <u>{total}</u> contrats analysés</strong>, 
+        le modèle XGBoost a correctement prédit <strong>{bonnes_predictions}</strong> d'entre eux, 
+        soit un taux de bonne prédiction de <strong>{taux_bonnes_pred:.1%}</strong>.
+        <br>Il s'est trompé sur <strong>{erreurs}</strong> contrats.
+        <br><br>✅ Cela montre que le modèle est globalement performant, 
+        tout en laissant place à de futures améliorations.
+        </div>
+        """,
+        unsafe_allow_html=True
+    )
+
+    # 📊 Graphique circulaire
+    fig_pie, ax_pie = plt.subplots(figsize=(4, 4))
+    ax_pie.pie(
+        [bonnes_predictions, erreurs],
+        labels=["Bonnes prédictions", "Erreurs"],
+        autopct="%1.1f%%",
+        colors=["#4CAF50", "#F44336"],
+        startangle=90,
+        wedgeprops=dict(width=0.5)
+    )
+    ax_pie.axis("equal")
+
+    # 🎯 Titre et espacement centré
+    st.markdown("<div style='margin-top: 30px; text-align: center;'><h4>📊 Taux global de bonne prédiction</h4></div>", unsafe_allow_html=True)
+    col1, col2, col3 = st.columns([1, 2, 1])
+    with col2:
+        st.pyplot(fig_pie)
+
+    # ✅ Confirmation finale
+    st.success("✅ Modèle XGBoost entraîné avec succès")
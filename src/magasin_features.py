@@ -0,0 +1,90 @@
+import os
+
+import numpy as np
+import pandas as pd
+
+from src.features import preparer_features
+from src.instrumentation import instrumenter
+from src.preprocessing import empreintes_lignes
+
+# Magasin local des features par contrat (Parquet) :
+# chaque ligne de features est rangée sous ("No du Contrat", empreinte de la ligne brute éligible).
+# À l'extrait suivant, preparer_features ne tourne que sur les contrats nouveaux ou modifiés,
+# les lignes inchangées sont relues telles quelles.
+
+MAGASIN_PATH = "data/magasin_features"
+
+# Incrémenter si preparer_features change (les features stockées ne sont alors plus réutilisées)
+VERSION_FEATURES = "1"
+
+COLONNE_EMPREINTE = "_empreinte_ligne"
+
+# Lignes par groupe Parquet : les lectures par lots (src/entrainement_hors_memoire.py) ne décodent qu'un groupe à la fois
+TAILLE_GROUPE_PARQUET = 200_000
+
+
+def chemin_magasin(dossier: str = MAGASIN_PATH) -> str:
+    return os.path.join(dossier, f"features_v{VERSION_FEATURES}.parquet")
+
+
+def lire_features(colonnes: list = None, dossier: str = MAGASIN_PATH) -> pd.DataFrame:
+    """
+    Features stockées (dernier extrait traité), au format df_model.
+    colonnes : colonnes à lire (le Parquet ne lit que celles-ci), toutes par défaut.
+    Seul compare_models.py s'en sert : le scoring (application, predire_clients_a_risque_par_lots)
+    part du fichier fourni, dont les contrats ne sont pas forcément ceux du dernier extrait.
+    """
+    chemin = chemin_magasin(dossier)
+    if not os.path.exists(chemin):
+        raise FileNotFoundError(f"Magasin de features introuvable : {chemin}")
+
+    if colonnes is not None:
+        return pd.read_parquet(chemin, columns=list(colonnes))
+    return pd.read_parquet(chemin).drop(columns=[COLONNE_EMPREINTE])
+
+
+@instrumenter()
+def preparer_features_incremental(df: pd.DataFrame, dossier: str = MAGASIN_PATH, **options) -> pd.DataFrame:
+    """
+    Équivalent de preparer_features(df, **options) en réutilisant le magasin :
+    - lignes déjà vues à l'identique (même contrat, même contenu) : features relues
+    - lignes nouvelles ou modifiées : preparer_features sur ces lignes seulement
+    Le magasin est ensuite remplacé par les features de cet extrait.
+
+    Returns:
+        df_model (mêmes lignes, même ordre et même index que preparer_features(df))
+    """
+    chemin = chemin_magasin(dossier)
+    empreintes = empreintes_lignes(df)
+
+    # 🔎 Lignes déjà présentes dans le magasin (clé : contrat + empreinte)
+    connues = np.zeros(len(df), dtype=bool)
+    reprises = None
+    if os.path.exists(chemin):
+        stock = pd.read_parquet(chemin)
+        # L'empreinte couvre toute la ligne (numéro de contrat compris) : index de hachage sur l'empreinte,
+        # puis contrôle du numéro de contrat sur les lignes trouvées
+        stock = stock[~stock[COLONNE_EMPREINTE].duplicated()]  # lignes brutes identiques après normalisation
+        positions = pd.Index(stock[COLONNE_EMPREINTE].to_numpy()).get_indexer(empreintes)
+        connues = positions >= 0
+        connues[connues] = (
+            stock["No du Contrat"].to_numpy()[positions[connues]] == df["No du Contrat"].to_numpy()[connues]
+        )
+        reprises = stock.iloc[positions[connues]].drop(columns=[COLONNE_EMPREINTE])
+        reprises.index = df.index[connues]
+
+    # 🧠 Features des seules lignes nouvelles ou modifiées
+    nouvelles = preparer_features(df[~connues], **options)
+
+    df_model = pd.concat([partie for partie in (reprises, nouvelles) if partie is not None])
+    df_model = df_model.iloc[np.argsort(df.index.get_indexer(df_model.index), kind="stable")]
+
+    # 💾 Magasin = features de l'extrait courant (écriture atomique)
+    os.makedirs(dossier, exist_ok=True)
+    stock = df_model.assign(**{COLONNE_EMPREINTE: empreintes[df.index.get_indexer(df_model.index)]})
+    chemin_tmp = f"{chemin}.{os.getpid()}.tmp"
+    stock.reset_index(drop=True).to_parquet(chemin_tmp, index=False, row_group_size=TAILLE_GROUPE_PARQUET)
+    os.replace(chemin_tmp, chemin)
+
+    print(f"♻️ Magasin de features : {int(connues.sum())} lignes réutilisées, {int((~connues).sum())} recalculées")
+    return df_model
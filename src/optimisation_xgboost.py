@@ -0,0 +1,242 @@
+import json
+import math
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import joblib
+import numpy as np
+import pandas as pd
+from sklearn.metrics import f1_score, precision_score, recall_score, roc_auc_score
+from sklearn.model_selection import StratifiedKFold, train_test_split
+from xgboost import XGBClassifier
+from xgboost.callback import TrainingCallback
+
+from src.arbres_numpy import exporter_arbres
+
+# Recherche d'hyperparamètres XGBoost :
+# - validation croisée stratifiée (K plis) sur la partie entraînement du split 80/20 habituel
+# - tree_method="hist" + early stopping sur le pli de validation : les mauvaises configurations s'arrêtent tôt
+# - recherche aléatoire ou par réductions successives (successive halving), en parallèle sur les cœurs
+# - budget configurable : nombre d'essais et durée maximale
+
+MODELS_PATH = "models"
+N_ESTIMATORS_MAX = 1000
+ARRET_PRECOCE = 30
+
+# 🎲 Espace de recherche : liste = choix discret, tuple = intervalle (log si "log")
+ESPACE_RECHERCHE = {
+    "max_depth": [3, 4, 5, 6, 8],
+    "learning_rate": (0.02, 0.3, "log"),
+    "min_child_weight": [1, 2, 5, 10],
+    "subsample": (0.6, 1.0),
+    "colsample_bytree": (0.6, 1.0),
+    "reg_lambda": (0.1, 10.0, "log"),
+}
+
+METRIQUES = {
+    "roc_auc": lambda y, proba: roc_auc_score(y, proba),
+    "f1": lambda y, proba: f1_score(y, proba > 0.5),
+    "recall": lambda y, proba: recall_score(y, proba > 0.5),
+}
+
+
+def tirer_configuration(rng: np.random.Generator, espace: dict = ESPACE_RECHERCHE) -> dict:
+    """
+    Tire une configuration au hasard dans l'espace de recherche.
+    """
+    config = {}
+    for nom, domaine in espace.items():
+        if isinstance(domaine, list):
+            config[nom] = domaine[rng.integers(len(domaine))]
+        elif len(domaine) == 3 and domaine[2] == "log":
+            config[nom] = float(math.exp(rng.uniform(math.log(domaine[0]), math.log(domaine[1]))))
+        else:
+            config[nom] = float(rng.uniform(domaine[0], domaine[1]))
+    return config
+
+
+class _ArretEcheance(TrainingCallback):
+    """
+    Arrête l'entraînement XGBoost en cours dès que l'échéance (time.time()) est dépassée.
+    """
+
+    def __init__(self, echeance: float):
+        super().__init__()
+        self.echeance = echeance
+
+    def after_iteration(self, model, epoch, evals_log) -> bool:
+        return time.time() >= self.echeance
+
+
+def _evaluer_configuration(config: dict, X: pd.DataFrame, y: pd.Series, plis: list,
+                           n_estimators: int, metrique: str, n_threads: int, fin_budget: float = None) -> dict:
+    """
+    Score moyen d'une configuration en validation croisée (exécuté dans un processus de calcul).
+    fin_budget (time.time(), commun à tous les processus) : l'essai s'interrompt de lui-même une fois
+    l'échéance passée (avant chaque pli et à chaque itération de boosting) et renvoie None.
+    """
+    def budget_ecoule() -> bool:
+        return fin_budget is not None and time.time() >= fin_budget
+
+    scores, iterations = [], []
+    for index_train, index_valid in plis:
+        if budget_ecoule():
+            return None
+        modele = XGBClassifier(
+            **config,
+            n_estimators=n_estimators,
+            tree_method="hist",
+            objective="binary:logistic",
+            eval_metric="logloss",
+            early_stopping_rounds=ARRET_PRECOCE,
+            random_state=42,
+            n_jobs=n_threads,
+            callbacks=[_ArretEcheance(fin_budget)] if fin_budget is not None else None
+        )
+        X_valid, y_valid = X.iloc[index_valid], y.iloc[index_valid]
+        modele.fit(X.iloc[index_train], y.iloc[index_train], eval_set=[(X_valid, y_valid)], verbose=False)
+        if budget_ecoule():
+            return None  # pli interrompu : essai incomplet
+
+        scores.append(METRIQUES[metrique](y_valid, modele.predict_proba(X_valid)[:, 1]))
+        iterations.append(modele.best_iteration + 1)
+
+    return {
+        "configuration": config,
+        "n_estimators_max": n_estimators,
+        "score_moyen": float(np.mean(scores)),
+        "score_ecart_type": float(np.std(scores)),
+        "n_estimators": int(np.median(iterations)),
+    }
+
+
+def _evaluer_en_parallele(configs: list, X, y, plis, n_estimators, metrique, n_workers, fin_budget) -> list:
+    """
+    Évalue une liste de configurations sur n_workers processus.
+    Une fois le budget de temps écoulé (fin_budget, time.time()), les essais en cours s'arrêtent d'eux-mêmes
+    à l'itération de boosting suivante et ceux pas encore commencés se terminent aussitôt :
+    seuls les essais complets sont renvoyés.
+    """
+    n_coeurs = os.cpu_count() or 1
+    n_workers = max(1, min(n_workers or n_coeurs, len(configs), n_coeurs))
+    n_threads = max(1, n_coeurs // n_workers)
+
+    if n_workers == 1:
+        resultats = [
+            _evaluer_configuration(config, X, y, plis, n_estimators, metrique, n_threads, fin_budget)
+            for config in configs
+        ]
+    else:
+        with ProcessPoolExecutor(max_workers=n_workers) as pool:
+            futures = [
+                pool.submit(_evaluer_configuration, config, X, y, plis, n_estimators, metrique, n_threads, fin_budget)
+                for config in configs
+            ]
+            resultats = [future.result() for future in as_completed(futures)]
+
+    return [resultat for resultat in resultats if resultat is not None]
+
+
+def rechercher_hyperparametres(df_model: pd.DataFrame, n_essais: int = 20, n_plis: int = 5,
+                               methode: str = "aleatoire", budget_secondes: float = None,
+                               metrique: str = "roc_auc", n_workers: int = None, graine: int = 42,
+                               dossier_modeles: str = MODELS_PATH) -> dict:
+    """
+    Recherche les hyperparamètres XGBoost puis entraîne et sauvegarde le meilleur modèle.
+
+    Args:
+        n_essais : nombre de configurations tirées
+        n_plis : nombre de plis de la validation croisée stratifiée
+        methode : "aleatoire" ou "halving" (réductions successives : toutes les configurations
+                  démarrent avec peu d'arbres, seul le meilleur tiers continue avec 3x plus d'arbres)
+        budget_secondes : durée maximale de la recherche (None = pas de limite)
+        metrique : "roc_auc", "f1" ou "recall"
+
+    Returns:
+        Rapport de recherche (aussi écrit dans models/recherche_xgboost.json) ;
+        le meilleur modèle est sauvegardé dans models/xgboost_model_optimise.joblib (clé "chemin_modele")
+    """
+    if methode not in ("aleatoire", "halving"):
+        raise ValueError(f"Méthode de recherche inconnue : {methode}")
+    if metrique not in METRIQUES:
+        raise ValueError(f"Métrique inconnue : {metrique}")
+
+    debut = time.monotonic()
+    fin_budget = None if budget_secondes is None else time.time() + budget_secondes  # horloge commune aux processus
+
+    # 🔀 Même séparation que entrainer_xgboost : la recherche ne voit pas le jeu de test
+    X = df_model.drop(columns=["No du Contrat", "Non_renouvellement"], errors="ignore")
+    y = df_model["Non_renouvellement"]
+    X_train, X_test, y_train, y_test = train_test_split(
+        X, y, test_size=0.2, stratify=y, random_state=42
+    )
+    plis = list(StratifiedKFold(n_splits=n_plis, shuffle=True, random_state=graine).split(X_train, y_train))
+
+    rng = np.random.default_rng(graine)
+    configs = [tirer_configuration(rng) for _ in range(n_essais)]
+    essais = []
+
+    if methode == "aleatoire":
+        essais = _evaluer_en_parallele(configs, X_train, y_train, plis, N_ESTIMATORS_MAX, metrique, n_workers, fin_budget)
+    else:
+        # 🪜 Réductions successives : budget d'arbres x3 et 1/3 des configurations à chaque palier
+        facteur = 3
+        n_paliers = max(1, int(math.log(max(n_essais, 1), facteur)) + 1)
+        n_estimators = max(ARRET_PRECOCE * 2, N_ESTIMATORS_MAX // facteur ** (n_paliers - 1))
+        while configs:
+            palier = _evaluer_en_parallele(configs, X_train, y_train, plis, n_estimators, metrique, n_workers, fin_budget)
+            essais.extend(palier)
+            if len(palier) <= 1 or n_estimators >= N_ESTIMATORS_MAX or (fin_budget is not None and time.time() >= fin_budget):
+                break
+            palier.sort(key=lambda essai: essai["score_moyen"], reverse=True)
+            configs = [essai["configuration"] for essai in palier[:max(1, len(palier) // facteur)]]
+            n_estimators = min(N_ESTIMATORS_MAX, n_estimators * facteur)
+
+    if not essais:
+        raise RuntimeError("Aucun essai terminé dans le budget de temps imparti.")
+
+    # 🏆 Meilleur essai (à budget d'arbres le plus élevé en cas de réductions successives)
+    meilleur = max(essais, key=lambda essai: (essai["n_estimators_max"], essai["score_moyen"]))
+
+    # 🧠 Modèle final : meilleure configuration, nombre d'arbres issu de l'early stopping
+    modele = XGBClassifier(
+        **meilleur["configuration"],
+        n_estimators=meilleur["n_estimators"],
+        tree_method="hist",
+        objective="binary:logistic",
+        eval_metric="logloss",
+        random_state=42
+    )
+    modele.fit(X_train, y_train)
+    modele.get_booster().feature_names = list(X.columns)
+
+    proba = modele.predict_proba(X_test)[:, 1]
+    y_pred = (proba > 0.5).astype(int)
+
+    rapport = {
+        "methode": methode,
+        "metrique": metrique,
+        "n_plis": n_plis,
+        "n_essais_termines": len(essais),
+        "duree_secondes": round(time.monotonic() - debut, 1),
+        "meilleure_configuration": {**meilleur["configuration"], "n_estimators": meilleur["n_estimators"]},
+        "score_validation_croisee": meilleur["score_moyen"],
+        "scores_test": {
+            "roc_auc": round(roc_auc_score(y_test, proba), 4),
+            "f1": round(f1_score(y_test, y_pred), 4),
+            "recall": round(recall_score(y_test, y_pred), 4),
+            "precision": round(precision_score(y_test, y_pred), 4),
+        },
+        "chemin_modele": os.path.join(dossier_modeles, "xgboost_model_optimise.joblib"),
+        "essais": sorted(essais, key=lambda essai: (essai["n_estimators_max"], essai["score_moyen"]), reverse=True),
+    }
+
+    # 💾 Sauvegarde du modèle et du rapport de recherche
+    os.makedirs(dossier_modeles, exist_ok=True)
+    joblib.dump(modele, rapport["chemin_modele"])
+    exporter_arbres(rapport["chemin_modele"])  # tables NumPy du modèle optimisé (src/arbres_numpy.py)
+    with open(os.path.join(dossier_modeles, "recherche_xgboost.json"), "w", encoding="utf-8") as f:
+        json.dump(rapport, f, ensure_ascii=False, indent=2)
+
+    return rapport
@@ -0,0 +1,74 @@
+import numpy as np
+import pandas as pd
+
+from src.features import preparer_features
+from src.instrumentation import instrumenter
+from src.magasin_features import preparer_features_incremental
+from src.schema import compacter_types, ecrire_rapport_memoire
+
+# Pipeline fusionné : nettoyage + filtrage + variable cible + features
+# Produit les mêmes sorties que l'enchaînement
+#   nettoyer_donnees -> filtrer_contrats_eligibles -> ajouter_variable_cible -> preparer_features
+# mais avec une seule copie du DataFrame (les lignes éligibles) au lieu d'une copie par étape.
+
+@instrumenter()
+def preparer_jeu_modele(df: pd.DataFrame, compacter: bool = True, chemin_rapport_memoire: str = None,
+                        magasin: str = None, chemin_rapport_dates: str = None):
+    """
+    Enchaîne en une passe les étapes de préparation :
+    - Doublons exacts et lignes vides écartés par masque booléen (sans copie)
+    - "Nouveau Client" et "Type Commande" normalisés une seule fois
+    - Filtre métier appliqué par masque, une seule extraction des lignes éligibles
+    - Variable cible 'Non_renouvellement' calculée de façon vectorisée
+    - Types compacts (src/schema.py) si compacter ; rapport mémoire avant / après écrit dans
+      chemin_rapport_memoire s'il est renseigné (main.py seulement)
+    - Avec magasin (dossier du magasin de features), seuls les contrats nouveaux ou modifiés
+      passent par preparer_features (src/magasin_features.py)
+    - Rapport de conversion des dates écrit dans chemin_rapport_dates s'il est renseigné
+      (avec magasin : dates des seuls contrats recalculés)
+
+    Returns:
+        df_final : contrats éligibles avec la variable cible (sortie de ajouter_variable_cible)
+        df_model : variables explicatives (sortie de preparer_features)
+    """
+    noms_colonnes = [col.strip() for col in df.columns]
+    position = {nom: i for i, nom in enumerate(noms_colonnes)}
+
+    if "Type Commande" not in position:
+        raise ValueError("La colonne 'Type Commande' est introuvable.")
+
+    # 🧼 1. Doublons exacts et lignes entièrement vides
+    garder = (~df.duplicated() & df.notna().any(axis=1)).to_numpy()
+
+    # 🔤 2. Normalisation unique des colonnes texte (sur les lignes conservées)
+    nouveau_client = df.iloc[garder, position["Nouveau Client"]].astype(str).str.strip().str.upper().to_numpy()
+    type_commande = df.iloc[garder, position["Type Commande"]].astype(str).str.strip().str.lower().to_numpy()
+
+    # 🔍 3. Filtre métier
+    eligibles = (nouveau_client == "NON") & (type_commande != "nouvelle commande")
+    lignes = np.flatnonzero(garder)[eligibles]
+
+    # 📋 4. Seule copie : les lignes éligibles
+    df_final = df.take(lignes)
+    df_final.columns = noms_colonnes
+    df_final["Nouveau Client"] = nouveau_client[eligibles]
+    df_final["Type Commande"] = type_commande[eligibles]
+
+    # 🎯 5. Variable cible
+    df_final["Non_renouvellement"] = (type_commande[eligibles] != "renouvellement").astype("int64")
+
+    # 🧠 6. Features (recalculées seulement pour les contrats nouveaux ou modifiés si magasin)
+    if magasin:
+        df_model = preparer_features_incremental(df_final, magasin, chemin_rapport_dates=chemin_rapport_dates)
+    else:
+        df_model = preparer_features(df_final, chemin_rapport_dates)
+
+    # 🗜 7. Types compacts (int8 / float32 / catégories)
+    if compacter:
+        rapports = {"df_final": {}, "df_model": {}}
+        df_final = compacter_types(df_final, rapport=rapports["df_final"])
+        df_model = compacter_types(df_model, rapport=rapports["df_model"])
+        if chemin_rapport_memoire:
+            ecrire_rapport_memoire(rapports, chemin_rapport_memoire)
+
+    return df_final, df_model
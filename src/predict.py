@@ -1,13 +1,121 @@
+import json
+import threading
+
 import pandas as pd
-import joblib
 import numpy as np
 
-def predire_clients_a_risque(df: pd.DataFrame, model_path: str = "models/xgboost_model.joblib"):
+from src.instrumentation import instrumenter
+from src.registre_modeles import charger_modele
+
+# Colonnes du DataFrame qui ne sont jamais passées au modèle : les mêmes qu'à l'entraînement
+# (src/training_xgboost.py), toutes les autres features (dont 'flag_actif') gardent leurs valeurs réelles.
+# Les features absentes du DataFrame valent 0, comme dans la préparation historique de X.
+COLONNES_NON_FEATURES = ["No du Contrat", "Non_renouvellement"]
+
+# Le booster est partagé (registre des modèles) : le réglage du nombre de threads et la prédiction sont sérialisés
+_VERROU_PREDICTION = threading.Lock()
+
+
+def construire_matrice_features(df: pd.DataFrame, features: list, colonnes_exclues: list = COLONNES_NON_FEATURES) -> np.ndarray:
+    """
+    Construit en une passe la matrice float32 contiguë attendue par le booster :
+    - colonnes dans l'ordre de features
+    - features absentes du DataFrame (ou exclues) remplies avec 0
+    """
+    X = np.zeros((len(df), len(features)), dtype=np.float32)
+    for j, col in enumerate(features):
+        if col in df.columns and col not in colonnes_exclues:
+            X[:, j] = df[col].to_numpy(dtype=np.float32, na_value=np.nan)
+    return X
+
+
+@instrumenter()
+def scorer_contrats(df: pd.DataFrame, model_path: str = "models/xgboost_model.joblib", n_threads: int = None,
+                    colonnes_exclues: list = COLONNES_NON_FEATURES) -> np.ndarray:
+    """
+    Score de risque (probabilité de non-renouvellement) de chaque ligne de df,
+    en un seul passage dans le booster (inplace_predict, sans DMatrix ni DataFrame intermédiaire).
+
+    Args:
+        n_threads : nombre de threads XGBoost (None = réglage du modèle)
+        colonnes_exclues : colonnes de df remplacées par 0 dans la matrice de features
+    """
+    model = charger_modele(model_path)
+    booster = model.get_booster()
+    X = construire_matrice_features(df, booster.feature_names, colonnes_exclues)
+
+    # Même nombre d'arbres que predict_proba (early stopping éventuel)
+    iteration_range = (0, model.best_iteration + 1) if hasattr(model, "best_iteration") else (0, 0)
+
+    with _VERROU_PREDICTION:
+        if n_threads is None:
+            return booster.inplace_predict(X, iteration_range=iteration_range)
+
+        # Booster partagé (registre) : réglage du modèle rétabli après la prédiction
+        nthread_modele = json.loads(booster.save_config())["learner"]["generic_param"]["nthread"]
+        booster.set_param({"nthread": n_threads})
+        try:
+            return booster.inplace_predict(X, iteration_range=iteration_range)
+        finally:
+            booster.set_param({"nthread": nthread_modele})
+
+
+def selectionner_top_k(df: pd.DataFrame, k: int = 50, colonne_score: str = "score_risque",
+                       colonne_id: str = "No du Contrat", id_croissant: bool = True) -> pd.DataFrame:
+    """
+    Les k lignes de plus haut score, sans trier tout le DataFrame :
+    - présélection en O(n) par np.argpartition (k-ième score), tri des seuls candidats
+    - ex-aequo départagés par colonne_id (ordre croissant par défaut), scores manquants en dernier
+    Le résultat est fusionnable : le top k de plusieurs top k partiels (lots, processus)
+    est le top k de l'ensemble (voir fusionner_top_k).
+    """
+    if k <= 0 or df.empty:
+        return df.iloc[:0]
+
+    if len(df) > k:
+        scores = df[colonne_score].to_numpy(dtype=np.float64, na_value=-np.inf)
+        position_kieme = len(scores) - k
+        kieme_score = scores[np.argpartition(scores, position_kieme)[position_kieme]]
+        df = df[scores >= kieme_score]  # garde tous les ex-aequo du k-ième score
+
+    colonnes_tri, ordre = [colonne_score], [False]
+    if colonne_id in df.columns:
+        colonnes_tri.append(colonne_id)
+        ordre.append(id_croissant)
+
+    def cle_tri(serie: pd.Series) -> pd.Series:
+        # Identifiants en catégorie (schéma compact) : comparaison sur leurs valeurs
+        if serie.name == colonne_id and isinstance(serie.dtype, pd.CategoricalDtype):
+            serie = serie.astype(serie.cat.categories.dtype)
+        # Identifiants de types mixtes (texte / nombre) : comparaison sur leur représentation texte
+        if serie.name == colonne_id and serie.dtype == object:
+            return serie.astype(str)
+        return serie
+
+    return df.sort_values(colonnes_tri, ascending=ordre, kind="mergesort", na_position="last", key=cle_tri).head(k)
+
+
+def fusionner_top_k(*parties: pd.DataFrame, k: int = 50, colonne_score: str = "score_risque",
+                    colonne_id: str = "No du Contrat", id_croissant: bool = True) -> pd.DataFrame:
+    """
+    Fusionne des top k partiels (calculés par lot ou par processus) en un top k global.
+    """
+    parties = [partie for partie in parties if partie is not None]
+    if not parties:
+        return pd.DataFrame()
+    return selectionner_top_k(pd.concat(parties), k, colonne_score, colonne_id, id_croissant)
+
+
+@instrumenter()
+def predire_clients_a_risque(df: pd.DataFrame, model_path: str = "models/xgboost_model.joblib",
+                             seuil: float = 0.5, n_threads: int = None, k: int = 50, scores: np.ndarray = None):
     """
     Prédiction des contrats actifs à risque (non-renouvelés) via le modèle XGBoost.
+    Un contrat est prédit non-renouvelé si son score dépasse seuil (0.5 = predict() du modèle).
+    scores : scores déjà calculés pour toutes les lignes de df (src/cache_scores.py), sinon calculés ici.
     Retourne :
         - df_risque : Tous les contrats prédits comme non-renouvelés
-        - df_top_50 : Les 50 clients à plus haut risque (score)
+        - df_top_50 : Les k (50 par défaut) clients à plus haut risque (score)
     """
 
     # 🛑 Vérifier la colonne "flag_actif"
@@ -15,31 +123,41 @@ def predire_clients_a_risque(df: pd.DataFrame, model_path: str = "models/xgboost
         raise ValueError("La colonne 'flag_actif' est manquante dans le DataFrame.")
 
     # 🔍 1. Filtrer les contrats actifs
-    df_actifs = df[df["flag_actif"] == 1].copy()
+    actifs = (df["flag_actif"] == 1).to_numpy()
+    df_actifs = df[actifs].copy()
 
-    # 🧠 2. Charger le modèle
-    model = joblib.load(model_path)
+    # 🔮 2. Score de risque (un seul passage dans le modèle, ou scores fournis)
+    if scores is None:
+        score = scorer_contrats(df_actifs, model_path, n_threads=n_threads)
+    else:
+        score = np.asarray(scores)[actifs]
+    df_actifs["Prediction"] = (score > seuil).astype(np.int64)
+    df_actifs["score_risque"] = score
 
-    # 📋 3. Définir les features attendues par le modèle
-    expected_features = model.get_booster().feature_names
+    # 🎯 3. Sélection des clients à risque
+    df_risque = df_actifs[df_actifs["Prediction"] == 1].copy()
+    df_top_50 = selectionner_top_k(df_risque, k)
 
-    # 🧼 4. Préparer X (et ajouter les colonnes manquantes si besoin)
-    X = df_actifs.drop(columns=["No du Contrat", "Non_renouvellement", "flag_actif"], errors="ignore").copy()
+    return df_risque, df_top_50
 
-    # Ajouter colonnes manquantes
-    for col in expected_features:
-        if col not in X.columns:
-            X[col] = 0  # ou np.nan selon ton choix
 
-    # Réordonner les colonnes dans l'ordre attendu
-    X = X[expected_features]
+def predire_clients_a_risque_par_lots(lots, model_path: str = "models/xgboost_model.joblib",
+                                      seuil: float = 0.5, n_threads: int = None, k: int = 50):
+    """
+    Version par lots de predire_clients_a_risque (portefeuilles trop gros pour un seul passage) :
+    - lots : itérable de DataFrames au format df_model
+    - chaque lot est scoré indépendamment, le top k est maintenu au fil des lots
+    Retourne (df_risque, df_top_k) comme predire_clients_a_risque.
+    """
+    parties_risque = []
+    df_top_k = None
 
-    # 🔮 5. Prédictions
-    df_actifs["Prediction"] = model.predict(X)
-    df_actifs["score_risque"] = model.predict_proba(X)[:, 1]
+    for lot in lots:
+        df_risque_lot, df_top_lot = predire_clients_a_risque(lot, model_path, seuil, n_threads, k)
+        parties_risque.append(df_risque_lot)
+        df_top_k = fusionner_top_k(df_top_k, df_top_lot, k=k)
 
-    # 🎯 6. Sélection des clients à risque
-    df_risque = df_actifs[df_actifs["Prediction"] == 1].copy()
-    df_top_50 = df_risque.sort_values("score_risque", ascending=False).head(50)
+    if not parties_risque:
+        raise ValueError("Aucun lot de contrats à scorer.")
 
-    return df_risque, df_top_50
\ No newline at end of file
+    return pd.concat(parties_risque), df_top_k
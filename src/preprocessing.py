@@ -1,14 +1,24 @@
+import numpy as np
 import pandas as pd
 
+from src.cache_excel import charger_excel_avec_cache
+from src.instrumentation import instrumenter
+
 # Anonymisation des données
-def charger_donnees_anonymisees(fichier: str) -> pd.DataFrame:
+@instrumenter()
+def charger_donnees_anonymisees(fichier: str, utiliser_cache: bool = True) -> pd.DataFrame:
     """
     Charge les données anonymisées depuis un fichier Excel.
+    Par défaut, passe par le cache Parquet (src/cache_excel.py) : un classeur
+    déjà lu n'est plus re-parsé tant que son contenu ne change pas.
     """
+    if utiliser_cache:
+        return charger_excel_avec_cache(fichier)
     return pd.read_excel(fichier)
 
 # Nettoyage des données
 # Applique les premières étapes de nettoyage : suppression des doublons, lignes vides, nettoyage des noms de colonnes,
+@instrumenter()
 def nettoyer_donnees(df: pd.DataFrame) -> pd.DataFrame:
     """
     Applique les premières étapes de nettoyage :
@@ -41,6 +51,7 @@ def nettoyer_donnees(df: pd.DataFrame) -> pd.DataFrame:
 ## - Exclut les nouvelles commandes
 # Cette étape est cruciale pour s'assurer que seuls les contrats pertinents sont analysés   
 
+@instrumenter()
 def filtrer_contrats_eligibles(df: pd.DataFrame) -> pd.DataFrame:
     """
     Filtre les contrats pertinents pour la prédiction du non-renouvellement :
@@ -71,6 +82,7 @@ def filtrer_contrats_eligibles(df: pd.DataFrame) -> pd.DataFrame:
 # - 0 si Type Commande = renouvellement
 # - 1 sinon (extension de parc ou autre)
 
+@instrumenter()
 def ajouter_variable_cible(df: pd.DataFrame) -> pd.DataFrame:
     """
     Crée une colonne 'Non_renouvellement' :
@@ -81,10 +93,104 @@ def ajouter_variable_cible(df: pd.DataFrame) -> pd.DataFrame:
 
     if "Type Commande" in df_copy.columns:
         type_commande = df_copy["Type Commande"].astype(str).str.strip().str.lower()
-        df_copy["Non_renouvellement"] = type_commande.apply(
-            lambda x: 0 if x == "renouvellement" else 1
-        )
+        df_copy["Non_renouvellement"] = (type_commande != "renouvellement").astype(int)
     else:
         raise ValueError("La colonne 'Type Commande' est introuvable.")
 
     return df_copy
+
+
+# Lecture par lots pour les très gros extraits
+# Le classeur est parcouru en lecture seule (openpyxl) par blocs de lignes :
+# chaque bloc est nettoyé et filtré avant la lecture du suivant, seules les lignes éligibles sont conservées.
+
+def _convertir_lot(lignes: list, colonnes: list) -> pd.DataFrame:
+    """
+    Construit un DataFrame à partir d'un bloc de lignes openpyxl, avec les mêmes conventions que pd.read_excel :
+    - cellules vides -> NaN (et non None) dans les colonnes texte
+    - colonnes de flottants entiers sans valeur manquante -> int64
+    """
+    lot = pd.DataFrame.from_records(lignes, columns=colonnes)
+
+    for col in lot.columns:
+        serie = lot[col]
+        if serie.dtype == object:
+            if serie.isna().any():
+                lot[col] = serie.where(serie.notna(), np.nan)
+        elif serie.dtype == "float64" and np.isfinite(serie).all():
+            if (serie == np.floor(serie)).all():
+                lot[col] = serie.astype("int64")
+
+    return lot
+
+
+def lire_excel_par_lots(fichier, taille_lot: int = 50_000):
+    """
+    Lit la première feuille d'un classeur Excel par blocs de taille_lot lignes (générateur de DataFrames).
+    La mémoire utilisée dépend de taille_lot et non de la taille du fichier.
+    """
+    from openpyxl import load_workbook
+
+    if hasattr(fichier, "seek"):
+        fichier.seek(0)
+    classeur = load_workbook(fichier, read_only=True, data_only=True)
+
+    try:
+        lignes = classeur.worksheets[0].iter_rows(values_only=True)
+        entete = next(lignes, None)
+        if entete is None:
+            raise ValueError("Le classeur Excel est vide.")
+
+        colonnes = [col if col is not None else f"Unnamed: {i}" for i, col in enumerate(entete)]
+        n_colonnes = len(colonnes)
+
+        bloc = []
+        n_lots = 0
+        for ligne in lignes:
+            bloc.append(ligne[:n_colonnes])
+            if len(bloc) >= taille_lot:
+                yield _convertir_lot(bloc, colonnes)
+                n_lots += 1
+                bloc = []
+        if bloc or n_lots == 0:
+            yield _convertir_lot(bloc, colonnes)
+    finally:
+        classeur.close()
+
+
+def empreintes_lignes(df: pd.DataFrame) -> np.ndarray:
+    """
+    Empreinte (uint64) de chaque ligne, insensible à int/float d'un bloc à l'autre.
+    """
+    colonnes_entieres = [col for col in df.columns if pd.api.types.is_integer_dtype(df[col]) or pd.api.types.is_bool_dtype(df[col])]
+    if colonnes_entieres:
+        df = df.astype({col: "float64" for col in colonnes_entieres})
+    return pd.util.hash_pandas_object(df, index=False).to_numpy()
+
+
+@instrumenter()
+def charger_contrats_eligibles_par_lots(fichier, taille_lot: int = 50_000) -> pd.DataFrame:
+    """
+    Mode streaming de l'ingestion : lit le classeur par blocs, applique nettoyer_donnees
+    puis filtrer_contrats_eligibles à chaque bloc et ne garde que les lignes éligibles.
+    Les doublons exacts répartis sur plusieurs blocs sont supprimés via une empreinte des lignes brutes.
+    Renvoie le même résultat que filtrer_contrats_eligibles(nettoyer_donnees(pd.read_excel(fichier))).
+    """
+    lots_eligibles = []
+    empreintes_vues = np.empty(0, dtype=np.uint64)
+    debut = 0
+
+    for lot in lire_excel_par_lots(fichier, taille_lot):
+        lot.index = pd.RangeIndex(debut, debut + len(lot))
+        debut += len(lot)
+
+        eligibles = filtrer_contrats_eligibles(nettoyer_donnees(lot))
+
+        # 🔁 Doublons avec les blocs précédents (empreinte sur les valeurs brutes, comme drop_duplicates)
+        empreintes = empreintes_lignes(lot.loc[eligibles.index])
+        nouveaux = ~np.isin(empreintes, empreintes_vues)
+        empreintes_vues = np.union1d(empreintes_vues, empreintes)
+
+        lots_eligibles.append(eligibles[nouveaux])
+
+    return pd.concat(lots_eligibles)
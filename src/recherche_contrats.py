@@ -0,0 +1,138 @@
+import threading
+
+import numpy as np
+import pandas as pd
+
+# Index de recherche des numéros de contrat (onglet "🚨 Clients à risque")
+# Index inversé de n-grammes (n <= 3) construit une fois par résultat de scoring :
+# une recherche ne parcourt plus toute la colonne mais intersecte quelques listes de positions.
+
+TAILLE_NGRAMME = 3
+TAILLE_BLOC_INDEX = 50_000  # lignes traitées à la fois : la matrice de codes n-grammes reste de taille bornée
+CARACTERES_REGEX = set(".^$*+?{}[]\\|()")
+
+
+def _codes_ngrammes(matrice: np.ndarray, longueurs: np.ndarray, n: int):
+    """
+    Codes entiers des n-grammes de chaque ligne d'une matrice d'octets (n, largeur).
+    Renvoie (codes, lignes) pour tous les n-grammes complets.
+    """
+    largeur = matrice.shape[1]
+    if largeur < n:
+        return np.empty(0, dtype=np.uint64), np.empty(0, dtype=np.uint64)
+
+    codes = np.zeros((matrice.shape[0], largeur - n + 1), dtype=np.uint64)
+    for decalage in range(n):
+        codes = (codes << np.uint64(8)) | matrice[:, decalage:largeur - n + 1 + decalage].astype(np.uint64)
+
+    valides = np.arange(largeur - n + 1)[None, :] <= (longueurs[:, None] - n)
+    lignes, _ = np.nonzero(valides)
+    return codes[valides], lignes.astype(np.uint64)
+
+
+def _premiers(tableau_trie: np.ndarray) -> np.ndarray:
+    """
+    Masque des premières occurrences de chaque valeur d'un tableau trié.
+    """
+    masque = np.ones(len(tableau_trie), dtype=bool)
+    masque[1:] = tableau_trie[1:] != tableau_trie[:-1]
+    return masque
+
+
+class IndexContrats:
+    """
+    Index de sous-chaînes sur les numéros de contrat d'un résultat de scoring.
+    rechercher(motif) renvoie les positions (triées) des lignes dont le numéro contient motif,
+    comme serie.astype(str).str.contains(motif).
+    """
+
+    def __init__(self, numeros: pd.Series):
+        self._textes = numeros.astype(str).to_numpy(dtype=object)
+        self._octets = np.array([texte.encode("utf-8") for texte in self._textes], dtype=bytes)
+        self._index = {}  # n -> (codes triés, débuts, fins, positions)
+        self._verrou = threading.Lock()  # index partagé entre les sessions Streamlit (st.cache_resource)
+        self._index_ngrammes(TAILLE_NGRAMME)  # index principal ; n < 3 construits à la demande
+
+    def __len__(self) -> int:
+        return len(self._octets)
+
+    @property
+    def nbytes(self) -> int:
+        taille = self._octets.nbytes
+        for tableaux in self._index.values():
+            taille += sum(tableau.nbytes for tableau in tableaux)
+        return taille
+
+    def _index_ngrammes(self, n: int):
+        """
+        Index inversé des n-grammes, construit à la première recherche de cette taille.
+        """
+        index = self._index.get(n)
+        if index is None:
+            with self._verrou:
+                if n not in self._index:
+                    self._index[n] = self._construire_index(n)
+                index = self._index[n]
+        return index
+
+    def _construire_index(self, n: int):
+        """
+        Construit l'index des n-grammes par blocs de TAILLE_BLOC_INDEX lignes :
+        seules les paires (code, ligne) uniques de chaque bloc sont conservées.
+        """
+        largeur = self._octets.dtype.itemsize
+        blocs = []
+        for debut in range(0, len(self._octets), TAILLE_BLOC_INDEX):
+            octets = self._octets[debut:debut + TAILLE_BLOC_INDEX]
+            matrice = octets.view(np.uint8).reshape(len(octets), largeur)
+            codes, lignes = _codes_ngrammes(matrice, np.char.str_len(octets), n)
+            # Paires (code, ligne) uniques du bloc
+            cles = np.sort((codes << np.uint64(32)) | (lignes + np.uint64(debut)))
+            blocs.append(cles[_premiers(cles)])
+
+        # Les blocs portent sur des lignes distinctes : un tri suffit, sans nouveau dédoublonnage
+        cles = np.sort(np.concatenate(blocs)) if blocs else np.empty(0, dtype=np.uint64)
+        codes_tries = cles >> np.uint64(32)
+        positions = (cles & np.uint64(0xFFFFFFFF)).astype(np.int64)
+
+        debuts = np.flatnonzero(_premiers(codes_tries))
+        codes_uniques = codes_tries[debuts]
+        fins = np.append(debuts[1:], len(codes_tries))
+        return codes_uniques, debuts, fins, positions
+
+    def _liste(self, n: int, code: np.uint64) -> np.ndarray:
+        codes, debuts, fins, positions = self._index_ngrammes(n)
+        i = np.searchsorted(codes, code)
+        if i == len(codes) or codes[i] != code:
+            return positions[:0]
+        return positions[debuts[i]:fins[i]]
+
+    def rechercher(self, motif: str) -> np.ndarray:
+        """
+        Positions des numéros de contrat contenant motif.
+        Un motif contenant des caractères d'expression régulière est traité comme str.contains.
+        """
+        if any(caractere in CARACTERES_REGEX for caractere in motif):
+            return np.flatnonzero(pd.Series(self._textes, dtype=object).str.contains(motif).to_numpy(dtype=bool))
+
+        motif_octets = motif.encode("utf-8")
+        if not motif_octets:
+            return np.arange(len(self._octets))
+
+        n = min(TAILLE_NGRAMME, len(motif_octets))
+        matrice_motif = np.frombuffer(motif_octets, dtype=np.uint8)[None, :]
+        codes, _ = _codes_ngrammes(matrice_motif, np.array([len(motif_octets)]), n)
+
+        # Intersection des listes, de la plus courte à la plus longue
+        listes = sorted((self._liste(n, code) for code in np.unique(codes)), key=len)
+        candidats = listes[0]
+        for liste in listes[1:]:
+            if len(candidats) == 0:
+                break
+            candidats = np.intersect1d(candidats, liste, assume_unique=True)
+
+        # Vérification : les n-grammes trouvés doivent être contigus dans le numéro
+        if len(motif_octets) > n and len(candidats):
+            candidats = candidats[np.char.find(self._octets[candidats], motif_octets) >= 0]
+
+        return candidats
@@ -0,0 +1,95 @@
+import hashlib
+import os
+import threading
+
+import joblib
+
+from src.instrumentation import instrumenter
+
+# Registre des modèles chargés : un seul chargement par fichier et par processus,
+# partagé entre les sessions Streamlit et les threads.
+# Le fichier n'est relu que si sa date de modification / taille change ET que son contenu a changé.
+
+MODELE_PAR_DEFAUT = "models/xgboost_model.joblib"
+FORMATS_NATIFS_XGBOOST = (".json", ".ubj")
+
+_MODELES = {}  # chemin absolu -> {"modele", "mtime_ns", "taille", "empreinte"}
+_VERROU = threading.Lock()
+
+
+def empreinte_fichier(chemin: str) -> str:
+    """
+    Empreinte SHA256 du contenu d'un fichier modèle.
+    """
+    sha = hashlib.sha256()
+    with open(chemin, "rb") as f:
+        for bloc in iter(lambda: f.read(1024 * 1024), b""):
+            sha.update(bloc)
+    return sha.hexdigest()
+
+
+@instrumenter("chargement_modele")
+def _charger_depuis_disque(chemin: str):
+    """
+    Charge un modèle :
+    - format natif XGBoost (.json / .ubj) : plus rapide que le dépickling du wrapper sklearn
+    - sinon joblib (XGBClassifier ou autre estimateur sklearn)
+    """
+    if os.path.splitext(chemin)[1].lower() in FORMATS_NATIFS_XGBOOST:
+        from xgboost import XGBClassifier
+        modele = XGBClassifier()
+        modele.load_model(chemin)
+        return modele
+    return joblib.load(chemin)
+
+
+def _entree_a_jour(chemin: str) -> dict:
+    chemin_abs = os.path.abspath(chemin)
+    stat = os.stat(chemin_abs)  # FileNotFoundError si le modèle n'existe pas
+
+    with _VERROU:
+        entree = _MODELES.get(chemin_abs)
+        if entree is not None and (entree["mtime_ns"], entree["taille"]) == (stat.st_mtime_ns, stat.st_size):
+            return entree
+
+        empreinte = empreinte_fichier(chemin_abs)
+        if entree is None or entree["empreinte"] != empreinte:
+            entree = {"modele": _charger_depuis_disque(chemin_abs), "empreinte": empreinte}
+            _MODELES[chemin_abs] = entree
+
+        entree["mtime_ns"] = stat.st_mtime_ns
+        entree["taille"] = stat.st_size
+        return entree
+
+
+def charger_modele(chemin: str = MODELE_PAR_DEFAUT):
+    """
+    Renvoie le modèle stocké dans chemin, chargé une seule fois par processus.
+    Le modèle renvoyé est partagé : il ne doit pas être modifié par l'appelant.
+    """
+    return _entree_a_jour(chemin)["modele"]
+
+
+def version_modele(chemin: str = MODELE_PAR_DEFAUT) -> str:
+    """
+    Identifiant de version du modèle (empreinte SHA256 du fichier chargé).
+    """
+    return _entree_a_jour(chemin)["empreinte"]
+
+
+def exporter_format_natif(chemin_modele: str = MODELE_PAR_DEFAUT, chemin_sortie: str = None) -> str:
+    """
+    Exporte un XGBClassifier sauvegardé avec joblib au format natif XGBoost (UBJ par défaut).
+    """
+    if chemin_sortie is None:
+        chemin_sortie = os.path.splitext(chemin_modele)[0] + ".ubj"
+    charger_modele(chemin_modele).save_model(chemin_sortie)
+    return chemin_sortie
+
+
+def vider_registre():
+    """
+    Oublie tous les modèles chargés (ils seront relus au prochain appel).
+    """
+    with _VERROU:
+        _MODELES.clear()
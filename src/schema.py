@@ -0,0 +1,112 @@
+import json
+import os
+
+import numpy as np
+import pandas as pd
+
+from src.instrumentation import instrumenter
+
+# Schéma compact des jeux de modélisation : un type déclaré par colonne connue.
+# - "int8" / "int16" / "int32" : entiers (binaires, indicateurs, compteurs, durées)
+# - "float32" : montants et kilométrages
+# - "category" : texte répété (réseau de vente...)
+# - "identifiant" : numéro de contrat, entier le plus petit possible s'il est numérique,
+#   sinon texte compact (catégorie si les valeurs se répètent, chaîne Arrow sinon)
+# XGBoost et la matrice de scoring travaillent en float32 : les colonnes compactes y entrent sans copie en float64.
+
+SCHEMA_MODELE = {
+    "No du Contrat": "identifiant",
+    "Vendeur Réseau": "category",
+    "Non_renouvellement": "int8",
+    "flag_actif": "int8",
+    "Gest. carburant_bin": "int8",
+    "Assurance_bin": "int8",
+    "Divers_bin": "int8",
+    "Nombre de prestations": "int8",
+    "Anciennete_contrat": "int16",
+    "Ecart_restitution_jours": "int32",
+    "Montant loyer mensuel": "float32",
+    "Km souscrit": "float32",
+}
+
+RAPPORT_MEMOIRE_PATH = "outputs/rapports/memoire_types.json"
+
+
+def _entier_compact(serie: pd.Series, type_declare: str) -> pd.Series:
+    """
+    Entier du type déclaré ; type entier plus large si les valeurs ne tiennent pas,
+    float32 si la colonne a des valeurs manquantes ou non entières.
+    """
+    valeurs = pd.to_numeric(serie, errors="coerce")
+    if valeurs.isna().any() or not (valeurs == np.floor(valeurs)).all():
+        return valeurs.astype(np.float32)
+
+    if len(valeurs) == 0:
+        return valeurs.astype(type_declare)
+
+    types_possibles = [t for t in ("int8", "int16", "int32", "int64") if np.dtype(t).itemsize >= np.dtype(type_declare).itemsize]
+    for type_entier in types_possibles:
+        bornes = np.iinfo(type_entier)
+        if bornes.min <= valeurs.min() and valeurs.max() <= bornes.max:
+            return valeurs.astype(type_entier)
+    return valeurs
+
+
+def _identifiant_compact(serie: pd.Series) -> pd.Series:
+    if pd.api.types.is_numeric_dtype(serie):
+        return _entier_compact(serie, "int32") if serie.notna().all() else serie
+    if serie.nunique(dropna=True) < len(serie) // 2:
+        return serie.astype("category")
+    return serie.astype("string[pyarrow]")
+
+
+@instrumenter()
+def compacter_types(df: pd.DataFrame, schema: dict = SCHEMA_MODELE, rapport: dict = None) -> pd.DataFrame:
+    """
+    Convertit les colonnes de df présentes dans schema vers leur type compact (les autres sont inchangées).
+    Si rapport (dict) est fourni, il est complété avec la mémoire avant / après et le type de chaque colonne.
+    """
+    avant = df.memory_usage(deep=True, index=False)
+    colonnes = {}
+
+    for col, type_declare in schema.items():
+        if col not in df.columns or str(df[col].dtype) == type_declare:
+            continue
+        if type_declare == "identifiant":
+            colonnes[col] = _identifiant_compact(df[col])
+        elif type_declare == "category":
+            colonnes[col] = df[col].astype("category")
+        elif type_declare.startswith("int"):
+            colonnes[col] = _entier_compact(df[col], type_declare)
+        else:
+            colonnes[col] = pd.to_numeric(df[col], errors="coerce").astype(type_declare)
+
+    df_compact = df.copy(deep=False)  # seules les colonnes converties sont de nouveaux tableaux
+    for col, serie in colonnes.items():
+        df_compact[col] = serie
+
+    if rapport is not None:
+        apres = df_compact.memory_usage(deep=True, index=False)
+        rapport.update({
+            "octets_avant": int(avant.sum()),
+            "octets_apres": int(apres.sum()),
+            "colonnes": {
+                str(col): {
+                    "type_avant": str(df[col].dtype),
+                    "type_apres": str(df_compact[col].dtype),
+                    "octets_avant": int(avant[col]),
+                    "octets_apres": int(apres[col]),
+                }
+                for col in colonnes
+            },
+        })
+    return df_compact
+
+
+def ecrire_rapport_memoire(rapports: dict, chemin: str = RAPPORT_MEMOIRE_PATH):
+    """
+    Écrit le rapport mémoire de la compaction des types (une entrée par jeu de données).
+    """
+    os.makedirs(os.path.dirname(chemin) or ".", exist_ok=True)
+    with open(chemin, "w", encoding="utf-8") as f:
+        json.dump(rapports, f, ensure_ascii=False, indent=2)
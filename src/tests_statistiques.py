@@ -1,49 +1,197 @@
 import pandas as pd
-from scipy.stats import chi2_contingency, ttest_ind
+import numpy as np
+from concurrent.futures import ThreadPoolExecutor
+import json
 import os
 
+from src.instrumentation import instrumenter
+
 RAPPORTS_PATH = "outputs/rapports/"
 os.makedirs(RAPPORTS_PATH, exist_ok=True)
 
+VARIABLES_CHI2 = ["Assurance_bin", "Gest. carburant_bin", "Divers_bin"]
+VARIABLES_CONTINUES = [
+    "Montant loyer mensuel",
+    "Km souscrit",
+    "Anciennete_contrat",
+    "Ecart_restitution_jours"
+]
+
+# Rééchantillonnage : nombre maximal d'éléments d'un lot (lignes x tirages) traité en une opération NumPy
+ELEMENTS_PAR_LOT = 4_000_000
+
 def test_chi2(df: pd.DataFrame, var_cat: str, cible: str = "Non_renouvellement"):
     """Test du chi² pour une variable binaire vs la cible"""
+    from scipy.stats import chi2_contingency
     table = pd.crosstab(df[var_cat], df[cible])
     chi2, p, dof, expected = chi2_contingency(table)
     return {"variable": var_cat, "chi2": chi2, "p_value": p}
 
 def test_ttest(df: pd.DataFrame, var_cont: str, cible: str = "Non_renouvellement"):
     """Test de Student pour une variable continue vs la cible"""
+    from scipy.stats import ttest_ind
     group0 = df[df[cible] == 0][var_cont].dropna()
     group1 = df[df[cible] == 1][var_cont].dropna()
     stat, p = ttest_ind(group0, group1, equal_var=False)
     return {"variable": var_cont, "statistic": stat, "p_value": p}
 
-def executer_tests_statistiques(df: pd.DataFrame):
+
+# 🧮 Moteur groupé : tous les tests à partir d'une seule agrégation par valeur de la cible
+
+def calculer_tests(df: pd.DataFrame, variables_chi2: list = VARIABLES_CHI2,
+                   variables_continues: list = VARIABLES_CONTINUES, cible: str = "Non_renouvellement") -> list:
+    """
+    Calcule les tests du chi² (variables binaires) et de Welch (variables continues)
+    à partir d'un seul groupby sur la cible (effectifs, sommes, moyennes, variances par groupe).
+    Mêmes résultats que test_chi2 / test_ttest appliqués variable par variable.
+    """
+    from scipy.stats import chi2_contingency, ttest_ind_from_stats
+
+    variables_chi2 = [var for var in variables_chi2 if var in df.columns]
+    variables_continues = [var for var in variables_continues if var in df.columns]
+
+    # Moments accumulés en float64 (colonnes float32 du schéma compact, voir src/schema.py)
+    variables = variables_chi2 + variables_continues
+    donnees = df[[cible] + variables].astype({var: np.float64 for var in variables if df[var].dtype == np.float32})
+    stats = donnees.groupby(cible)[variables].agg(["count", "sum", "mean", "var"])
+    stats = stats.reindex([0, 1])
+    resultats = []
+
+    for var in variables_chi2:
+        # Table 2x2 (cible x variable) : effectif des 1 = somme, effectif des 0 = count - somme
+        n, uns = stats[(var, "count")].to_numpy(), stats[(var, "sum")].to_numpy()
+        table = np.nan_to_num(np.column_stack([n - uns, uns]))
+        table = table[table.sum(axis=1) > 0][:, table.sum(axis=0) > 0]  # comme crosstab : modalités absentes retirées
+        chi2, p, dof, expected = chi2_contingency(table)
+        resultats.append({
+            "variable": var, "test": "chi2", "chi2": float(chi2), "ddl": int(dof), "p_value": float(p),
+            "n_0": int(n[0]), "n_1": int(n[1]),
+        })
+
+    for var in variables_continues:
+        n, moyenne, variance = (stats[(var, agregat)].to_numpy() for agregat in ("count", "mean", "var"))
+        stat, p = ttest_ind_from_stats(
+            moyenne[0], np.sqrt(variance[0]), n[0], moyenne[1], np.sqrt(variance[1]), n[1], equal_var=False
+        )
+        resultats.append({
+            "variable": var, "test": "welch", "statistic": float(stat), "p_value": float(p),
+            "n_0": int(n[0]), "n_1": int(n[1]), "moyenne_0": float(moyenne[0]), "moyenne_1": float(moyenne[1]),
+        })
+
+    return resultats
+
+
+# 🎲 Rééchantillonnage : différence des moyennes (ou des proportions) entre cible = 1 et cible = 0
+
+def _lot_permutations(valeurs: np.ndarray, cible: np.ndarray, n_tirages: int, graine) -> np.ndarray:
+    """
+    Différences de moyennes pour n_tirages permutations de la cible, calculées en un produit matriciel.
+    """
+    rng = np.random.default_rng(graine)
+    etiquettes = rng.permuted(np.broadcast_to(cible, (n_tirages, len(cible))), axis=1)
+    n_1 = cible.sum()
+    somme_1 = etiquettes @ valeurs
+    return somme_1 / n_1 - (valeurs.sum() - somme_1) / (len(valeurs) - n_1)
+
+
+def _lot_bootstrap(groupe_0: np.ndarray, groupe_1: np.ndarray, n_tirages: int, graine) -> np.ndarray:
+    """
+    Différences de moyennes pour n_tirages rééchantillonnages avec remise de chaque groupe.
+    """
+    rng = np.random.default_rng(graine)
+    moyennes_0 = groupe_0[rng.integers(0, len(groupe_0), (n_tirages, len(groupe_0)))].mean(axis=1)
+    moyennes_1 = groupe_1[rng.integers(0, len(groupe_1), (n_tirages, len(groupe_1)))].mean(axis=1)
+    return moyennes_1 - moyennes_0
+
+
+def reechantillonner(df: pd.DataFrame, variable: str, mode: str = "permutation", n_tirages: int = 1000,
+                     cible: str = "Non_renouvellement", n_workers: int = None, graine: int = 42) -> dict:
+    """
+    Test par permutation (p-value) ou intervalle de confiance bootstrap à 95 %
+    de la différence des moyennes de variable entre les deux groupes de la cible.
+    Les tirages sont faits par lots vectorisés NumPy, répartis sur plusieurs threads
+    (chaque lot a sa propre graine : résultat identique quel que soit n_workers).
+    """
+    if mode not in ("permutation", "bootstrap"):
+        raise ValueError(f"Mode de rééchantillonnage inconnu : {mode}")
+
+    donnees = df[[variable, cible]].dropna()
+    valeurs = donnees[variable].to_numpy(dtype=np.float64)
+    etiquettes = (donnees[cible].to_numpy() == 1).astype(np.float64)
+    groupe_0, groupe_1 = valeurs[etiquettes == 0], valeurs[etiquettes == 1]
+    observee = groupe_1.mean() - groupe_0.mean()
+
+    taille_lot = max(1, min(n_tirages, ELEMENTS_PAR_LOT // max(len(valeurs), 1)))
+    tailles = [min(taille_lot, n_tirages - debut) for debut in range(0, n_tirages, taille_lot)]
+    graines = np.random.SeedSequence(graine).spawn(len(tailles))
+
+    if mode == "permutation":
+        calculer = lambda taille, graine_lot: _lot_permutations(valeurs, etiquettes, taille, graine_lot)
+    else:
+        calculer = lambda taille, graine_lot: _lot_bootstrap(groupe_0, groupe_1, taille, graine_lot)
+
+    with ThreadPoolExecutor(max_workers=n_workers or os.cpu_count() or 1) as pool:
+        differences = np.concatenate(list(pool.map(calculer, tailles, graines)))
+
+    resultat = {"variable": variable, "mode": mode, "n_tirages": n_tirages, "difference_moyennes": float(observee)}
+    if mode == "permutation":
+        extremes = np.count_nonzero(np.abs(differences) >= abs(observee))
+        resultat["p_value"] = float((extremes + 1) / (n_tirages + 1))
+    else:
+        bas, haut = np.percentile(differences, [2.5, 97.5])
+        resultat["ic_95"] = [float(bas), float(haut)]
+    return resultat
+
+
+@instrumenter()
+def executer_tests_statistiques(df: pd.DataFrame, mode_reechantillonnage: str = None, n_tirages: int = 1000,
+                                n_workers: int = None):
+    """
+    Écrit les tests statistiques dans outputs/rapports/tests_statistiques.txt
+    et le détail des résultats dans outputs/rapports/tests_statistiques.json.
+
+    Args:
+        mode_reechantillonnage : None, "permutation" ou "bootstrap" (en plus des tests classiques)
+        n_tirages : nombre de permutations / rééchantillonnages par variable
+    """
+    resultats = calculer_tests(df)
+    reechantillonnages = []
+    if mode_reechantillonnage is not None:
+        reechantillonnages = [
+            reechantillonner(df, res["variable"], mode_reechantillonnage, n_tirages, n_workers=n_workers)
+            for res in resultats
+        ]
+
     rapport_path = os.path.join(RAPPORTS_PATH, "tests_statistiques.txt")
     with open(rapport_path, "w", encoding="utf-8") as f:
 
         f.write("📊 TESTS STATISTIQUES\n\n")
 
         # 🔢 Chi² pour variables binaires
-        variables_chi2 = ["Assurance_bin", "Gest. carburant_bin", "Divers_bin"]
         f.write("🔍 Test du Chi² (variables binaires vs Non_renouvellement)\n")
-        for var in variables_chi2:
-            if var in df.columns:
-                result = test_chi2(df, var)
+        for result in resultats:
+            if result["test"] == "chi2":
                 f.write(f"{result['variable']} : p-value = {result['p_value']:.4f}\n")
         f.write("\n")
 
         # 📉 T-test pour variables continues
-        variables_continues = [
-            "Montant loyer mensuel",
-            "Km souscrit",
-            "Anciennete_contrat",
-            "Ecart_restitution_jours"
-        ]
         f.write("📉 Test de Student (variables continues vs Non_renouvellement)\n")
-        for var in variables_continues:
-            if var in df.columns:
-                result = test_ttest(df, var)
+        for result in resultats:
+            if result["test"] == "welch":
                 f.write(f"{result['variable']} : p-value = {result['p_value']:.4f}\n")
 
-    print(f"✅ Tests statistiques enregistrés dans {rapport_path}")
+        # 🎲 Rééchantillonnage
+        if reechantillonnages:
+            f.write(f"\n🎲 {mode_reechantillonnage.capitalize()} ({n_tirages} tirages, différence des moyennes 1 - 0)\n")
+            for result in reechantillonnages:
+                if mode_reechantillonnage == "permutation":
+                    detail = f"p-value = {result['p_value']:.4f}"
+                else:
+                    detail = f"IC 95 % = [{result['ic_95'][0]:.4f} ; {result['ic_95'][1]:.4f}]"
+                f.write(f"{result['variable']} : différence = {result['difference_moyennes']:.4f}, {detail}\n")
+
+    json_path = os.path.join(RAPPORTS_PATH, "tests_statistiques.json")
+    with open(json_path, "w", encoding="utf-8") as f:
+        json.dump({"tests": resultats, "reechantillonnage": reechantillonnages}, f, ensure_ascii=False, indent=2)
+
+    print(f"✅ Tests statistiques enregistrés dans {rapport_path} et {json_path}")
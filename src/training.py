@@ -1,16 +1,25 @@
 import pandas as pd
-from sklearn.model_selection import train_test_split
-from sklearn.ensemble import RandomForestClassifier
-from sklearn.metrics import classification_report, confusion_matrix
 import joblib
 import os
-import matplotlib.pyplot as plt
-import seaborn as sns
+
+from src.cache_entrainement import (
+    charger_entrainement,
+    empreinte_entrainement,
+    parametres_modele,
+    sauvegarder_entrainement
+)
+
+# scikit-learn, matplotlib et seaborn ne sont importés qu'au premier entraînement.
 
 def entrainer_random_forest(df_model: pd.DataFrame):
     """
     Entraîne un modèle Random Forest et le sauvegarde.
     """
+    import matplotlib.pyplot as plt
+    import seaborn as sns
+    from sklearn.ensemble import RandomForestClassifier
+    from sklearn.metrics import classification_report, confusion_matrix
+    from sklearn.model_selection import train_test_split
 
     # 🔀 Séparer X et y (sans flag_actif)
     X = df_model.drop(columns=["No du Contrat", "Non_renouvellement", "flag_actif"], errors="ignore")
@@ -26,18 +35,31 @@ def entrainer_random_forest(df_model: pd.DataFrame):
         random_state=42,
         class_weight="balanced"
     )
-    clf.fit(X_train, y_train)
 
-    y_pred = clf.predict(X_test)
-    y_proba = clf.predict_proba(X_test)[:, 1]
+    # 🗄 Même données, même split, même configuration : réutiliser l'entraînement stocké
+    empreinte = empreinte_entrainement(X, y, 42, parametres_modele(clf))
+    resultat = charger_entrainement(empreinte)
+
+    if resultat is None:
+        clf.fit(X_train, y_train)
+        y_pred = clf.predict(X_test)
+
+        resultat = {
+            "modele": clf,
+            "rapport": classification_report(y_test, y_pred),
+            "matrice_confusion": confusion_matrix(y_test, y_pred)
+        }
+        sauvegarder_entrainement(empreinte, resultat)
+    else:
+        print("♻️ Données et paramètres inchangés : modèle déjà entraîné réutilisé.")
+
+    clf, rapport, conf_mat = resultat["modele"], resultat["rapport"], resultat["matrice_confusion"]
 
     # 🧾 Rapport
-    rapport = classification_report(y_test, y_pred)
     print("\n📈 Rapport Random Forest :")
     print(rapport)
 
     # 📊 Matrice de confusion
-    conf_mat = confusion_matrix(y_test, y_pred)
     plt.figure(figsize=(5, 4))
     sns.heatmap(conf_mat, annot=True, fmt="d", cmap="Blues")
     plt.title("Matrice de confusion - Random Forest")
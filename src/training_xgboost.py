@@ -1,18 +1,49 @@
-import pandas as pd
 import os
+
 import joblib
-import matplotlib.pyplot as plt
-import seaborn as sns
-import streamlit as st
-from sklearn.model_selection import train_test_split
-from sklearn.metrics import confusion_matrix
-from xgboost import XGBClassifier
+import pandas as pd
 
-def entrainer_xgboost(df_model: pd.DataFrame):
-    st.info("🚀 Entraînement du modèle XGBoost...")
+from src.arbres_numpy import exporter_arbres
+from src.cache_entrainement import (
+    charger_entrainement,
+    empreinte_entrainement,
+    parametres_modele,
+    sauvegarder_entrainement
+)
+from src.instrumentation import instrumenter
+from src.predict import COLONNES_NON_FEATURES
+
+# Entraînement du modèle XGBoost, sans interface : l'affichage Streamlit est dans src/interface_streamlit.py.
+# scikit-learn et XGBoost ne sont importés qu'au premier entraînement.
+
+# ⚙ Hyperparamètres historiques (sans recherche)
+HYPERPARAMETRES_XGBOOST = {"n_estimators": 100, "max_depth": 6, "learning_rate": 0.1}
+
+@instrumenter()
+def entrainer_modele_xgboost(df_model: pd.DataFrame, optimiser: bool = False, **options_recherche) -> dict:
+    """
+    Entraîne le modèle XGBoost et le sauvegarde (models/xgboost_model.joblib + format natif .ubj).
+    Avec optimiser=True, les hyperparamètres sont d'abord choisis par validation croisée
+    (src/optimisation_xgboost.py, options : n_essais, methode, budget_secondes...).
+
+    Returns:
+        dict : modele, matrice_confusion (jeu de test), hyperparametres,
+               recherche (rapport de la recherche ou None), reutilise (entraînement relu depuis le magasin)
+    """
+    from sklearn.metrics import confusion_matrix
+    from sklearn.model_selection import train_test_split
+    from xgboost import XGBClassifier
+
+    # ⚙ Hyperparamètres : valeurs historiques, ou meilleure configuration trouvée par la recherche
+    hyperparametres = dict(HYPERPARAMETRES_XGBOOST)
+    rapport = None
+    if optimiser:
+        from src.optimisation_xgboost import rechercher_hyperparametres
+        rapport = rechercher_hyperparametres(df_model, **options_recherche)
+        hyperparametres = {**rapport["meilleure_configuration"], "tree_method": "hist"}
 
     # 🔀 Séparation des variables explicatives (X) et de la cible (y)
-    X = df_model.drop(columns=["No du Contrat", "Non_renouvellement"], errors="ignore")
+    X = df_model.drop(columns=COLONNES_NON_FEATURES, errors="ignore")
     y = df_model["Non_renouvellement"]
 
     # ✂ Split des données
@@ -22,100 +53,44 @@ def entrainer_xgboost(df_model: pd.DataFrame):
 
     # ⚙ Initialisation du modèle
     model = XGBClassifier(
-        n_estimators=100,
-        max_depth=6,
-        learning_rate=0.1,
+        **hyperparametres,
         objective='binary:logistic',
         random_state=42,
         use_label_encoder=False,
         eval_metric='logloss'
     )
 
-    # 🧠 Entraînement
-    model.fit(X_train, y_train)
-
-    # 💾 Sauvegarde du modèle avec les noms des features
-    os.makedirs("models", exist_ok=True)
-    booster = model.get_booster()
-    booster.feature_names = list(X.columns)
-    joblib.dump(model, "models/xgboost_model.joblib")
-
-    # 📊 Matrice de confusion
-    y_pred = model.predict(X_test)
-    cm = confusion_matrix(y_test, y_pred)
-
-    # 📈 Affichage de la matrice
-    fig_cm, ax_cm = plt.subplots(figsize=(4, 3))
-    sns.heatmap(cm, annot=True, fmt="d", cmap="Blues", ax=ax_cm)
-    ax_cm.set_title("Matrice de confusion - XGBoost")
-    ax_cm.set_xlabel("Label prédit")
-    ax_cm.set_ylabel("Label réel")
-    plt.tight_layout()
-
-    os.makedirs("outputs/figures", exist_ok=True)
-    plt.savefig("outputs/figures/confusion_matrix_xgboost.png")
-    
-    col1, col2, col3 = st.columns([1, 2, 1])
-    with col2:
-        st.pyplot(fig_cm)
-
-    # ⬇ Bouton de téléchargement
-    with open("outputs/figures/confusion_matrix_xgboost.png", "rb") as f:
-        st.download_button(
-            label="📥 Télécharger la matrice de confusion",
-            data=f,
-            file_name="confusion_matrix_xgboost.png",
-            mime="image/png"
-        )
-
-    # 🔍 Résumé métier
-    total = cm.sum()
-    bonnes_predictions = cm[0][0] + cm[1][1]
-    erreurs = cm[0][1] + cm[1][0]
-    taux_bonnes_pred = bonnes_predictions / total
-    taux_erreurs = erreurs / total
-
-    st.markdown("### 🧾 Résumé des résultats")
-    st.markdown(
-        f"""
-        - ✅ *Bonnes prédictions* : {bonnes_predictions} contrats correctement identifiés comme renouvelés ou non renouvelés.
-        - ❌ *Erreurs de prédiction* : {erreurs} contrats mal prédits.
-        """
-    )
+    # 🗄 Même données, même split, même configuration : réutiliser l'entraînement stocké
+    empreinte = empreinte_entrainement(X, y, 42, parametres_modele(model))
+    resultat = charger_entrainement(empreinte)
 
-    # 📘 Explication finale pour les équipes métier
-    st.markdown("---")
-    st.markdown(
-        f"""
-        <div style="font-size:16px; line-height:1.6;">
-        ℹ <strong>Sur un total de <u>{total}</u> contrats analysés</strong>, 
-        le modèle XGBoost a correctement prédit <strong>{bonnes_predictions}</strong> d'entre eux, 
-        soit un taux de bonne prédiction de <strong>{taux_bonnes_pred:.1%}</strong>.
-        <br>Il s'est trompé sur <strong>{erreurs}</strong> contrats.
-        <br><br>✅ Cela montre que le modèle est globalement performant, 
-        tout en laissant place à de futures améliorations.
-        </div>
-        """,
-        unsafe_allow_html=True
-    )
+    if resultat is None:
+        # 🧠 Entraînement (avec optimiser=True, la recherche a déjà entraîné ce modèle sur le même split)
+        if rapport is not None:
+            model = joblib.load(rapport["chemin_modele"])
+        else:
+            model.fit(X_train, y_train)
+        booster = model.get_booster()
+        booster.feature_names = list(X.columns)
 
-    # 📊 Graphique circulaire
-    fig_pie, ax_pie = plt.subplots(figsize=(4, 4))
-    ax_pie.pie(
-        [bonnes_predictions, erreurs],
-        labels=["Bonnes prédictions", "Erreurs"],
-        autopct="%1.1f%%",
-        colors=["#4CAF50", "#F44336"],
-        startangle=90,
-        wedgeprops=dict(width=0.5)
-    )
-    ax_pie.axis("equal")
+        # 📊 Matrice de confusion
+        y_pred = model.predict(X_test)
+        cm = confusion_matrix(y_test, y_pred)
 
-    # 🎯 Titre et espacement centré
-    st.markdown("<div style='margin-top: 30px; text-align: center;'><h4>📊 Taux global de bonne prédiction</h4></div>", unsafe_allow_html=True)
-    col1, col2, col3 = st.columns([1, 2, 1])
-    with col2:
-        st.pyplot(fig_pie)
+        sauvegarder_entrainement(empreinte, {"modele": model, "matrice_confusion": cm})
+    else:
+        model, cm = resultat["modele"], resultat["matrice_confusion"]
 
-    # ✅ Confirmation finale
-    st.success("✅ Modèle XGBoost entraîné avec succès")
\ No newline at end of file
+    # 💾 Sauvegarde du modèle avec les noms des features
+    os.makedirs("models", exist_ok=True)
+    joblib.dump(model, "models/xgboost_model.joblib")
+    model.save_model("models/xgboost_model.ubj")  # format natif, chargement plus rapide (src/registre_modeles.py)
+    exporter_arbres("models/xgboost_model.joblib")  # tables NumPy pour le scoring sans XGBoost (src/arbres_numpy.py)
+
+    return {
+        "modele": model,
+        "matrice_confusion": cm,
+        "hyperparametres": hyperparametres,
+        "recherche": rapport,
+        "reutilise": resultat is not None,
+    }
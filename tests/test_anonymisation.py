@@ -0,0 +1,43 @@
+import numpy as np
+import pandas as pd
+from openpyxl import Workbook, load_workbook
+
+from src.anonymisation import anonymiser_classeur, anonymiser_dataframe
+
+COLONNES_SENSIBLES = ["No du Contrat", "Client"]
+
+
+def _contrats() -> pd.DataFrame:
+    # "No du Contrat" lu comme flottant à cause de la valeur manquante
+    return pd.DataFrame({
+        "No du Contrat": [123.0, np.nan, 456.0],
+        "Client": ["A", "B", "A"],
+        "Montant": [10.5, 20.0, 30.25],
+    })
+
+
+def test_dataframe_et_classeur_donnent_les_memes_empreintes(tmp_path):
+    df = _contrats()
+    source, destination = tmp_path / "brut.xlsx", tmp_path / "anonyme.xlsx"
+
+    classeur = Workbook()
+    feuille = classeur.active
+    feuille.append(list(df.columns))
+    for ligne in df.itertuples(index=False):
+        feuille.append([None if pd.isna(valeur) else valeur for valeur in ligne])
+    classeur.save(source)
+
+    anonymiser_classeur(str(source), str(destination), COLONNES_SENSIBLES, cle=b"secret", taille_lot=2)
+    lignes = list(load_workbook(destination, read_only=True).active.values)
+    via_classeur = pd.DataFrame(lignes[1:], columns=lignes[0])
+
+    via_dataframe = anonymiser_dataframe(df, COLONNES_SENSIBLES, cle=b"secret")
+
+    for col in COLONNES_SENSIBLES:
+        assert via_classeur[col].tolist() == via_dataframe[col].tolist()
+
+
+def test_identifiant_flottant_entier_hache_comme_entier():
+    flottants = anonymiser_dataframe(_contrats(), ["No du Contrat"])
+    entiers = anonymiser_dataframe(pd.DataFrame({"No du Contrat": [123, 456]}), ["No du Contrat"])
+    assert flottants["No du Contrat"].iloc[[0, 2]].tolist() == entiers["No du Contrat"].tolist()